@@ -0,0 +1,4 @@
+"""
+Benchmarks for PriOS analytics. Each module can be run as a script, e.g.
+`python -m benchmarks.memory`.
+"""
@@ -0,0 +1,71 @@
+"""
+Cold-start import time of modules, measured in fresh interpreters with `python -X importtime`.
+
+Reports, per module, the median total import time over several runs and the slowest
+top-level dependencies it pulls in (e.g. to catch pandas or scipy being imported eagerly again).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_MODULES = ['prios_api.disagreement', 'insights.nubby_polarizing_and_oos']
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self microseconds, cumulative microseconds) of each `-X importtime` line, in order
+
+    Examples
+    --------
+    >>> parse_importtime('import time: self [us] | cumulative | imported package\\n'
+    ...                  'import time:       120 |        450 |   numpy')
+    [('numpy', 120, 450)]
+    """
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        records.append((name.strip(), int(self_time), int(cumulative)))
+    return records
+
+
+def import_once(module: str) -> List[Tuple[str, int, int]]:
+    """Imports `module` in a fresh interpreter and returns its `-X importtime` records"""
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_ROOT, os.environ.get('PYTHONPATH')])))
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+                               stderr=subprocess.PIPE, env=environment, universal_newlines=True, check=True)
+    return parse_importtime(completed.stderr)
+
+
+def import_times(modules: List[str] = None, repeat: int = 5, top: int = 5) -> Dict[str, Dict]:
+    """Median cold-start import time (seconds) of each module and its slowest dependencies"""
+    results = dict()
+    for module in modules or DEFAULT_MODULES:
+        totals, dependencies = [], dict()
+        for _ in range(repeat):
+            records = import_once(module)
+            totals.append(sum(self_time for _, self_time, _ in records))
+            for name, _, cumulative in records:
+                if name != module and not name.startswith(module.split('.')[0]):
+                    dependencies.setdefault(name, []).append(cumulative)
+        slowest = sorted(((statistics.median(times), name) for name, times in dependencies.items()
+                          if '.' not in name), reverse=True)[:top]
+        results[module] = {
+            'seconds': statistics.median(totals) / 1e6,
+            'slowest_dependencies': {name: seconds / 1e6 for seconds, name in slowest}
+        }
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES, help='Modules to import')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreters per module')
+    args = parser.parse_args()
+    print(json.dumps(import_times(args.modules, args.repeat), indent=2))
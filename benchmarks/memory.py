@@ -0,0 +1,49 @@
+"""
+Memory footprint of Dots: bytes per :class:`objects.Dot` versus the slotted
+:class:`compact.Dot`, measured with `tracemalloc`.
+"""
+
+import argparse
+import json
+import tracemalloc
+from typing import Callable, Dict, List
+from prios_api.domain_objects import compact, objects
+
+_NUMBER_OF_PERSONS = 100
+
+
+def bytes_per_object(factory: Callable[[int], object], number_of_objects: int) -> float:
+    """Average number of bytes allocated per object created by `factory`"""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        created = [factory(i) for i in range(number_of_objects)]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # The list holding the objects is not part of their footprint.
+    list_overhead = created.__sizeof__()
+    return (after - before - list_overhead) / number_of_objects
+
+
+def dot_footprints(number_of_dots: int = 100000) -> Dict[str, float]:
+    """Bytes per Dot for each Dot class (persons are shared and excluded)"""
+    results = dict()
+    for name, person_class, dot_class in (('objects.Dot', objects.Person, objects.Dot),
+                                          ('compact.Dot', compact.Person, compact.Dot)):
+        persons: List = [person_class(name=str(i), uuid=i) for i in range(_NUMBER_OF_PERSONS)]
+
+        def factory(i):
+            return dot_class(source=persons[i % _NUMBER_OF_PERSONS],
+                             target=persons[(i * 7) % _NUMBER_OF_PERSONS],
+                             value=float(i % 10 + 1))
+
+        results[name] = bytes_per_object(factory, number_of_dots)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dots', type=int, default=100000, help='Number of Dots to allocate')
+    args = parser.parse_args()
+    print(json.dumps(dot_footprints(args.dots), indent=2))
@@ -0,0 +1,45 @@
+"""
+Size and encode / decode time of a synthetic Meeting serialized with `pickle` versus
+:mod:`prios_api.domain_objects.serialization`.
+"""
+
+import argparse
+import json
+import pickle
+import time
+from typing import Callable, Dict
+from prios_api.domain_objects import objects, serialization
+from prios_api.src import synthetic
+
+
+def measure(dumps: Callable[[objects.Meeting], bytes], loads: Callable[[bytes], objects.Meeting],
+            meeting: objects.Meeting) -> Dict[str, float]:
+    """Serialized size and best-of-three encode and decode times"""
+    encode_seconds, decode_seconds = [], []
+    for _ in range(3):
+        start = time.perf_counter()
+        data = dumps(meeting)
+        encode_seconds.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        loads(data)
+        decode_seconds.append(time.perf_counter() - start)
+    return {'bytes': len(data), 'encode_seconds': min(encode_seconds), 'decode_seconds': min(decode_seconds)}
+
+
+def compare_formats(number_of_dots: int = 50000) -> Dict[str, Dict[str, float]]:
+    meeting = synthetic.meeting(number_of_participants=100, number_of_dots=number_of_dots, number_of_questions=20)
+    meeting.dot_table = None  # Not serialized by `serialization`, so don't make pickle carry it either.
+    # Responses and their Questions refer to each other, so `==` would recurse: compare round trips instead.
+    data = serialization.dumps(meeting)
+    assert serialization.dumps(serialization.loads(data)) == data
+    return {
+        'pickle': measure(lambda x: pickle.dumps(x, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads, meeting),
+        'serialization': measure(serialization.dumps, serialization.loads, meeting)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dots', type=int, default=50000, help='Number of Dots in the meeting')
+    args = parser.parse_args()
+    print(json.dumps(compare_formats(args.dots), indent=2))
@@ -0,0 +1,198 @@
+"""
+Benchmark suite of concepts, analytics and insights on synthetic meetings at realistic scales.
+
+Insights are benchmarked both through the executor (`insight_<number>`) and by calling every
+numbered insight function of :data:`INSIGHT_MODULES` directly (by function name), on the
+meeting, each of its questions, its Dots or its Dot statistics. Benchmarks that raise record
+the error instead of a measurement.
+
+Each benchmark is timed (best of `--repeat` runs) and run once more under `tracemalloc` to
+record its peak memory. Results are printed (or written with `--output`) as JSON; given a
+previous result with `--baseline`, benchmarks that got slower (or use more memory) by more than
+`--tolerance` are reported as regressions and the exit status is non-zero.
+
+Examples
+--------
+    python -m benchmarks.suite --scales small medium --output results.json
+    python -m benchmarks.suite --scales small medium --baseline results.json
+
+The 'large' scale (1M Dots, 5,000 participants) is opt-in: `--scales large`.
+"""
+
+import argparse
+import gc
+import inspect
+import json
+import re
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from prios_api import activity, disagreement
+from prios_api.domain_objects import objects, tables
+from prios_api.src import sharding, synthetic
+from insights import (believable_view_disagrees, describe_actions, executor, nubby_polarizing_and_oos, summaries,
+                      uniqueness)
+
+
+class Scale(NamedTuple):
+    dots: int
+    participants: int
+    questions: int
+
+
+INSIGHT_MODULES = (believable_view_disagrees, describe_actions, nubby_polarizing_and_oos, summaries, uniqueness)
+_INSIGHT_NUMBER = re.compile(r'_\d+$')
+
+SCALES = {
+    'tiny': Scale(dots=10, participants=10, questions=5),
+    'small': Scale(dots=1000, participants=100, questions=5),
+    'medium': Scale(dots=100000, participants=1000, questions=10),
+    'large': Scale(dots=1000000, participants=5000, questions=20),
+}
+
+
+def synthetic_meeting(scale: Scale, seed: int = 0) -> objects.Meeting:
+    """Meeting with `scale.dots` Dots between participants and Questions of every type"""
+    return synthetic.meeting(number_of_participants=scale.participants, number_of_dots=scale.dots,
+                             number_of_questions=scale.questions, seed=seed)
+
+
+def _insight(number: int) -> Callable[[objects.Meeting], Any]:
+    # A new report per call, so that intermediates are not shared across runs.
+    return lambda meeting: executor.MeetingReport(meeting).insight(number)
+
+
+def _direct_insight(function: Callable) -> Optional[Callable[[objects.Meeting], Any]]:
+    """
+    Calls an insight function on the Meeting, each of its Questions (with the engagement in the
+    Meeting, if the function takes `number_participants`), its Dots or its Dot statistics
+    """
+    parameters = inspect.signature(function).parameters
+    argument = next(iter(parameters), None)
+    if argument == 'meeting':
+        return function
+    if argument == 'question' and 'number_participants' in parameters:
+        return lambda meeting: [function(question, number_participants=activity.engagement_in_meeting(meeting))
+                                for question in meeting.questions]
+    if argument == 'question':
+        return lambda meeting: [function(question) for question in meeting.questions]
+    if argument == 'dots':
+        return lambda meeting: function(meeting.dots)
+    if argument == 'statistics':
+        return lambda meeting: function(sharding.DotStatistics.from_dot_table(tables.dot_table_of(meeting)))
+    return None
+
+
+def direct_insights() -> Dict[str, Callable[[objects.Meeting], Any]]:
+    """Numbered insight functions of :data:`INSIGHT_MODULES` (called directly, not through the executor), by name"""
+    functions = dict()
+    for module in INSIGHT_MODULES:
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            if function.__module__ == module.__name__ and _INSIGHT_NUMBER.search(name):
+                benchmark = _direct_insight(function)
+                if benchmark is not None:
+                    functions[name] = benchmark
+    return functions
+
+
+def benchmarks() -> Dict[str, Callable[[objects.Meeting], Any]]:
+    """Benchmarked functions of a Meeting, by name"""
+    functions = {
+        'as_dot_table': lambda meeting: tables.as_dot_table(meeting.dots),
+        'dots_on_subjects_are_nubby_and_polarizing':
+            lambda meeting: disagreement.dots_on_subjects_are_nubby_and_polarizing(meeting.dots),
+        'frequently_dotted_subjects': lambda meeting: activity.frequently_dotted_subjects(meeting.dots),
+        'believable_choice_on_question':
+            lambda meeting: [disagreement.believable_choice_on_question(question) for question in meeting.questions],
+        'disagrees_with_believable_choice':
+            lambda meeting: [disagreement.disagrees_with_believable_choice(question)
+                             for question in meeting.questions],
+        'all_insights': lambda meeting: executor.MeetingReport(meeting).run(),
+    }
+    functions.update({'insight_{}'.format(number): _insight(number) for number in sorted(executor.INSIGHTS)})
+    functions.update(direct_insights())
+    return functions
+
+
+def measure(function: Callable[[objects.Meeting], Any], meeting: objects.Meeting, repeat: int = 3) -> Dict[str, Any]:
+    """Best time, throughput (Dots and Responses per second) and peak memory of `function(meeting)`"""
+    try:
+        seconds = []
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            function(meeting)
+            seconds.append(time.perf_counter() - start)
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function(meeting)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except Exception as error:
+        return {'error': '{}: {}'.format(type(error).__name__, error)}
+
+    records = len(meeting.dots) + sum(len(question.responses) for question in meeting.questions)
+    return {'seconds': min(seconds), 'records_per_second': records / max(min(seconds), 1e-9), 'peak_bytes': peak}
+
+
+def run_suite(scales: List[str], names: List[str] = None, repeat: int = 3, seed: int = 0) -> Dict[str, Dict]:
+    """Measurements by scale and benchmark name"""
+    functions = benchmarks()
+    results = dict()
+    for scale_name in scales:
+        scale = SCALES[scale_name]
+        meeting = synthetic_meeting(scale, seed)
+        results[scale_name] = {'scale': scale._asdict(), 'benchmarks': {
+            name: measure(functions[name], meeting, repeat) for name in (names or functions)
+        }}
+    return results
+
+
+def regressions(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float = 0.2) -> List[str]:
+    """Benchmarks that are slower, use more memory or fail compared to a baseline"""
+    messages = []
+    for scale_name, scale_results in results.items():
+        baseline_benchmarks = baseline.get(scale_name, {}).get('benchmarks', {})
+        for name, measurement in scale_results['benchmarks'].items():
+            previous = baseline_benchmarks.get(name)
+            if previous is None or 'error' in previous:
+                continue
+            if 'error' in measurement:
+                messages.append('{} {}: {}'.format(scale_name, name, measurement['error']))
+                continue
+            for key in ('seconds', 'peak_bytes'):
+                if measurement[key] > previous[key] * (1 + tolerance):
+                    messages.append('{} {}: {} {:.4g} -> {:.4g}'.format(scale_name, name, key, previous[key],
+                                                                       measurement[key]))
+    return messages
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['tiny', 'small', 'medium'],
+                        help='Meeting sizes to benchmark')
+    parser.add_argument('--benchmarks', nargs='+', choices=list(benchmarks()), help='Benchmarks to run (default = all)')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per benchmark')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic meetings')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against results of a previous run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown before flagging')
+    args = parser.parse_args()
+
+    results = run_suite(args.scales, args.benchmarks, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            found = regressions(results, json.load(file), args.tolerance)
+        for message in found:
+            print('REGRESSION', message, file=sys.stderr)
+        sys.exit(1 if found else 0)
@@ -6,8 +6,10 @@ Believable View Disagrees With.
 import itertools
 from prios_api.domain_objects import meta, objects
 from prios_api.concepts import sentiment, disagreement
+from prios_api.src import instrumentation
 
 
+@instrumentation.instrumented
 def believable_and_overall_meeting_section_sentiment_disagree_119(question: objects.Question) -> meta.Assertion:
     """
     Believable and Overall Meeting Section Sentiment Disagree
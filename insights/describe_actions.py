@@ -4,13 +4,14 @@ TBD
 """
 
 import itertools
-from prios_api.domain_objects import meta, objects
-from prios_api.src import utils
+from prios_api.domain_objects import meta, objects, tables
+from prios_api.src import instrumentation, utils
 from prios_api import activity
 from typing import List
 
 _QUORUM_THRESH_DEFAULT = 0.80
 
+@instrumentation.instrumented
 def primary_actions_157(dots: List[objects.Dot], *args, **kwargs):
     """
     Defines Primary Actions in a Meeting based on :class:`objects.DotCollection`
@@ -31,6 +32,7 @@ def primary_actions_157(dots: List[objects.Dot], *args, **kwargs):
     return sorted(relevant_actions, key=lambda x: x.value)[:3]  # top 3 scores
 
 
+@instrumentation.instrumented
 def primary_participants_in_meeting_138(meeting: objects.Meeting,
                                         min_percent_1: float = 0.20,
                                         min_count_1: int = 0,
@@ -66,10 +68,11 @@ def primary_participants_in_meeting_138(meeting: objects.Meeting,
         System assertion for each subject with value (Boolean) equal to True if they are
         a Primary Participant or False, otherwise.
     """
-    return activity.frequently_dotted_subjects(meeting.dots, min_percent_1, min_count_1,
+    return activity.frequently_dotted_subjects(tables.dot_table_of(meeting), min_percent_1, min_count_1,
                                                min_percent_2, min_count_2)
 
 
+@instrumentation.instrumented
 def action_relevance_158(dots: List[objects.Dot], *args, **kwargs):
     """
     Defines Action Relevance in a Meeting from Dots.
@@ -91,6 +94,7 @@ def action_relevance_158(dots: List[objects.Dot], *args, **kwargs):
     return activity.relevance_of_dots(dots)
 
 
+@instrumentation.instrumented
 def attention_participant_received_155(dots: List[objects.Dot]):
     """
     Defines "Relevant" People in a Meeting from Dots.
@@ -112,8 +116,10 @@ def attention_participant_received_155(dots: List[objects.Dot]):
     return activity.relevance_of_people(dots)
 
 
+@instrumentation.instrumented
 def quorum_exists_on_question_145(meeting: objects.Meeting,
                                   quorum_threshold: float = _QUORUM_THRESH_DEFAULT,
+                                  number_participants: int = None,
                                   *args, **kwargs) -> List[meta.Assertion]:
     """
     Determines whether a sufficient percentage of Participants answered each question
@@ -123,6 +129,7 @@ def quorum_exists_on_question_145(meeting: objects.Meeting,
     ----------
     meeting
     quorum_threshold : The threshold above which quorum exists. Defaults to :data:`_QUORUM_THRESH_DEFAULT`
+    number_participants : Precomputed engagement in the Meeting (computed if not given)
     *args: Variable length argument list.
     **kwargs: Arbitrary keyword arguments.
 
@@ -131,7 +138,8 @@ def quorum_exists_on_question_145(meeting: objects.Meeting,
     List[meta.Assertion]
         List of Assertions where each item is a Question and the Value is True if Quorum exists on respective question.
     """
-    number_participants = activity.engagement_in_meeting(meeting)
+    if number_participants is None:
+        number_participants = activity.engagement_in_meeting(meeting)
     return [
         activity.quorum_exists_question(question, number_participants=number_participants,
                                         quorum_threshold=quorum_threshold)
@@ -0,0 +1,170 @@
+"""
+Dependency-graph execution of numbered insights over a Meeting.
+
+Each insight declares the intermediate concepts it depends on (e.g. the believable choice on
+each question, the author-synthesized polarization of each subject, or the engagement in the
+meeting). A :class:`MeetingReport` computes each intermediate at most once per meeting and
+fans it out to every insight that needs it.
+
+Each step is instrumented (see :mod:`prios_api.src.instrumentation`) as `insights.executor.insight_<number>`
+or `insights.executor.intermediate_<name>`.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Tuple
+from prios_api.domain_objects import objects, tables
+from prios_api import activity, disagreement
+from prios_api.src import instrumentation
+from insights import describe_actions, nubby_polarizing_and_oos, uniqueness
+
+_PRIMARY_PARTICIPANT_THRESHOLDS = {'min_percent_1': 0.20, 'min_count_1': 0,
+                                   'min_percent_2': 0.10, 'min_count_2': 10}
+
+
+@dataclass(frozen=True)
+class Step:
+    """A node of the dependency graph
+
+    `compute` is called with the Meeting followed by the values of `dependencies`, in order.
+    """
+    compute: Callable[..., Any]
+    dependencies: Tuple[str, ...] = ()
+
+
+INTERMEDIATES: Dict[str, Step] = dict()
+INSIGHTS: Dict[int, Step] = dict()
+
+
+def register_intermediate(name: str, *dependencies: str):
+    """Registers a function of a Meeting (and its dependencies) as a named intermediate"""
+    def decorator(function):
+        compute = instrumentation.instrumented(function, name='{}.intermediate_{}'.format(__name__, name))
+        INTERMEDIATES[name] = Step(compute=compute, dependencies=dependencies)
+        return function
+    return decorator
+
+
+def register_insight(number: int, *dependencies: str):
+    """Registers a function of a Meeting (and its dependencies) as a numbered insight"""
+    def decorator(function):
+        compute = instrumentation.instrumented(function, name='{}.insight_{}'.format(__name__, number))
+        INSIGHTS[number] = Step(compute=compute, dependencies=dependencies)
+        return function
+    return decorator
+
+
+@register_intermediate('dot_table')
+def _dot_table(meeting):
+    return tables.dot_table_of(meeting)
+
+
+@register_intermediate('subject_dot_counts', 'dot_table')
+def _subject_dot_counts(meeting, dot_table):
+    return activity.dot_counts_by_subject(dot_table)
+
+
+@register_intermediate('subject_polarization', 'dot_table')
+def _subject_polarization(meeting, dot_table):
+    return disagreement.subject_polarization_table(dot_table)
+
+
+@register_intermediate('engagement')
+def _engagement(meeting):
+    return activity.engagement_in_meeting(meeting)
+
+
+@register_intermediate('believable_choices')
+def _believable_choices(meeting):
+    return [disagreement.believable_choice_on_question(question) for question in meeting.questions]
+
+
+@register_insight(38, 'subject_dot_counts', 'subject_polarization')
+def _polarizing_participants_38(meeting, subject_dot_counts, subject_polarization):
+    frequently_dotted, = activity.frequently_dotted_subjects_from_counts(*subject_dot_counts, [{}])
+    return nubby_polarizing_and_oos.polarizing_participants(frequently_dotted,
+                                                            list(subject_polarization.to_assertions()))
+
+
+@register_insight(41, 'believable_choices')
+def _out_of_sync_people_on_question_41(meeting, believable_choices):
+    return [nubby_polarizing_and_oos.out_of_sync_people_on_question_41(question, believable_choice=choice)
+            for question, choice in zip(meeting.questions, believable_choices)]
+
+
+@register_insight(130, 'believable_choices')
+def _believable_choice_on_question_130(meeting, believable_choices):
+    return believable_choices
+
+
+@register_insight(131, 'engagement', 'believable_choices')
+def _believable_consensus_exists_131(meeting, engagement, believable_choices):
+    return [nubby_polarizing_and_oos.believable_consensus_exists_131(question, number_participants=engagement,
+                                                                     believable_choice=choice)
+            for question, choice in zip(meeting.questions, believable_choices)]
+
+
+@register_insight(136, 'believable_choices')
+def _uniquely_out_of_sync_on_question_136(meeting, believable_choices):
+    return [uniqueness.uniquely_out_of_sync_on_question_136(question, believable_choice=choice)
+            for question, choice in zip(meeting.questions, believable_choices)]
+
+
+@register_insight(138, 'subject_dot_counts')
+def _primary_participants_in_meeting_138(meeting, subject_dot_counts):
+    primary_participants, = activity.frequently_dotted_subjects_from_counts(*subject_dot_counts,
+                                                                            [_PRIMARY_PARTICIPANT_THRESHOLDS])
+    return primary_participants
+
+
+@register_insight(145, 'engagement')
+def _quorum_exists_on_question_145(meeting, engagement):
+    return describe_actions.quorum_exists_on_question_145(meeting, number_participants=engagement)
+
+
+@register_insight(147)
+def _nubby_question_147(meeting):
+    return [nubby_polarizing_and_oos.nubby_question_147(question) for question in meeting.questions]
+
+
+class MeetingReport(object):
+    """Insights of a single Meeting that share intermediate results
+
+    * Intermediates are computed lazily, at most once, and kept for the life of the report
+    * `computations` counts how often each intermediate was computed
+    * Question-level insights return one result per question in `meeting.questions`
+
+    Examples
+    --------
+    >>> from prios_api.examples import likertexample
+    >>> report = MeetingReport(likertexample.meeting)
+    >>> results = report.run([41, 130, 131, 136])
+    >>> [x.value for x in results[41][0]]
+    [False, True, False, False, False]
+    >>> [x.value for x in results[131]]
+    [False]
+    >>> report.computations['believable_choices']
+    1
+    """
+    def __init__(self, meeting: objects.Meeting):
+        self.meeting = meeting
+        self.intermediates: Dict[str, Any] = dict()
+        self.computations = Counter()
+
+    def get(self, name: str) -> Any:
+        """Value of an intermediate, computing it (and its dependencies) on first use"""
+        if name not in self.intermediates:
+            step = INTERMEDIATES[name]
+            self.intermediates[name] = step.compute(self.meeting, *map(self.get, step.dependencies))
+            self.computations[name] += 1
+        return self.intermediates[name]
+
+    def insight(self, number: int) -> Any:
+        """Result of a single numbered insight"""
+        step = INSIGHTS[number]
+        return step.compute(self.meeting, *map(self.get, step.dependencies))
+
+    def run(self, numbers: Iterable[int] = None) -> Dict[int, Any]:
+        """Results of numbered insights (default = all registered insights), by number"""
+        numbers = sorted(INSIGHTS) if numbers is None else numbers
+        return {number: self.insight(number) for number in numbers}
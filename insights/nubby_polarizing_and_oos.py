@@ -4,14 +4,15 @@ TBD
 """
 
 from typing import List, Dict
-from prios_api.domain_objects import meta, objects
+from prios_api.domain_objects import meta, objects, tables
 from prios_api import disagreement, activity
-from prios_api.src import utils
+from prios_api.src import instrumentation, utils
 
 
 _QUORUM_THRESH_DEFAULT = 0.80
 
 
+@instrumentation.instrumented
 def believable_choice_on_question_130(question: objects.QuestionType) -> meta.Assertion:
     """
     Believable choice.
@@ -28,22 +29,31 @@ def believable_choice_on_question_130(question: objects.QuestionType) -> meta.As
     return disagreement.believable_choice_on_question(question)
 
 
-def believable_consensus_exists_131(question: objects.Question) -> meta.Assertion:
+@instrumentation.instrumented
+def believable_consensus_exists_131(question: objects.Question, number_participants: int,
+                                    believable_choice: meta.Assertion = None) -> meta.Assertion:
     """
     Whether consensus exists on a question.
 
     Parameters
     ----------
     question
+    number_participants
+        Number of Participants in the Meeting (see :func:`activity.engagement_in_meeting`)
+    believable_choice
+        Precomputed :func:`believable_choice_on_question_130` (computed if not given)
 
     Returns
     -------
     bool
         Whether there is a consensus answer.
     """
-    return disagreement.believable_consensus_exists(question)
+    return disagreement.believable_consensus_exists(question, number_participants=number_participants,
+                                                    quorum_threshold=_QUORUM_THRESH_DEFAULT,
+                                                    believable_choice=believable_choice)
 
 
+@instrumentation.instrumented
 @utils.scope_required_data_within_object(collections_to_keep=['dots'])
 def action_is_polarizing_161(meeting: objects.Meeting,
                              by_action: Dict[str, str] = None) -> List[meta.Assertion]:
@@ -64,11 +74,12 @@ def action_is_polarizing_161(meeting: objects.Meeting,
     Returns
     -------
     List[meta.Assertion]
-        Whether or not Dots are polarizing (by action). Action is indexed in the label attribute.
+        Whether or not Dots are polarizing (by action). Action is held in the description attribute.
     """
     return disagreement.dots_in_meeting_are_polarizing(meeting, by_action=by_action)
 
 
+@instrumentation.instrumented
 @utils.scope_required_data_within_object(collections_to_keep=['dots'])
 def meeting_section_sentiment_is_polarizing_118(meeting: objects.Meeting) -> meta.Assertion:
     """
@@ -86,6 +97,7 @@ def meeting_section_sentiment_is_polarizing_118(meeting: objects.Meeting) -> met
     return disagreement.dots_in_meeting_are_polarizing(meeting)
 
 
+@instrumentation.instrumented
 def meeting_section_nubbiness_149(meeting: objects.Meeting) -> meta.Assertion:
     """
     Classifies Nubbiness level of a Meeting Section.
@@ -103,6 +115,7 @@ def meeting_section_nubbiness_149(meeting: objects.Meeting) -> meta.Assertion:
     return disagreement.meeting_nubbiness_v1(meeting)
 
 
+@instrumentation.instrumented
 @utils.scope_required_data_within_object(collections_to_keep=['dots'])
 def polarizing_participants_38(meeting: objects.Meeting) -> List[meta.Assertion]:
     """
@@ -152,21 +165,54 @@ def polarizing_participants_38(meeting: objects.Meeting) -> List[meta.Assertion]
     >>> for x in result:
     ...     print(x.target.person_id, x.value)
     Adam False
+
+    Dots held only in columnar form (`meeting.dot_table`) are used too:
+
+    >>> from prios_api.src import synthetic
+    >>> meeting = synthetic.meeting(number_of_participants=10, number_of_dots=200, materialize=False)
+    >>> len(meeting.dots), len(polarizing_participants_38(meeting))
+    (0, 10)
+    """
+    dots = tables.dot_table_of(meeting)
+    frequently_dotted = activity.frequently_dotted_subjects(dots)
+    dots_are_polarizing = disagreement.dots_on_subjects_are_nubby_and_polarizing(dots)
+    return polarizing_participants(frequently_dotted, dots_are_polarizing)
+
+
+def polarizing_participants(frequently_dotted: List[meta.Assertion],
+                            dots_are_polarizing: List[meta.Assertion]) -> List[meta.Assertion]:
     """
-    frequently_dotted = activity.frequently_dotted_subjects(meeting.dots)
-    dots_are_polarizing = disagreement.dots_on_subjects_are_nubby_and_polarizing(meeting.dots)
+    Combines whether each subject is frequently dotted and whether the dots they received are
+    polarizing (see :func:`polarizing_participants_38`).
+
+    Parameters
+    ----------
+    frequently_dotted
+        Result of :func:`activity.frequently_dotted_subjects`
+    dots_are_polarizing
+        Result of :func:`disagreement.dots_on_subjects_are_nubby_and_polarizing`
 
-    result = []
-    for person_frequently_dotted in frequently_dotted:
-        for person_polarizing in dots_are_polarizing:
-            if person_frequently_dotted.target.person_id == person_polarizing.target.person_id:
-                person = person_frequently_dotted.target
-                result.append(meta.Assertion(source=meta.System, target=person,
-                                             value=(person_frequently_dotted.value and
-                                                    person_polarizing.value)))
-    return result
+    Returns
+    -------
+    List[meta.Assertion]
+        One Assertion per subject, matched by the uuid of the target
+
+    Examples
+    --------
+    >>> adam, bob = objects.Person(uuid='Adam'), objects.Person(uuid='Bob')
+    >>> frequently_dotted = [meta.Assertion(target=adam, value=True), meta.Assertion(target=bob, value=True)]
+    >>> dots_are_polarizing = [meta.Assertion(target=adam, value=True), meta.Assertion(target=bob, value=False)]
+    >>> [(x.target.uuid, x.value) for x in polarizing_participants(frequently_dotted, dots_are_polarizing)]
+    [('Adam', True), ('Bob', False)]
+    """
+    return [
+        meta.Assertion(source=meta.System, target=person_frequently_dotted.target,
+                       value=(person_frequently_dotted.value and person_polarizing.value))
+        for person_frequently_dotted, person_polarizing in utils.join_assertions(frequently_dotted, dots_are_polarizing)
+    ]
 
 
+@instrumentation.instrumented
 def nubby_question_147(question: objects.Question) -> meta.Assertion:
     """
     Is a Question Nubby?
@@ -202,6 +248,7 @@ def nubby_question_147(question: objects.Question) -> meta.Assertion:
     return disagreement.is_nubby_question(question, question_type)
 
 
+@instrumentation.instrumented
 def nubby_question_popup_49(question: objects.Question) -> meta.Assertion:
     """
     Returns True if question is nubby and a quorum exists.
@@ -220,13 +267,17 @@ def nubby_question_popup_49(question: objects.Question) -> meta.Assertion:
     return meta.Assertion(source=objects.System, target=question, value=nubby and quorum)
 
 
-def out_of_sync_people_on_question_41(question: objects.Question) -> List[meta.Assertion]:
+@instrumentation.instrumented
+def out_of_sync_people_on_question_41(question: objects.Question,
+                                      believable_choice: meta.Assertion = None) -> List[meta.Assertion]:
     """
     Identifies people who are out-of-sync on a question.
 
     Parameters
     ----------
     question
+    believable_choice
+        Precomputed :func:`believable_choice_on_question_130` (computed if not given)
 
     Returns
     -------
@@ -256,9 +307,10 @@ def out_of_sync_people_on_question_41(question: objects.Question) -> List[meta.A
     >>> print([xi.value for xi in x])
     [False]
     """
-    return disagreement.disagrees_with_believable_choice(question)
+    return disagreement.disagrees_with_believable_choice(question, believable_choice=believable_choice)
 
 
+@instrumentation.instrumented
 def significantly_out_of_sync_114(meeting: objects.Meeting,
                                   threshold_low=0.8,
                                   threshold_high=1.2) -> List[objects.Judgement]:
@@ -0,0 +1,162 @@
+"""
+Batch execution of numbered insights over many Meetings.
+
+Meetings (or meeting ids together with a picklable function that hydrates them) are sent to
+worker processes in chunks. Each worker runs the requested insights of every meeting in its
+chunk with a :class:`executor.MeetingReport`, timing each meeting and isolating failures, and
+results are streamed to a sink as chunks complete.
+"""
+
+import itertools
+import os
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import Executor, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from prios_api.domain_objects import objects
+from insights import executor as insight_executor
+
+_DEFAULT_CHUNK_SIZE = 8
+
+
+@dataclass
+class MeetingResult:
+    """Insights of a single Meeting
+
+    * `index` is the position of the meeting in the input
+    * `meeting_id` is the id that was hydrated, or the name of the meeting
+    * `error` holds the traceback if the meeting failed, in which case `results` is empty
+    """
+    index: int
+    meeting_id: Any
+    results: Dict[int, Any] = field(default_factory=dict)
+    seconds: float = 0.
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def run_meeting(meeting: Any, numbers: Iterable[int] = None, hydrate: Callable[[Any], objects.Meeting] = None,
+                index: int = 0) -> MeetingResult:
+    """
+    Runs numbered insights (default = all registered insights) on a Meeting, or on the Meeting
+    returned by `hydrate(meeting)`. Exceptions are recorded in the result instead of raised.
+    """
+    start = time.perf_counter()
+    meeting_id = meeting if hydrate is not None else getattr(meeting, 'name', None)
+    try:
+        if hydrate is not None:
+            meeting = hydrate(meeting)
+        results = insight_executor.MeetingReport(meeting).run(numbers)
+        error = None
+    except Exception:
+        results, error = dict(), traceback.format_exc()
+    return MeetingResult(index=index, meeting_id=meeting_id, results=results,
+                         seconds=time.perf_counter() - start, error=error)
+
+
+def _run_chunk(chunk: List[Tuple[int, Any]], numbers, hydrate) -> List[MeetingResult]:
+    return [run_meeting(meeting, numbers, hydrate, index) for index, meeting in chunk]
+
+
+def _chunks(iterable: Iterable, chunk_size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_results(meetings: Iterable[Any], numbers: Iterable[int] = None,
+                 hydrate: Callable[[Any], objects.Meeting] = None, executor: Executor = None,
+                 max_workers: int = None, chunk_size: int = _DEFAULT_CHUNK_SIZE,
+                 max_pending_chunks: int = None) -> Iterator[MeetingResult]:
+    """
+    Runs insights over Meetings in parallel and yields a :class:`MeetingResult` per meeting,
+    in order of completion.
+
+    Parameters
+    ----------
+    meetings
+        Meetings, or meeting ids if `hydrate` is given. Consumed lazily.
+    numbers
+        Numbered insights to run (default = all registered insights)
+    hydrate
+        Picklable function returning the Meeting with a given id, called in the worker
+    executor
+        Executor to run chunks on (default = a new `ProcessPoolExecutor`)
+    max_workers
+        Number of worker processes of the default executor
+    chunk_size
+        Number of meetings sent to a worker at once
+    max_pending_chunks
+        Maximum number of chunks in flight (default = twice the number of workers), which
+        bounds how far ahead of the workers `meetings` is consumed
+    """
+    numbers = None if numbers is None else list(numbers)
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            yield from iter_results(meetings, numbers, hydrate, executor, max_workers, chunk_size,
+                                    max_pending_chunks)
+        return
+    max_pending_chunks = max_pending_chunks or 2 * (max_workers or os.cpu_count() or 1)
+
+    pending = dict()
+
+    def completed(futures):
+        for future in futures:
+            chunk = pending.pop(future)
+            try:
+                yield from future.result()
+            except Exception:
+                # The chunk itself failed (e.g. results could not be sent back); fail its meetings.
+                error = traceback.format_exc()
+                for index, meeting in chunk:
+                    meeting_id = meeting if hydrate is not None else getattr(meeting, 'name', None)
+                    yield MeetingResult(index=index, meeting_id=meeting_id, error=error)
+
+    for chunk in _chunks(enumerate(meetings), chunk_size):
+        pending[executor.submit(_run_chunk, chunk, numbers, hydrate)] = chunk
+        if len(pending) >= max_pending_chunks:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            yield from completed(done)
+    while pending:
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        yield from completed(done)
+
+
+def run_insights(meetings: Iterable[Any], sink: Callable[[MeetingResult], Any], numbers: Iterable[int] = None,
+                 **kwargs) -> Counter:
+    """
+    Runs insights over Meetings in parallel (see :func:`iter_results`) and passes each
+    :class:`MeetingResult` to `sink` as soon as it is available.
+
+    Returns
+    -------
+    Counter
+        Number of meetings that 'succeeded' and 'failed'
+
+    Examples
+    --------
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> from prios_api.examples import likertexample
+    >>> broken = objects.Meeting(name='Broken', questions=None)
+    >>> results = list()
+    >>> with ThreadPoolExecutor() as executor:
+    ...     summary = run_insights([likertexample.meeting, broken], results.append, numbers=[130, 131],
+    ...                            executor=executor, chunk_size=1)
+    >>> sorted(summary.items())
+    [('failed', 1), ('succeeded', 1)]
+    >>> [(result.meeting_id, sorted(result.results)) for result in sorted(results, key=lambda x: x.index)]
+    [('Test Meeting', [130, 131]), ('Broken', [])]
+    """
+    summary = Counter()
+    for result in iter_results(meetings, numbers, **kwargs):
+        sink(result)
+        summary['succeeded' if result.succeeded else 'failed'] += 1
+    return summary
@@ -0,0 +1,90 @@
+"""
+Company-wide summaries of Dots, computed from mergeable partial aggregates
+(see :mod:`prios_api.src.sharding`).
+"""
+
+from typing import List
+from prios_api.domain_objects import meta
+from prios_api.src import instrumentation, pushdown, sharding
+
+
+def _statistics_context(statistics: pushdown.SufficientStatistics, i: int) -> dict:
+    return {
+        'count': int(statistics.count[i]),
+        'mean': float(statistics.mean()[i]),
+        'standard_deviation': float(statistics.standard_deviation()[i]),
+        'buckets': statistics.buckets[i].tolist()
+    }
+
+
+@instrumentation.instrumented
+def global_dot_average_32(statistics: sharding.DotStatistics) -> meta.Assertion:
+    """
+    Average rating of all Dots in the company.
+
+    Parameters
+    ----------
+    statistics
+        Partial aggregates of all Dots, e.g. from :func:`sharding.aggregate_shards`
+
+    Returns
+    -------
+    meta.Assertion
+        Value is the average Dot rating (NaN if there are no Dots).
+
+    Examples
+    --------
+    >>> from prios_api.domain_objects import objects
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> statistics = sharding.DotStatistics.from_dots([objects.Dot(source=adam, target=bob, value=10),
+    ...                                                objects.Dot(source=bob, target=adam, value=3)])
+    >>> global_dot_average_32(statistics).value
+    6.5
+    """
+    return meta.Assertion(source=meta.System, value=float(statistics.overall().mean()[0]),
+                          description='Global dot average')
+
+
+@instrumentation.instrumented
+def global_dot_statistics_133(statistics: sharding.DotStatistics) -> List[meta.Assertion]:
+    """
+    Statistics of all Dots in the company, overall and by attribute.
+
+    Parameters
+    ----------
+    statistics
+        Partial aggregates of all Dots, e.g. from :func:`sharding.aggregate_shards`
+
+    Returns
+    -------
+    List[meta.Assertion]
+        The first Assertion covers all Dots, followed by one per attribute. Values are average
+        Dot ratings; the context holds the count, mean, standard deviation and semantic bucket
+        counts (negative, neutral, positive).
+
+    Examples
+    --------
+    >>> from prios_api.domain_objects import objects
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> vision = meta.Attribute(name='Vision', description=None)
+    >>> statistics = sharding.DotStatistics.from_dots([objects.Dot(source=adam, target=adam, value=10),
+    ...                                                objects.Dot(source=adam, target=adam, value=4,
+    ...                                                            attribute=vision)])
+    >>> for x in global_dot_statistics_133(statistics):
+    ...     print(x.attribute and x.attribute.name, x.context['count'], x.value, x.context['buckets'])
+    None 2 7.0 [1, 0, 1]
+    Vision 1 4.0 [1, 0, 0]
+    """
+    overall = statistics.overall()
+    results = [meta.Assertion(source=meta.System, value=float(overall.mean()[0]),
+                              context=_statistics_context(overall, 0), description='Global dot statistics')]
+
+    by_attribute = statistics.by_attribute
+    for i, (name, ) in enumerate(by_attribute.keys):
+        if name is not None:
+            results.append(meta.Assertion(source=meta.System, value=float(by_attribute.mean()[i]),
+                                          attribute=meta.Attribute(name=name, description=None),
+                                          context=_statistics_context(by_attribute, i),
+                                          description='Global dot statistics'))
+    return results
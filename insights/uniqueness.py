@@ -6,9 +6,12 @@ TBD
 from typing import List
 from prios_api.domain_objects import meta, objects
 from prios_api import disagreement
+from prios_api.src import instrumentation, utils
 
 
-def uniquely_out_of_sync_on_question_136(question: objects.Question) -> List[meta.Assertion]:
+@instrumentation.instrumented
+def uniquely_out_of_sync_on_question_136(question: objects.Question,
+                                         believable_choice: meta.Assertion = None) -> List[meta.Assertion]:
     """
     A person is uniquely out of sync on a question, if their response is unique (
     prios_api.disagreement.unique_choice) and out-of-sync with the believable consensus (
@@ -17,20 +20,34 @@ def uniquely_out_of_sync_on_question_136(question: objects.Question) -> List[met
     Parameters
     ----------
     question
+    believable_choice
+        Precomputed :func:`disagreement.believable_choice_on_question` (computed if not given)
 
     Returns
     -------
     List[meta.Assertion]
         Assertion for each person who answers the question. Value is whether they are uniquely
         out of sync.
+
+    Examples
+    --------
+    >>> from prios_api.examples import likertexample
+    >>> x = uniquely_out_of_sync_on_question_136(likertexample.question)
+    >>> print([(xi.target.name, xi.value) for xi in x])
+    [('Blake', False), ('Natalie', True), ('Will', False), ('Chintan', False), ('Sophia', False)]
+    >>> from prios_api.examples import categoricalexample
+    >>> x = uniquely_out_of_sync_on_question_136(categoricalexample.question)
+    >>> print(set(xi.value for xi in x))
+    {False}
     """
     unique_responses = disagreement.unique_choice(question)
-    oos = disagreement.out_of_sync_people_on_question(question)
+    oos = disagreement.disagrees_with_believable_choice(question, believable_choice=believable_choice)
+
+    # Both analytics target the responders themselves, so responders are matched by identity.
     results = list()
-    for person_unique in unique_responses:
-        for person_oos in oos:
-            if person_unique.target == person_oos.target:
-                uniquely_oos = person_oos.value and person_unique.value
-        results.append(meta.Assertion(source=objects.System, target=person_unique,
+    for person_unique, person_oos in utils.join_assertions(unique_responses, oos, key_func=lambda x: id(x.target),
+                                                           keep_unmatched=True):
+        uniquely_oos = bool(person_oos and person_oos.value and person_unique.value)
+        results.append(meta.Assertion(source=meta.System, target=person_unique.target,
                                       value=uniquely_oos))
     return results
@@ -21,14 +21,6 @@ def dot_matrix_entry_150(x: objects.AssertionSet):
     pass
 
 
-def global_dot_statistics_133(x: objects.AssertionSet):
-    pass
-
-
-def global_dot_average_32(x: objects.AssertionSet):
-    pass
-
-
 def response_summary_139(x: objects.Question):
     pass
 
@@ -1 +1,18 @@
+import importlib
+
 __all__ = ["concepts"]
+
+# Submodules are imported on first attribute access (e.g. `prios_api.disagreement`), so that
+# `import prios_api` stays cheap for short-lived workers.
+_SUBMODULES = {"activity", "concepts", "disagreement", "domain_objects", "examples", "live", "sentiment", "src",
+               "visualizations"}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module("{}.{}".format(__name__, name))
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
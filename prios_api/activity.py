@@ -3,15 +3,22 @@
 PRIOS Analytics on Activity.
 """
 
-from typing import List
-from prios_api.domain_objects import meta, objects
-from prios_api.src import utils, foundation
+from typing import List, Dict, Tuple, Union
+import numpy as np
+from prios_api.domain_objects import meta, objects, tables
+from prios_api.src import instrumentation, memoize, utils, foundation
 from prios_api.concepts import engagement, ungrouped
 
 
 _QUORUM_THRESH_DEFAULT = 0.80
 _SUFFICIENT_RESPONSE_ENGAGEMENT = 3
 _SUFFICIENT_BELIEVABILITY_ENGAGEMENT = 0.75
+_FREQUENTLY_DOTTED_DEFAULTS = {
+    'min_percent_1': 0.10,
+    'min_count_1': 0,
+    'min_percent_2': 0.05,
+    'min_count_2': 5
+}
 
 
 def relevance_of_dots(dots: List[objects.Dot]):
@@ -22,6 +29,7 @@ def relevance_of_people(dots: List[objects.Person]):
     pass
 
 
+@instrumentation.instrumented
 def quorum_exists_question(question: objects.Question, number_participants, quorum_threshold):
     """
     Determines whether a sufficient percentage of Participants answered each question
@@ -47,14 +55,18 @@ def quorum_exists_question(question: objects.Question, number_participants, quor
         return meta.Assertion(source=meta.System, target=question, value=None)
 
 
+@instrumentation.instrumented
+@memoize.memoized
 def engagement_in_meeting(meeting: objects.Meeting):
     return engagement.engagement_raw(meeting.participants)
 
 
+@instrumentation.instrumented
 def engagement_in_question(question: objects.Question):
     return engagement.engagement_raw(question.responses)
 
 
+@instrumentation.instrumented
 def sufficient_believability_engagement(question: objects.Question,
                                         believability_engagement=_SUFFICIENT_BELIEVABILITY_ENGAGEMENT) -> bool:
     """
@@ -80,11 +92,58 @@ def sufficient_believability_engagement(question: objects.Question,
         return False
 
 
-def frequently_dotted_subjects(dots: List[objects.Dot],
+@instrumentation.instrumented
+@memoize.memoized
+def dot_counts_by_subject(dots: Union[List[objects.Dot], tables.DotTable]) -> Tuple[List[meta.Entity], np.ndarray]:
+    """
+    Counts the Dots received by each subject in a single pass.
+
+    Parameters
+    ----------
+    dots
+        List of Dots or a :class:`tables.DotTable`
+
+    Returns
+    -------
+    Tuple[List[meta.Entity], np.ndarray]
+        Subjects (in order of first appearance as a target) and the number of Dots each received.
+
+    Examples
+    --------
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> subjects, counts = dot_counts_by_subject([objects.Dot(source=adam, target=bob, value=1),
+    ...                                           objects.Dot(source=bob, target=adam, value=1),
+    ...                                           objects.Dot(source=adam, target=bob, value=1)])
+    >>> [subject.name for subject in subjects], counts
+    (['Bob', 'Adam'], array([2, 1]))
+    """
+    if isinstance(dots, tables.DotTable):
+        subject_codes, first_appearance = np.unique(dots.subject, return_index=True)
+        order = np.argsort(first_appearance)
+        counts = np.bincount(dots.subject, minlength=dots.number_of_persons)[subject_codes[order]]
+        return [dots.persons[code] for code in subject_codes[order].tolist()], counts
+
+    codes, _ = utils.factorize(dot.target.uuid for dot in dots)
+    _, first_appearance = np.unique(codes, return_index=True)
+    return [dots[i].target for i in first_appearance.tolist()], np.bincount(codes, minlength=len(first_appearance))
+
+
+def _is_frequently_dotted(counts: np.ndarray, total: int, min_percent_1: float, min_count_1: int,
+                          min_percent_2: float, min_count_2: int) -> np.ndarray:
+    percent_dots = counts / max(1, total)
+    cond1 = (percent_dots > min_percent_1) & (counts > min_count_1)
+    cond2 = (percent_dots > min_percent_2) & (counts > min_count_2)
+    return cond1 | cond2
+
+
+@instrumentation.instrumented
+def frequently_dotted_subjects(dots: Union[List[objects.Dot], tables.DotTable],
                                min_percent_1: float = 0.10,
                                min_count_1: int = 0,
                                min_percent_2: float = 0.05,
-                               min_count_2: int = 5) -> List[meta.Assertion]:
+                               min_count_2: int = 5,
+                               as_batch: bool = False) -> Union[List[meta.Assertion], tables.AssertionBatch]:
     """
     Determines whether a Subject is Frequently Dotted. receives more than either:
     * 10% of all Dot Ratings OR
@@ -94,6 +153,7 @@ def frequently_dotted_subjects(dots: List[objects.Dot],
     Parameters
     ----------
     dots
+        List of Dots or a :class:`tables.DotTable`
     min_percent_1
         A subject is frequently dotted if the percent of dots they receive exceeds this quantity
         and the number of dots exceeds `min_count_1` (default = 10%)
@@ -106,6 +166,8 @@ def frequently_dotted_subjects(dots: List[objects.Dot],
     min_count_2
         A subject is frequently dotted if the number of dots they receive exceeds this quantity
         and the percentage of dots exceeds `min_percent_2` (default = 5)
+    as_batch
+        Whether to return a :class:`tables.AssertionBatch` instead of a list (default = False)
 
     Returns
     -------
@@ -118,7 +180,7 @@ def frequently_dotted_subjects(dots: List[objects.Dot],
     >>> adam = objects.Person(name='Adam', uuid='Adam')
     >>> bob = objects.Person(name='Bob', uuid='Bob')
     >>> charlie = objects.Person(name='Charlie', uuid='Charlie')
-    >>> bob_receives_every_dot = [objects.Dot(source=bob, target=adam, value=10)] * 2
+    >>> bob_receives_every_dot = [objects.Dot(source=adam, target=bob, value=10)] * 2
     >>> for x in frequently_dotted_subjects(bob_receives_every_dot):
     ...     print(x.target.name, x.value)
     Bob True
@@ -140,25 +202,83 @@ def frequently_dotted_subjects(dots: List[objects.Dot],
     Charlie True
     """
 
-    # Identify unique subjects.
-    subjects = {
-        dot.target.uuid: dot.target for dot in dots
-    }
+    return frequently_dotted_subjects_batch(dots, [dict(min_percent_1=min_percent_1, min_count_1=min_count_1,
+                                                        min_percent_2=min_percent_2, min_count_2=min_count_2)],
+                                            as_batch=as_batch)[0]
+
+
+@instrumentation.instrumented
+def frequently_dotted_subjects_batch(dots: Union[List[objects.Dot], tables.DotTable],
+                                     configurations: List[Dict[str, float]],
+                                     as_batch: bool = False) -> List[Union[List[meta.Assertion],
+                                                                           tables.AssertionBatch]]:
+    """
+    Evaluates :func:`frequently_dotted_subjects` for several threshold configurations while
+    counting the Dots only once.
+
+    Parameters
+    ----------
+    dots
+        List of Dots or a :class:`tables.DotTable`
+    configurations
+        Each configuration maps any of `min_percent_1`, `min_count_1`, `min_percent_2` and
+        `min_count_2` to a threshold; missing keys take the defaults of
+        :func:`frequently_dotted_subjects`.
+    as_batch
+        Whether to return a :class:`tables.AssertionBatch` per configuration instead of a list
+        (default = False)
 
-    result = []
-    for subject_uuid, subject in subjects.items():
-        subject_dots = [dot for dot in dots if dot.target.uuid == subject_uuid]
-        percent_dots = engagement.engagement_relative(subject_dots, len(dots))
-        total_dots = engagement.engagement_raw(subject_dots)
-        cond1 = percent_dots > min_percent_1 and total_dots > min_count_1
-        cond2 = percent_dots > min_percent_2 and total_dots > min_count_2
-        subject_is_frequently_dotted = meta.Assertion(source=meta.System, target=subject,
-                                                      value=cond1 or cond2)
-        result += [subject_is_frequently_dotted]
+    Returns
+    -------
+    List[List[meta.Assertion]]
+        Result of :func:`frequently_dotted_subjects` for each configuration.
 
-    return result
+    Examples
+    --------
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> dots = [objects.Dot(source=adam, target=bob, value=1)] * 9
+    >>> dots += [objects.Dot(source=bob, target=adam, value=1)]
+    >>> for result in frequently_dotted_subjects_batch(dots, [{}, {'min_percent_1': 0.20}]):
+    ...     print([(x.target.name, x.value) for x in result])
+    [('Bob', True), ('Adam', False)]
+    [('Bob', True), ('Adam', False)]
+    >>> for result in frequently_dotted_subjects_batch(dots, [{'min_percent_2': 0.0, 'min_count_2': 0}]):
+    ...     print([(x.target.name, x.value) for x in result])
+    [('Bob', True), ('Adam', True)]
+    """
+    subjects, counts = dot_counts_by_subject(dots)
+    return frequently_dotted_subjects_from_counts(subjects, counts, configurations, as_batch=as_batch)
+
+
+@instrumentation.instrumented
+def frequently_dotted_subjects_from_counts(subjects: List[meta.Entity], counts: np.ndarray,
+                                           configurations: List[Dict[str, float]],
+                                           as_batch: bool = False) -> List[Union[List[meta.Assertion],
+                                                                                 tables.AssertionBatch]]:
+    """
+    Finishes :func:`frequently_dotted_subjects_batch` from the number of Dots each subject
+    received (e.g. counts aggregated in the warehouse, see :mod:`prios_api.src.pushdown`).
+
+    Examples
+    --------
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> result, = frequently_dotted_subjects_from_counts([adam, bob], np.array([1, 99]), [{}])
+    >>> [(x.target.name, x.value) for x in result]
+    [('Adam', False), ('Bob', True)]
+    """
+    counts = np.asarray(counts)
+    total = int(counts.sum())
+    results = []
+    for configuration in configurations:
+        thresholds = dict(_FREQUENTLY_DOTTED_DEFAULTS, **configuration)
+        batch = tables.AssertionBatch.from_targets(subjects, _is_frequently_dotted(counts, total, **thresholds))
+        results.append(batch if as_batch else batch.to_assertions())
+    return results
 
 
+@instrumentation.instrumented
 def notable_participants(meeting: objects.Meeting, **kwargs) -> List[objects.Judgement]:
     """
     Returns True/False for whether a list of Participants in a Meeting are Notable Participants.
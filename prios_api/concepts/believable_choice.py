@@ -3,7 +3,7 @@ Believable Choice.
 """
 
 from typing import Tuple, List, TypeVar, Optional
-from prios_api.src import foundation
+from prios_api.src import foundation, instrumentation
 from prios_api.domain_objects import objects
 
 StringOrFloat = TypeVar("StringOrFloat", str, float)
@@ -14,6 +14,7 @@ _THRESHOLD_POLES = 0.25
 _MINIMUM_THRESH = 0.7
 
 
+@instrumentation.instrumented
 def believable_choice_categorical_binary(values_and_weights: List[Tuple[str, float]],
                                          minimum_vote: float = _MINIMUM_THRESH) -> Optional[str]:
     """
@@ -4,7 +4,7 @@ TBD
 """
 
 from typing import Tuple, TypeVar, Any
-from prios_api.src import foundation
+from prios_api.src import foundation, instrumentation
 from prios_api.domain_objects import meta, objects
 from prios_api.concepts import believable_choice
 
@@ -17,6 +17,7 @@ _THRESHOLD_POLES = 0.25
 _MINIMUM_THRESH = 0.7
 
 
+@instrumentation.instrumented
 def disagrees_with_167(values : Tuple[Any, Any], value_type: QuestionOrNumeric) -> bool:
     """
     TODO need to handle the Value Type case better, consider Alex's new solution.
@@ -58,6 +59,7 @@ def disagrees_with_167(values : Tuple[Any, Any], value_type: QuestionOrNumeric)
         return None
 
 
+@instrumentation.instrumented
 def disagrees_with_numeric(x1: float, x2: float, far_away: float=_THRESHOLD_HIGH) -> bool:
     """
     Disagrees With logic for Scale values (1-to-10 or 1-to-5).
@@ -80,7 +82,7 @@ def disagrees_with_numeric(x1: float, x2: float, far_away: float=_THRESHOLD_HIGH
     >>> disagrees_with_numeric(6, 7)
     False
     """
-    mapped_x1, mapped_x2 = foundation.map_values([x1, x2], objects.NumericRange)
+    mapped_x1, mapped_x2 = foundation.map_values_batch([x1, x2], objects.NumericRange).tolist()
     same_bucket = mapped_x1 == mapped_x2
 
     try:
@@ -92,6 +94,7 @@ def disagrees_with_numeric(x1: float, x2: float, far_away: float=_THRESHOLD_HIGH
         return not same_bucket
 
 
+@instrumentation.instrumented
 def bucketed_disagreement(x1: float, x2: float) -> float:
     """
     Parameters
@@ -104,11 +107,12 @@ def bucketed_disagreement(x1: float, x2: float) -> float:
     float
         The absolute difference in bucketed disagreement between two v alues.
     """
-    mapped_x1, mapped_x2 = foundation.map_values([x1, x2], objects.NumericRange.ONE_TO_TEN)
+    mapped_x1, mapped_x2 = foundation.map_values_batch([x1, x2], objects.NumericRange.ONE_TO_TEN)
     result = abs(mapped_x1 - mapped_x2)
     return result.item()  # TODO: handling of numpy conversion here is terrible
 
 
+@instrumentation.instrumented
 def substantive_disagreement(x1: float, x2: float, threshold_high: float = _THRESHOLD_HIGH):
     """
     Parameters
@@ -3,13 +3,15 @@ Divisiveness: Statistic of disagreement between a set of opinions.
 """
 
 from typing import List, TypeVar
-from prios_api.src import foundation
+from prios_api.src import foundation, instrumentation
 from prios_api.domain_objects import objects
 
 StringOrFloat = TypeVar("StringOrFloat", str, float)
 
 
-def divisiveness_stat(ar: List[StringOrFloat], value_type: objects.QuestionType) -> float:
+@instrumentation.instrumented
+def divisiveness_stat(ar: List[StringOrFloat], value_type: objects.QuestionType = objects.QuestionType.SCALE,
+                      map_to_sentiment: bool = True) -> float:
     """
     Divisiveness.
 
@@ -21,6 +23,9 @@ def divisiveness_stat(ar: List[StringOrFloat], value_type: objects.QuestionType)
     ----------
     ar
     value_type
+    map_to_sentiment
+        Whether numeric values are mapped to semantic buckets before measuring their spread
+        (default = True). If False, divisiveness is the standard deviation of the raw values.
 
     Returns
     -------
@@ -33,6 +38,8 @@ def divisiveness_stat(ar: List[StringOrFloat], value_type: objects.QuestionType)
     nan
     >>> round(divisiveness_stat([1,10], value_type = objects.QuestionType.SCALE), 3)
     1.414
+    >>> round(divisiveness_stat([1,10], value_type = objects.QuestionType.SCALE, map_to_sentiment=False), 3)
+    6.364
     >>> round(divisiveness_stat([1, 3, 4, 5, 5], value_type = objects.QuestionType.LIKERT), 3)
     0.894
     >>> round(divisiveness_stat(['Give up', 'Push Ahead and see what happens', 'Delay',
@@ -41,8 +48,10 @@ def divisiveness_stat(ar: List[StringOrFloat], value_type: objects.QuestionType)
     >>> round(divisiveness_stat(["Yes", "No", "Yes", "No"], value_type = objects.QuestionType.BINARY), 2)
     0.58
     """
-    if value_type in [objects.QuestionType.SCALE, objects.QuestionType.LIKERT, objects.QuestionType.BINARY]:
-        mapped_values = foundation.map_values(ar, value_type)
+    if not map_to_sentiment and value_type in [objects.QuestionType.SCALE, objects.QuestionType.LIKERT]:
+        return foundation.standard_deviation(ar)
+    elif value_type in [objects.QuestionType.SCALE, objects.QuestionType.LIKERT, objects.QuestionType.BINARY]:
+        mapped_values = foundation.map_values_batch(ar, value_type)
         return foundation.standard_deviation(mapped_values)
     else:
         count = [v for k, v in foundation.counts(ar).items()]
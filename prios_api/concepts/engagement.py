@@ -3,8 +3,10 @@ Engagement
 """
 
 from typing import List, Any
+from prios_api.src import instrumentation
 
 
+@instrumentation.instrumented
 def engagement_raw(values: List[Any], believability_weighted=False) -> float:
     """
     Calculate raw engagement level as the number of times an event occurred.
@@ -37,6 +39,7 @@ def engagement_raw(values: List[Any], believability_weighted=False) -> float:
         return len(values)
 
 
+@instrumentation.instrumented
 def engagement_relative(values: List[Any], max_number_of_values: int) -> float:
     """
     Calculate engagement level as the percentage of times an event occurred.
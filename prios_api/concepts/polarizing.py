@@ -3,8 +3,9 @@
 Polarization:
 """
 
-from typing import List, TypeVar
-from prios_api.src import foundation
+from typing import List, TypeVar, Dict
+import numpy as np
+from prios_api.src import foundation, instrumentation
 from prios_api.concepts import divisiveness
 from prios_api.domain_objects import objects, meta
 
@@ -16,6 +17,7 @@ _THRESHOLD_POLES = 0.25
 _MINIMUM_THRESH = 0.7
 
 
+@instrumentation.instrumented
 def polarizing_stat(values: List[float]) -> float:
     """
     Returns the polarization statistic, which measures the balance between positive opinions and
@@ -44,16 +46,13 @@ def polarizing_stat(values: List[float]) -> float:
     >>> polarizing_stat([])
     0.0
     """
-    mapped_values = [foundation.map_values(vi, objects.NumericRange.ONE_TO_TEN) for vi in values]
+    mapped_values = foundation.map_values_batch(values, objects.NumericRange.ONE_TO_TEN)
 
-    def negative_sentiment(x):
-        return x == 0
-
-    def positive_sentiment(x):
-        return x == 2
-
-    percent_negative = foundation.percent_satisfying_condition(mapped_values, negative_sentiment)
-    percent_positive = foundation.percent_satisfying_condition(mapped_values, positive_sentiment)
+    if len(mapped_values) > 0:
+        percent_negative = np.count_nonzero(mapped_values == 0) / len(mapped_values)
+        percent_positive = np.count_nonzero(mapped_values == 2) / len(mapped_values)
+    else:
+        percent_negative = percent_positive = None
 
     if percent_positive and percent_negative and percent_negative > 0 and percent_positive > 0:
         return min(percent_positive/percent_negative, percent_negative/percent_positive)
@@ -61,6 +60,67 @@ def polarizing_stat(values: List[float]) -> float:
         return 0.0
 
 
+@instrumentation.instrumented
+def segment_polarizing_stats(values: np.ndarray, codes: np.ndarray = None, offsets: np.ndarray = None,
+                             number_of_groups: int = None) -> Dict[str, np.ndarray]:
+    """
+    Divisiveness, mapped divisiveness and polarization statistics of many groups of values on
+    the 1-to-10 scale, computed in one vectorized pass.
+
+    Equivalent to calling :func:`divisiveness.divisiveness_stat` (with and without mapping to
+    sentiment) and :func:`polarizing_stat` on each group. Groups are given either by `codes` or
+    by `offsets` (see :func:`foundation.segment_std`).
+
+    Parameters
+    ----------
+    values
+        Values on the 1-to-10 scale
+    codes
+        Integer group code of each value
+    offsets
+        Group boundaries for values that are contiguous by group
+    number_of_groups
+        Number of groups (defaults to the largest code + 1)
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        One value per group at keys 'divisiveness', 'mapped_divisiveness' and 'polarization'.
+
+    Examples
+    --------
+    >>> stats = segment_polarizing_stats([1, 10, 10, 10], codes=[0, 0, 1, 1])
+    >>> stats['polarization']
+    array([1., 0.])
+    >>> np.round(stats['divisiveness'], 3)
+    array([6.364, 0.   ])
+
+    NaN values are ignored:
+
+    >>> segment_polarizing_stats([1, np.nan, 1, np.nan], codes=[0, 0, 0, 0])['polarization']
+    array([0.])
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes, number_of_groups = foundation._segment_codes(len(values), codes, offsets, number_of_groups)
+    present = ~np.isnan(values)
+    values, codes = values[present], codes[present]
+
+    mapped_values = foundation.map_values_batch(values, objects.NumericRange.ONE_TO_TEN)
+    negative = np.bincount(codes, weights=mapped_values == 0, minlength=number_of_groups)
+    positive = np.bincount(codes, weights=mapped_values == 2, minlength=number_of_groups)
+    both_poles = (negative > 0) & (positive > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        polarization = np.where(both_poles, np.minimum(positive / negative, negative / positive), 0.0)
+
+    return {
+        'divisiveness': foundation.segment_std(values, codes=codes, number_of_groups=number_of_groups),
+        'mapped_divisiveness': foundation.segment_std(mapped_values, codes=codes,
+                                                      number_of_groups=number_of_groups),
+        'polarization': polarization
+    }
+
+
+@instrumentation.instrumented
 def is_polarizing(values: List[float],
                   thresh_on_std_scale: float = _THRESHOLD_STD_SCALE,
                   thresh_on_std_mapped_scale: float = _THRESHOLD_STD_MAPPED_SCALE,
@@ -90,6 +150,7 @@ def is_polarizing(values: List[float],
     return polarization and divisiveness_stat and std_dev
 
 
+@instrumentation.instrumented
 def is_polarizing_v0(values: List[float],
                      thresh_on_std_scale: float = _THRESHOLD_STD_SCALE,
                      thresh_on_std_mapped_scale: float = _THRESHOLD_STD_MAPPED_SCALE,
@@ -113,7 +174,7 @@ def is_polarizing_v0(values: List[float],
     bool
         Whether a set of scale values are polarizing.
     """
-    mapped_values = [foundation.map_values(vi, objects.NumericRange.ONE_TO_TEN) for vi in values]
+    mapped_values = foundation.map_values_batch(values, objects.NumericRange.ONE_TO_TEN)
 
     # TODO: nesting functions here is terrible; why not use the sentiment module?
     def negative_sentiment(x):
@@ -4,9 +4,10 @@ TBD
 """
 
 import typing
-from prios_api.src import foundation
+from prios_api.src import foundation, instrumentation
 
 
+@instrumentation.instrumented
 def sentiment(values: typing.List[float], weights=None):
     """
     Defines sentiment as the average of all values
@@ -1,7 +1,8 @@
 from typing import List, Callable, Optional
-from prios_api.src import foundation
+from prios_api.src import foundation, instrumentation
 
 
+@instrumentation.instrumented
 def synthesize(values: List[float],
                synthesis_fun: Callable = foundation.weighted_average) -> Optional[float]:
     """
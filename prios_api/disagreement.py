@@ -4,12 +4,12 @@ PRIOS Analytics on Disagreement.
 """
 
 import numpy as np
-import pandas as pd
-from typing import List, TypeVar, Dict
+from dataclasses import dataclass
+from typing import List, TypeVar, Dict, Iterator, Union
 from prios_api import activity, concepts, disagreement
 from prios_api.concepts import synthesis, polarizing, disagreement, believable_choice, divisiveness
-from prios_api.src import foundation, utils
-from prios_api.domain_objects import meta, objects
+from prios_api.src import foundation, instrumentation, memoize, utils
+from prios_api.domain_objects import meta, objects, tables
 from statistics import stdev
 
 StringOrFloat = TypeVar("StringOrFloat", str, float)
@@ -25,9 +25,110 @@ UNIQUE_RESPONSE = 1
 OTHER_RESPONSE = 2
 
 
-def dots_on_subjects_are_nubby_and_polarizing(dots: List[objects.Dot],
-                                              thresholds: Dict[str, float] = _THRESHOLD_DICT) \
-                                              ->List[meta.Assertion]:
+@dataclass
+class SubjectPolarizationTable:
+    """
+    Polarization statistics of the author-synthesized dot ratings received by each subject.
+
+    * `subjects` are ordered by their first appearance as a target
+    * Statistic arrays hold one value per subject
+    """
+    subjects: List[meta.Entity]
+    divisiveness: np.ndarray
+    mapped_divisiveness: np.ndarray
+    polarization: np.ndarray
+
+    @classmethod
+    def from_syntheses(cls, subjects: List[meta.Entity], subject_codes: np.ndarray,
+                       syntheses: np.ndarray) -> 'SubjectPolarizationTable':
+        """
+        Table from author-synthesized ratings, where `subject_codes` indexes the subject of
+        each synthesis in `subjects`.
+        """
+        stats = polarizing.segment_polarizing_stats(syntheses, codes=subject_codes, number_of_groups=len(subjects))
+        return cls(subjects=subjects, divisiveness=stats['divisiveness'],
+                   mapped_divisiveness=stats['mapped_divisiveness'], polarization=stats['polarization'])
+
+    def __len__(self):
+        return len(self.subjects)
+
+    def is_polarizing(self, thresholds: Dict[str, float] = _THRESHOLD_DICT) -> np.ndarray:
+        """Whether each subject's statistics all exceed their thresholds"""
+        with np.errstate(invalid='ignore'):
+            return ((self.divisiveness > thresholds['divisiveness']) &
+                    (self.mapped_divisiveness > thresholds['mapped_divisiveness']) &
+                    (self.polarization > thresholds['polarization']))
+
+    def to_batch(self, thresholds: Dict[str, float] = _THRESHOLD_DICT) -> tables.AssertionBatch:
+        """Whether each subject is polarizing, as a batch of System Assertions"""
+        return tables.AssertionBatch.from_targets(self.subjects, self.is_polarizing(thresholds))
+
+    def to_assertions(self, thresholds: Dict[str, float] = _THRESHOLD_DICT) -> Iterator[meta.Assertion]:
+        """Lazily converts the table into one System Assertion per subject"""
+        return iter(self.to_batch(thresholds))
+
+
+@instrumentation.instrumented
+@memoize.memoized
+def subject_polarization_table(dots: Union[List[objects.Dot], tables.DotTable]) -> SubjectPolarizationTable:
+    """
+    Computes raw divisiveness, mapped divisiveness and polarization of every subject in one
+    vectorized pass over the synthesized (author, subject) ratings.
+
+    Parameters
+    ----------
+    dots
+        List of Dots or a :class:`tables.DotTable`
+
+    Returns
+    -------
+    SubjectPolarizationTable
+
+    Examples
+    --------
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> charlie = objects.Person(name='Charlie', uuid='Charlie')
+    >>> dots = [objects.Dot(source=adam, target=bob, value=10),
+    ...         objects.Dot(source=adam, target=bob, value=8),
+    ...         objects.Dot(source=charlie, target=bob, value=1)]
+    >>> table = subject_polarization_table(dots)
+    >>> [subject.name for subject in table.subjects], table.polarization
+    (['Bob'], array([1.]))
+
+    Dots without a value are ignored:
+
+    >>> dots = [objects.Dot(source=adam, target=bob, value=1),
+    ...         objects.Dot(source=charlie, target=bob, value=1),
+    ...         objects.Dot(source=objects.Person(name='Dan', uuid='Dan'), target=bob, value=None),
+    ...         objects.Dot(source=adam, target=bob, value=None)]
+    >>> table = subject_polarization_table(dots)
+    >>> table.divisiveness, table.mapped_divisiveness, table.polarization
+    (array([0.]), array([0.]), array([0.]))
+    """
+    table = tables.as_dot_table(dots)
+
+    # Synthesize author opinions of each subject.
+    present = ~np.isnan(table.value)
+    pair_codes, pairs = utils.factorize_columns(table.author[present], table.subject[present])
+    syntheses = foundation.segment_weighted_mean(table.value[present], codes=pair_codes, number_of_groups=len(pairs))
+
+    # Number subjects in order of first appearance as a target.
+    subject_codes, first_appearance = np.unique(table.subject, return_index=True)
+    subject_codes = subject_codes[np.argsort(first_appearance)]
+    subject_group = np.empty(table.number_of_persons, dtype=np.int64)
+    subject_group[subject_codes] = np.arange(len(subject_codes))
+
+    return SubjectPolarizationTable.from_syntheses(subjects=[table.persons[code] for code in subject_codes.tolist()],
+                                                   subject_codes=subject_group[pairs[:, 1]],
+                                                   syntheses=syntheses)
+
+
+@instrumentation.instrumented
+def dots_on_subjects_are_nubby_and_polarizing(dots: Union[List[objects.Dot], tables.DotTable],
+                                              thresholds: Dict[str, float] = _THRESHOLD_DICT,
+                                              as_batch: bool = False) \
+                                              -> Union[List[meta.Assertion], tables.AssertionBatch]:
     """
     Returns list of Assertions for each subject (target) in a list of Dots with a True/False
     value on whether the distribution of author-synthesized dot ratings that they received are
@@ -45,12 +146,15 @@ def dots_on_subjects_are_nubby_and_polarizing(dots: List[objects.Dot],
     Parameters
     ----------
     dots
+        List of Dots or a :class:`tables.DotTable`
     thresholds
         Dictionary containing thresholds at keys for:
         * 'divisiveness': Divisiveness of raw values (Default = 1.0)
         * 'mapped_divisiveness': Divisiveness of values mapped to semantic scale (Default = 0.5)
         * 'polarization': Minimum of ratio between positive to negative opinions and ratio
         between negative to positive opinions (Default = 0.25)
+    as_batch
+        Whether to return a :class:`tables.AssertionBatch` instead of a list (default = False)
 
     Returns
     -------
@@ -88,40 +192,11 @@ def dots_on_subjects_are_nubby_and_polarizing(dots: List[objects.Dot],
     Bob True
     Adam True
     """
-    def key_func(x):
-        return x.source.uuid, x.target.uuid
-
-    # Synthesize author opinions of each subject.
-    values_grp_by_author_subject = utils.group_assertions_by_key(dots, key_func=key_func)
-    subjects = dict()
-    for x in values_grp_by_author_subject:
-        one_synthesis = synthesis.synthesize([dot.value for dot in x[1]])
-        if x[0][1] in subjects.keys():
-            subjects[x[0][1]].append(one_synthesis)
-        else:
-            subjects[x[0][1]] = [one_synthesis]
-
-    uuid_to_person = {
-        dot.target.uuid: dot.target for dot in dots
-    }
-
-    # Identify subjects whose author syntheses satisfy divisiveness and polarization conditions.
-    results = list()
-    for sub, values in subjects.items():
-        values_divisiveness = divisiveness.divisiveness_stat(values, objects.QuestionType.SCALE,
-                                                             map_to_sentiment=False)
-        mapped_values_divisiveness = divisiveness.divisiveness_stat(values,
-                                                                    objects.QuestionType.SCALE)
-        values_polarization = polarizing.polarizing_stat(values)
-        is_polarizing = (values_divisiveness > thresholds['divisiveness'] and \
-                         mapped_values_divisiveness > thresholds['mapped_divisiveness'] and \
-                         values_polarization  > thresholds['polarization'])
-        results.append(meta.Assertion(source=meta.System, target=uuid_to_person[sub],
-                                      value=is_polarizing))
-
-    return results
+    batch = subject_polarization_table(dots).to_batch(thresholds)
+    return batch if as_batch else batch.to_assertions()
 
 
+@instrumentation.instrumented
 def dots_in_meeting_are_polarizing(meeting: objects.Meeting,
                                    by_action: Dict[str, str] = None) -> List[meta.Assertion]:
     """
@@ -142,23 +217,26 @@ def dots_in_meeting_are_polarizing(meeting: objects.Meeting,
     """
     # TODO: Represent Attributes by objects instead of strings.
 
-    # TODO: Below is all Data Plumbing -- need to define utility function for it.
-    dots_df = pd.DataFrame.from_records([(dot.source, dot.target, dot.value) for dot in
-                                         meeting.dots], columns=['author', 'subject', 'value'])
+    import pandas as pd  # Deferred: pandas is slow to import.
+
+    table = tables.dot_table_of(meeting)
+    dots_df = pd.DataFrame({'value': table.value})
 
     if by_action:
-        dots_df['by'] = [by_action[dot.attribute.name] for dot in meeting.dots]
+        attribute_names = dict(enumerate(attribute.name for attribute in table.attributes))
+        dots_df['by'] = [by_action[attribute_names[code]] for code in table.attribute.tolist()]
     else:
         dots_df['by'] = "all_dots"
 
     results = list()
-    for action, df in dots_df.groupby(['by']):
-        is_polar = disagreement.is_polarizing(list(df['value']))
-        results.append(meta.Assertion(source=objects.System, target=objects.Person,
-                                      value=is_polar, label=action))
+    for action, df in dots_df.groupby('by'):
+        is_polar = polarizing.is_polarizing(list(df['value'].dropna()))
+        results.append(meta.Assertion(source=meta.System, target=objects.Person,
+                                      value=is_polar, description=action))
     return results
 
 
+@instrumentation.instrumented
 def dots_on_subject_are_polarizing(dots: List[objects.Dot]) -> List[meta.Assertion]:
     """
     Returns list of Assertions for each subject (target) in a list of Dots with a True/False
@@ -179,6 +257,8 @@ def dots_on_subject_are_polarizing(dots: List[objects.Dot]) -> List[meta.Asserti
     List[meta.Assertion]
         Target of each Assertion is a topic/subject. Value is True if it is polarizing.
     """
+    import pandas as pd  # Deferred: pandas is slow to import.
+
     # TODO: Below is all Data Plumbing -- need to define utility function for it.
     author_subject_value = [
         (dot.source, dot.target, dot.value) for dot in dots
@@ -197,6 +277,8 @@ def dots_on_subject_are_polarizing(dots: List[objects.Dot]) -> List[meta.Asserti
     return results
 
 
+@instrumentation.instrumented
+@memoize.memoized
 def unique_choice(question: objects.Question,
                   unique_disagreement=_UNIQUE_DISAGREEMENT) -> List[meta.Assertion]:
     """
@@ -226,10 +308,12 @@ def unique_choice(question: objects.Question,
             unique = True
         else:
             unique = False
-        results.append(meta.Assertion(source=objects.System, target=response.source, value=unique))
+        results.append(meta.Assertion(source=meta.System, target=response.source, value=unique))
     return results
 
 
+@instrumentation.instrumented
+@memoize.memoized
 def believable_choice_on_question(question: objects.Question) -> meta.Assertion:
     """
     What is the believable choice on a question?
@@ -284,6 +368,8 @@ def believable_choice_on_question(question: objects.Question) -> meta.Assertion:
     return meta.Assertion(source=meta.System, target=question, value=result)
 
 
+@instrumentation.instrumented
+@memoize.memoized
 def is_nubby_question(question: objects.Question, question_type,
                       threshold: float = _THRESHOLD_STD_MAPPED_SCALE) -> meta.Assertion:
     """
@@ -328,6 +414,7 @@ def is_nubby_question(question: objects.Question, question_type,
     return meta.Assertion(target=question, value=result)
 
 
+@instrumentation.instrumented
 def meeting_nubbiness_v1(meeting: objects.Meeting,
                          thresholds: List[float] = [0.2, 0.4, 0.6, 0.8]) -> meta.Assertion:
     """
@@ -373,7 +460,10 @@ def meeting_nubbiness_v1(meeting: objects.Meeting,
     )
 
 
-def believable_consensus_exists(question: objects.Question) -> meta.Assertion:
+@instrumentation.instrumented
+def believable_consensus_exists(question: objects.Question, number_participants: int,
+                                quorum_threshold: float = activity._QUORUM_THRESH_DEFAULT,
+                                believable_choice: meta.Assertion = None) -> meta.Assertion:
     """
     TODO: Needs clarification on where it lives conceptually, what the I/O types should be, whether it can be refactored
     Consensus exists on a question.
@@ -381,31 +471,52 @@ def believable_consensus_exists(question: objects.Question) -> meta.Assertion:
     Parameters
     ----------
     question
+    number_participants
+        Number of Participants in the Meeting (e.g. :func:`activity.engagement_in_meeting`), against
+        which quorum on the question is judged
+    quorum_threshold
+        The threshold above which quorum exists. Defaults to :data:`activity._QUORUM_THRESH_DEFAULT`
+    believable_choice
+        Precomputed result of :func:`believable_choice_on_question` (computed if not given)
 
     Returns
     -------
-    bool
-        Whether there is a consensus answer.
+    meta.Assertion
+        Value is True if there is a consensus answer.
+
+    Examples
+    --------
+    >>> from prios_api.examples import likertexample
+    >>> believable_consensus_exists(likertexample.question, number_participants=5).value
+    False
+    >>> people = [objects.Person(uuid=i, believability=0.5) for i in range(4)]
+    >>> question = objects.Question(title='Launch?', question_type=objects.QuestionType.LIKERT)
+    >>> question.responses = [objects.Response(source=person, target=question, value=4) for person in people]
+    >>> believable_consensus_exists(question, number_participants=4).value
+    True
+    >>> believable_consensus_exists(question, number_participants=10).value
+    False
     """
-    sufficient_engagement_flag = activity.quorum_exists_on_question_145(question)
+    if believable_choice is None:
+        believable_choice = believable_choice_on_question(question)
+    sufficient_engagement_flag = activity.quorum_exists_question(question, number_participants, quorum_threshold).value
     sufficient_believability_engagement_flag = activity.sufficient_believability_engagement(question)
-    believable_choice_results = believable_choice_on_question(question) or isinstance(
-        believable_choice_on_question(question), float)
-    if sufficient_engagement_flag and sufficient_believability_engagement_flag and believable_choice_results:
-        results = True
-        return meta.Assertion(source=objects.System, target=question, value=results, measure=objects.BooleanOption)
-    else:
-        results = False
-        return meta.Assertion(source=objects.System, target=question, value=results, measure=objects.BooleanOption)
+    believable_choice_results = believable_choice.value is not None
+    results = bool(sufficient_engagement_flag and sufficient_believability_engagement_flag and believable_choice_results)
+    return meta.Assertion(source=meta.System, target=question, value=results)
 
 
-def disagrees_with_believable_choice(question: objects.Question) -> List[meta.Assertion]:
+@instrumentation.instrumented
+def disagrees_with_believable_choice(question: objects.Question,
+                                     believable_choice: meta.Assertion = None) -> List[meta.Assertion]:
     """
     Whether the responses in a question disagree with the believable choice.
 
     Parameters
     ----------
     question
+    believable_choice
+        Precomputed result of :func:`believable_choice_on_question` (computed if not given)
 
     Returns
     -------
@@ -436,7 +547,9 @@ def disagrees_with_believable_choice(question: objects.Question) -> List[meta.As
     [False]
     """
     question_type = question.question_type
-    believable_choice_result = believable_choice_on_question(question).value
+    if believable_choice is None:
+        believable_choice = believable_choice_on_question(question)
+    believable_choice_result = believable_choice.value
     assertions = []
     if believable_choice_result:
         for response in question.responses:
@@ -445,6 +558,7 @@ def disagrees_with_believable_choice(question: objects.Question) -> List[meta.As
     return assertions
 
 
+@instrumentation.instrumented
 def significantly_out_of_sync_in_meeting(meeting: objects.Meeting,
                                          threshold_low=0.8,
                                          threshold_high=1.2) -> List[meta.Assertion]:
@@ -480,7 +594,7 @@ def significantly_out_of_sync_in_meeting(meeting: objects.Meeting,
                 oos_count[person] += 1
 
     # TODO: Factor this better.
-    oos_count_z_score = foundation.zscore([value for key, value in oos_count.items()])
+    oos_count_z_score = foundation.map_to_z_score([value for key, value in oos_count.items()])
     oos_count_z_score_dict = dict()
     j = 0
     for key, value in oos_count.items():
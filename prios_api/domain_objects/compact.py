@@ -0,0 +1,103 @@
+"""
+Compact (slotted) variants of the Domain Objects.
+
+Each class has the same fields, defaults, constructor signature and equality semantics as its
+counterpart in :mod:`meta` or :mod:`objects`, but stores its fields in `__slots__` instead of a
+per-instance `__dict__`. Arbitrary attributes cannot be set on instances.
+
+Compact classes do not subclass their counterparts (that would bring back the `__dict__`), so
+code that accepts both checks against the `*_TYPES` tuples of this module, e.g.
+
+>>> isinstance(Dot(value=1), DOT_TYPES), isinstance(objects.Meeting(), ENTITY_TYPES)
+(True, True)
+>>> isinstance(Dot(value=1), objects.Dot)
+False
+"""
+
+import dataclasses
+import typing
+from dataclasses import dataclass, field
+from prios_api.domain_objects import meta, objects
+
+
+@dataclass(slots=True)
+class Entity:
+    """Compact :class:`meta.Entity`"""
+    uuid: typing.Any = meta.Entity.uuid
+    created_at: float = meta.Entity.created_at
+    members: typing.List['Entity'] = field(default_factory=list)
+
+    def empty(self, attributes_to_keep: typing.List[str]):
+        """Filters data from instantiated object (Not recommended for ad hoc use)"""
+        assert len(attributes_to_keep) > 0, 'Must specify some data to retain in object!'
+
+        for attribute in dataclasses.fields(self):
+            if attribute.name not in attributes_to_keep:
+                setattr(self, attribute.name, None)
+
+
+@dataclass(slots=True)
+class Assertion:
+    """Compact :class:`meta.Assertion`"""
+    source: typing.Optional[Entity] = None
+    target: typing.Optional[Entity] = None
+    value: typing.Optional[typing.Union[bool, float, int, str]] = None
+    confidence: typing.Optional[float] = None
+    description: typing.Optional[str] = None
+    attribute: typing.Optional[meta.Attribute] = None
+    context: typing.Any = None
+    created_at: float = meta.Assertion.created_at
+    uuid_id: typing.Any = meta.Assertion.uuid_id
+
+
+@dataclass(slots=True)
+class Judgement(Assertion):
+    description: typing.Optional[str] = objects.Judgement.description
+
+
+@dataclass(slots=True)
+class Dot(Judgement):
+    description: typing.Optional[str] = None
+
+
+@dataclass(slots=True)
+class Response(Judgement):
+    source: typing.Optional['Person'] = None
+    description: typing.Optional[str] = None
+
+
+@dataclass(slots=True)
+class Person(Entity):
+    name: typing.Optional[str] = None
+    person_id: typing.Optional[str] = None
+    role: typing.Optional[str] = None
+    description: typing.Optional[str] = None
+    believability: typing.Optional[float] = 0.01
+    dots: typing.List[Dot] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Question(Entity):
+    title: typing.Optional[str] = None
+    description: typing.Optional[str] = None
+    question_type: typing.Optional[objects.QuestionType] = None
+    responses: typing.List[Response] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Meeting(Entity):
+    name: typing.Optional[str] = None
+    description: typing.Optional[str] = None
+    dots: typing.List[Dot] = field(default_factory=list)
+    questions: typing.List[Question] = field(default_factory=list)
+    participants: typing.List[Person] = field(default_factory=list)
+    dot_table: typing.Optional['tables.DotTable'] = field(default=None, compare=False, repr=False)
+
+
+# Domain Object classes and their compact variants, for isinstance checks accepting either
+ENTITY_TYPES = (meta.Entity, Entity)
+ASSERTION_TYPES = (meta.Assertion, Assertion)
+DOT_TYPES = (objects.Dot, Dot)
+RESPONSE_TYPES = (objects.Response, Response)
+QUESTION_TYPES = (objects.Question, Question)
+MEETING_TYPES = (objects.Meeting, Meeting)
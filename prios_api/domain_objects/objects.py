@@ -94,3 +94,5 @@ class Meeting(meta.Entity):
     dots: typing.List[Dot] = field(default_factory=list)
     questions: typing.List[Question] = field(default_factory=list)
     participants: typing.List[Person] = field(default_factory=list)
+    # Columnar alternative to `dots` (see `tables.DotTable`); held instead of or alongside the list.
+    dot_table: typing.Optional['tables.DotTable'] = field(default=None, compare=False, repr=False)
@@ -0,0 +1,327 @@
+"""
+Compact binary serialization of Meetings (and other Entities).
+
+Pickling a Meeting repeats the structure of every nested dataclass and walks the same Persons
+from every Dot. This format instead interns:
+
+* Entities (Persons, Questions, the Meeting itself, ...) into an entity table, by identity
+* Attributes into an attribute table
+* Distinct field values (e.g. ratings, response choices, uuids) into a value table
+
+Assertions held in lists of entities (`Meeting.dots`, `Question.responses`, `Person.dots`) are
+stored column by column: a field holding the same value in every row is stored once, a field
+with few distinct values as packed integer codes into the value table (of the smallest integer
+type that fits), and any other float field (e.g. hydrated `created_at`) as packed floats. Tables
+are JSON, columns are raw little-endian arrays. `Meeting.dot_table` (a cache, excluded from
+comparisons) is not serialized.
+
+Serialized meetings are plain bytes, so they can be shipped to worker processes, e.g.
+`runner.run_insights(map(dumps, meetings), sink, hydrate=loads)`.
+"""
+
+import dataclasses
+import enum
+import itertools
+import json
+import operator
+import struct
+import uuid
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from prios_api.domain_objects import compact, meta, objects
+
+MAGIC = b'PRIOS\x00'
+FORMAT_VERSION = 1
+MISSING_CODE = -1
+_HEADER = struct.Struct('<6sBI')
+_ALIGNMENT = 8
+_CLASS_MODULES = {'meta': meta, 'objects': objects, 'compact': compact}
+_ASSERTION_FIELDS = [f.name for f in dataclasses.fields(meta.Assertion)]
+_CLASS_FIELD = '__class__'
+_SCALAR_TYPES = frozenset([type(None), bool, int, float, str])
+
+
+def _class_reference(cls: type) -> List[str]:
+    module = cls.__module__.rsplit('.', 1)[-1]
+    if _CLASS_MODULES.get(module) is None or getattr(_CLASS_MODULES[module], cls.__name__, None) is not cls:
+        raise TypeError('Cannot serialize class {}'.format(cls))
+    return [module, cls.__name__]
+
+
+def _class_of(reference: List[str]) -> type:
+    module, name = reference
+    return getattr(_CLASS_MODULES[module], name)
+
+
+def _is_assertion_list(value: Any) -> bool:
+    return isinstance(value, list) and len(value) > 0 and isinstance(value[0], compact.ASSERTION_TYPES)
+
+
+def _code_dtype(number_of_values: int) -> np.dtype:
+    for dtype in (np.int8, np.int16, np.int32):
+        if number_of_values <= np.iinfo(dtype).max:
+            return np.dtype(dtype).newbyteorder('<')
+    return np.dtype(np.int64).newbyteorder('<')
+
+
+def _identity_key(value: Any) -> Any:
+    """
+    Key under which equal values are interned once (Entities, Attributes, containers and other
+    unhashable values by identity)
+    """
+    if type(value) in _SCALAR_TYPES:
+        return type(value), value
+    if isinstance(value, (*compact.ENTITY_TYPES, meta.Attribute, list, tuple, dict)):
+        return id(value)
+    try:
+        hash(value)
+    except TypeError:
+        return id(value)
+    return type(value), value
+
+
+class _Encoder(object):
+    def __init__(self):
+        self.entities: List[Dict] = []
+        self.entity_codes: Dict[int, int] = dict()
+        self.attributes: List[Dict] = []
+        self.attribute_codes: Dict[int, int] = dict()
+        self.values: List[Any] = []
+        self.value_codes: Dict[str, int] = dict()
+        self.segments: List[List] = []
+        self.assertions: List[meta.Assertion] = []
+        self._keep_alive = []  # Interned by identity: ids must not be reused while encoding.
+
+    def entity(self, entity: meta.Entity) -> int:
+        code = self.entity_codes.get(id(entity))
+        if code is not None:
+            return code
+        code = len(self.entities)
+        self.entity_codes[id(entity)] = code
+        self._keep_alive.append(entity)
+        record = {'class': _class_reference(type(entity)), 'fields': {}}
+        self.entities.append(record)
+        for f in dataclasses.fields(entity):
+            if not f.compare:
+                continue
+            value = getattr(entity, f.name)
+            if _is_assertion_list(value):
+                self.segments.append([code, f.name, len(value)])
+                self.assertions.extend(value)
+                record['fields'][f.name] = ['list', []]
+            else:
+                record['fields'][f.name] = self.encode(value)
+        return code
+
+    def attribute(self, attribute: meta.Attribute) -> int:
+        code = self.attribute_codes.get(id(attribute))
+        if code is None:
+            code = len(self.attributes)
+            self.attribute_codes[id(attribute)] = code
+            self._keep_alive.append(attribute)
+            record = dict()
+            self.attributes.append(record)
+            record.update(name=attribute.name, description=attribute.description,
+                          members=[self.attribute(member) for member in attribute.members])
+        return code
+
+    def encode(self, value: Any) -> Any:
+        """JSON-able encoding of a field value"""
+        if value is None:
+            return None
+        if isinstance(value, np.generic):
+            return self.encode(value.item())
+        if isinstance(value, (bool, int, float, str)):
+            return ['v', value]
+        if isinstance(value, uuid.UUID):
+            return ['uuid', str(value)]
+        if isinstance(value, enum.Enum):
+            return ['enum', _class_reference(type(value)), value.name]
+        if isinstance(value, type):
+            return ['class', _class_reference(value)]
+        if isinstance(value, meta.Attribute):
+            return ['attribute', self.attribute(value)]
+        if isinstance(value, compact.ENTITY_TYPES):
+            return ['entity', self.entity(value)]
+        if isinstance(value, (list, tuple)):
+            return ['list' if isinstance(value, list) else 'tuple', [self.encode(x) for x in value]]
+        if isinstance(value, dict):
+            return ['dict', [[self.encode(key), self.encode(x)] for key, x in value.items()]]
+        raise TypeError('Cannot serialize {!r}'.format(type(value)))
+
+    def value_code(self, value: Any) -> int:
+        if value is None:
+            return MISSING_CODE
+        encoded = self.encode(value)
+        key = json.dumps(encoded)
+        code = self.value_codes.get(key)
+        if code is None:
+            code = len(self.values)
+            self.value_codes[key] = code
+            self.values.append(encoded)
+        return code
+
+    def column(self, values: List[Any]) -> Tuple[Dict[str, Any], np.ndarray]:
+        """Layout and packed data (if any) of a column of field values"""
+        # Values are kept alive by their Assertions, so ids are stable; equal values share an index.
+        by_id = dict(zip(map(id, values), values))
+        distinct, index_of_id = dict(), dict()
+        for i, value in by_id.items():
+            index_of_id[i] = distinct.setdefault(_identity_key(value), (len(distinct), value))[0]
+        if len(distinct) == 1:
+            return {'kind': 'constant', 'value': self.encode(values[0])}, None
+
+        number_of_rows = len(values)
+        if (len(distinct) > number_of_rows // 4 and
+                all(value is None or (type(value) is float and value == value) for _, value in distinct.values())):
+            return {'kind': 'float'}, np.array([np.nan if value is None else value for value in values],
+                                              dtype=np.dtype(np.float64).newbyteorder('<'))
+
+        codes = np.array([self.value_code(value) for _, value in distinct.values()])
+        indices = np.fromiter(map(index_of_id.__getitem__, map(id, values)), dtype=np.int64, count=number_of_rows)
+        return {'kind': 'code'}, codes[indices].astype(_code_dtype(len(self.values)))
+
+    def assertion_columns(self) -> Dict[str, Tuple[Dict[str, Any], np.ndarray]]:
+        # Intern Entities that are only referenced by Assertions first; they may hold Assertions too.
+        start = 0
+        while start < len(self.assertions):
+            batch, start = self.assertions[start:], len(self.assertions)
+            for name in _ASSERTION_FIELDS:
+                values = list(map(operator.attrgetter(name), batch))
+                for value in dict(zip(map(id, values), values)).values():
+                    if type(value) not in _SCALAR_TYPES and isinstance(value, (*compact.ENTITY_TYPES, meta.Attribute,
+                                                                               list, tuple, dict)):
+                        self.encode(value)
+
+        columns = {_CLASS_FIELD: self.column(list(map(type, self.assertions)))}
+        for name in _ASSERTION_FIELDS:
+            columns[name] = self.column(list(map(operator.attrgetter(name), self.assertions)))
+        return columns
+
+
+def dumps(meeting: meta.Entity) -> bytes:
+    """
+    Serializes a Meeting (or any other Entity) to bytes.
+
+    Examples
+    --------
+    >>> from prios_api.examples import likertexample
+    >>> blake, natalie = likertexample.meeting.participants[:2]
+    >>> meeting = objects.Meeting(name='Test Meeting', participants=likertexample.meeting.participants,
+    ...                           questions=likertexample.meeting.questions,
+    ...                           dots=[objects.Dot(source=blake, target=natalie, value=7.)])
+    >>> restored = loads(dumps(meeting))
+    >>> restored == meeting
+    True
+    >>> restored.dots[0].source is restored.participants[0]
+    True
+    >>> [(response.source.name, response.value) for response in restored.questions[0].responses][:2]
+    [('Blake', 2), ('Natalie', 1)]
+
+    Dict contexts and numpy scalars (stored as the equal Python scalars) round-trip too
+
+    >>> import numpy as np
+    >>> meeting.dots = [objects.Dot(source=blake, target=natalie, value=np.int64(value), context={'round': value})
+    ...                 for value in range(1, 8)]
+    >>> restored = loads(dumps(meeting))
+    >>> restored == meeting, [(dot.value, dot.context) for dot in restored.dots][:2]
+    (True, [(1, {'round': 1}), (2, {'round': 2})])
+    >>> type(restored.dots[0].value)
+    <class 'int'>
+    """
+    encoder = _Encoder()
+    root = encoder.entity(meeting)
+    columns = encoder.assertion_columns()
+
+    layout, buffers, offset = dict(), [], 0
+    for name, (column_layout, data) in columns.items():
+        if data is not None:
+            column_layout.update(dtype=data.dtype.str, offset=offset)
+            data = data.tobytes()
+            data += b'\0' * (-len(data) % _ALIGNMENT)
+            buffers.append(data)
+            offset += len(data)
+        layout[name] = column_layout
+
+    header = json.dumps({
+        'root': root, 'entities': encoder.entities, 'attributes': encoder.attributes, 'values': encoder.values,
+        'assertions': {'length': len(encoder.assertions), 'segments': encoder.segments, 'columns': layout}
+    }, separators=(',', ':')).encode('utf-8')
+    header += b' ' * (-(_HEADER.size + len(header)) % _ALIGNMENT)
+    return b''.join([_HEADER.pack(MAGIC, FORMAT_VERSION, len(header)), header] + buffers)
+
+
+class _Decoder(object):
+    def __init__(self, header: Dict[str, Any]):
+        self.entities = [_class_of(record['class'])() for record in header['entities']]
+        self.attributes = [meta.Attribute(name=record['name'], description=record['description'])
+                           for record in header['attributes']]
+        for attribute, record in zip(self.attributes, header['attributes']):
+            attribute.members = [self.attributes[code] for code in record['members']]
+        self.values = [self.decode(value) for value in header['values']]
+
+    def decode(self, encoded: Any) -> Any:
+        if encoded is None:
+            return None
+        kind, payload = encoded[0], encoded[1]
+        if kind == 'v':
+            return payload
+        if kind == 'uuid':
+            return uuid.UUID(payload)
+        if kind == 'enum':
+            return _class_of(payload)[encoded[2]]
+        if kind == 'class':
+            return _class_of(payload)
+        if kind == 'attribute':
+            return self.attributes[payload]
+        if kind == 'entity':
+            return self.entities[payload]
+        if kind in ('list', 'tuple'):
+            values = [self.decode(x) for x in payload]
+            return values if kind == 'list' else tuple(values)
+        if kind == 'dict':
+            return {self.decode(key): self.decode(x) for key, x in payload}
+        raise ValueError('Unknown value kind {!r}'.format(kind))
+
+    def column(self, layout: Dict[str, Any], data, start: int, number_of_rows: int) -> List[Any]:
+        if layout['kind'] == 'constant':
+            return [self.decode(layout['value'])] * number_of_rows
+        column = np.frombuffer(data, dtype=np.dtype(layout['dtype']), count=number_of_rows,
+                               offset=start + layout['offset']).tolist()
+        if layout['kind'] == 'float':
+            return [None if value != value else value for value in column]
+        values = self.values + [None]  # MISSING_CODE indexes the last entry.
+        return [values[code] for code in column]
+
+
+def loads(data: bytes) -> meta.Entity:
+    """Deserializes a Meeting (or other Entity) serialized by :func:`dumps`"""
+    magic, version, header_length = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError('Not a serialized meeting (or unsupported format version)!')
+    header = json.loads(bytes(data[_HEADER.size:_HEADER.size + header_length]).decode('utf-8'))
+    decoder = _Decoder(header)
+    for entity, record in zip(decoder.entities, header['entities']):
+        for name, encoded in record['fields'].items():
+            setattr(entity, name, decoder.decode(encoded))
+
+    start = _HEADER.size + header_length
+    number_of_rows = header['assertions']['length']
+    columns = {name: decoder.column(layout, data, start, number_of_rows)
+               for name, layout in header['assertions']['columns'].items()}
+    classes = columns.pop(_CLASS_FIELD, [])
+    rows = zip(classes, *(columns[name] for name in _ASSERTION_FIELDS))
+    for owner, name, length in header['assertions']['segments']:
+        getattr(decoder.entities[owner], name).extend(
+            cls(**dict(zip(_ASSERTION_FIELDS, values))) for cls, *values in itertools.islice(rows, length))
+    return decoder.entities[header['root']]
+
+
+def dump(meeting: meta.Entity, file):
+    """Writes :func:`dumps` of a Meeting to a binary file object"""
+    file.write(dumps(meeting))
+
+
+def load(file) -> meta.Entity:
+    """Reads a Meeting written by :func:`dump` from a binary file object"""
+    return loads(file.read())
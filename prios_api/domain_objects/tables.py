@@ -0,0 +1,274 @@
+"""
+Columnar representations of Domain Objects.
+"""
+
+import typing
+from dataclasses import dataclass
+import numpy as np
+from prios_api.domain_objects import meta, objects
+
+MISSING_CODE = -1
+_INITIAL_CAPACITY = 16
+
+
+class DotTable(object):
+    """Columnar store of :class:`objects.Dot`
+
+    * Authors and subjects are integer codes into :attr:`persons` (keyed by `uuid`)
+    * Attributes are integer codes into :attr:`attributes` (keyed by `name`), or `MISSING_CODE`
+    * Values are floats, missing values are NaN
+    * Column properties are read-only views onto the underlying buffers (no copies)
+
+    Examples
+    --------
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> table = DotTable.from_dots([objects.Dot(source=adam, target=bob, value=10)])
+    >>> table.append(objects.Dot(source=bob, target=adam, value=3))
+    >>> len(table)
+    2
+    >>> table.author, table.subject, table.value
+    (array([0, 1]), array([1, 0]), array([10.,  3.]))
+    >>> [(dot.source.name, dot.target.name, dot.value) for dot in table.to_dots()]
+    [('Adam', 'Bob', 10.0), ('Bob', 'Adam', 3.0)]
+    """
+    def __init__(self, capacity: int = _INITIAL_CAPACITY):
+        capacity = max(1, capacity)
+        self._author = np.empty(capacity, dtype=np.int64)
+        self._subject = np.empty(capacity, dtype=np.int64)
+        self._attribute = np.empty(capacity, dtype=np.int64)
+        self._created_at = np.empty(capacity, dtype=np.float64)
+        self._value = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+
+        self.persons: typing.List[meta.Entity] = []
+        self.person_codes: typing.Dict[typing.Any, int] = {}
+        self.attributes: typing.List[meta.Attribute] = []
+        self.attribute_codes: typing.Dict[str, int] = {}
+
+    @classmethod
+    def from_dots(cls, dots: typing.Iterable[objects.Dot]) -> 'DotTable':
+        """Builds a table from an iterable of :class:`objects.Dot`"""
+        dots = list(dots)
+        table = cls(capacity=len(dots))
+        table.extend(dots)
+        return table
+
+    @classmethod
+    def from_columns(cls, author: np.ndarray, subject: np.ndarray, attribute: np.ndarray,
+                     created_at: np.ndarray, value: np.ndarray, persons: typing.List[meta.Entity],
+                     attributes: typing.List[meta.Attribute]) -> 'DotTable':
+        """
+        Adopts already-encoded columns (e.g. memory-mapped arrays) without copying them. The
+        columns are only copied if more Dots are appended.
+        """
+        table = cls(capacity=1)
+        table._author, table._subject, table._attribute = author, subject, attribute
+        table._created_at, table._value = created_at, value
+        table._size = len(value)
+        for person in persons:
+            table.person_code(person)
+        for attribute_ in attributes:
+            table.attribute_code(attribute_)
+        return table
+
+    def __len__(self):
+        return self._size
+
+    def _view(self, column: np.ndarray) -> np.ndarray:
+        view = column[:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def author(self) -> np.ndarray:
+        return self._view(self._author)
+
+    @property
+    def subject(self) -> np.ndarray:
+        return self._view(self._subject)
+
+    @property
+    def attribute(self) -> np.ndarray:
+        return self._view(self._attribute)
+
+    @property
+    def created_at(self) -> np.ndarray:
+        return self._view(self._created_at)
+
+    @property
+    def value(self) -> np.ndarray:
+        return self._view(self._value)
+
+    @property
+    def number_of_persons(self) -> int:
+        return len(self.persons)
+
+    def person_code(self, entity: meta.Entity) -> int:
+        """Integer code of an Entity, registering it if it has not been seen before"""
+        code = self.person_codes.get(entity.uuid)
+        if code is None:
+            code = len(self.persons)
+            self.person_codes[entity.uuid] = code
+            self.persons.append(entity)
+        return code
+
+    def attribute_code(self, attribute: typing.Optional[meta.Attribute]) -> int:
+        """Integer code of an Attribute, registering it if it has not been seen before"""
+        if attribute is None:
+            return MISSING_CODE
+        code = self.attribute_codes.get(attribute.name)
+        if code is None:
+            code = len(self.attributes)
+            self.attribute_codes[attribute.name] = code
+            self.attributes.append(attribute)
+        return code
+
+    def _reserve(self, size: int):
+        capacity = len(self._value)
+        if size <= capacity:
+            return
+        capacity = max(1, capacity)
+        while capacity < size:
+            capacity *= 2
+        for name in ('_author', '_subject', '_attribute', '_created_at', '_value'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def append(self, dot: objects.Dot):
+        """Appends a single Dot"""
+        self._reserve(self._size + 1)
+        i = self._size
+        self._author[i] = self.person_code(dot.source)
+        self._subject[i] = self.person_code(dot.target)
+        self._attribute[i] = self.attribute_code(dot.attribute)
+        self._created_at[i] = dot.created_at
+        self._value[i] = np.nan if dot.value is None else dot.value
+        self._size += 1
+
+    def extend(self, dots: typing.Iterable[objects.Dot]):
+        """Appends an iterable of Dots"""
+        for dot in dots:
+            self.append(dot)
+
+    def extend_columns(self, author: np.ndarray, subject: np.ndarray, value: np.ndarray,
+                       attribute: np.ndarray = None, created_at: np.ndarray = None):
+        """
+        Appends already-encoded columns. Codes must refer to :attr:`persons` and
+        :attr:`attributes` of this table.
+        """
+        n = len(value)
+        if n == 0:
+            return
+        self._reserve(self._size + n)
+        rows = slice(self._size, self._size + n)
+        self._author[rows] = author
+        self._subject[rows] = subject
+        self._value[rows] = value
+        self._attribute[rows] = MISSING_CODE if attribute is None else attribute
+        self._created_at[rows] = np.nan if created_at is None else created_at
+        self._size += n
+
+    def to_dots(self, dot_class: typing.Type = objects.Dot) -> typing.List[objects.Dot]:
+        """
+        Materializes the table as a list of :class:`objects.Dot` (or of `dot_class`, e.g. the
+        slotted :class:`compact.Dot`)
+        """
+        result = []
+        for author, subject, attribute, created_at, value in zip(
+                self.author.tolist(), self.subject.tolist(), self.attribute.tolist(),
+                self.created_at.tolist(), self.value.tolist()):
+            result.append(dot_class(
+                source=self.persons[author],
+                target=self.persons[subject],
+                value=None if value != value else value,
+                attribute=None if attribute == MISSING_CODE else self.attributes[attribute],
+                created_at=created_at
+            ))
+        return result
+
+
+def as_dot_table(dots: typing.Union[DotTable, typing.Iterable[objects.Dot]]) -> DotTable:
+    """Returns `dots` if it is already a :class:`DotTable`, otherwise builds one"""
+    if isinstance(dots, DotTable):
+        return dots
+    return DotTable.from_dots(dots)
+
+
+def dot_table_of(meeting: objects.Meeting) -> DotTable:
+    """Columnar Dots of a Meeting: `meeting.dot_table` if it is set, otherwise built from `meeting.dots`"""
+    if meeting.dot_table is None:
+        return DotTable.from_dots(meeting.dots)
+    return meeting.dot_table
+
+
+@dataclass
+class AssertionBatch:
+    """Columnar batch of Assertions that share a source and an attribute
+
+    * `target_codes` are integer codes into `targets`
+    * `values` (and optional `confidences`) hold one entry per Assertion
+    * Iterating yields :class:`meta.Assertion` objects on demand
+
+    Examples
+    --------
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> batch = AssertionBatch(targets=[adam, bob], target_codes=np.array([0, 1]),
+    ...                        values=np.array([True, False]))
+    >>> len(batch)
+    2
+    >>> [(x.target.name, x.value) for x in batch]
+    [('Adam', True), ('Bob', False)]
+    >>> batch.to_pandas()
+      target  value
+    0   Adam   True
+    1    Bob  False
+    """
+    targets: typing.List[meta.Entity]
+    target_codes: np.ndarray
+    values: np.ndarray
+    confidences: typing.Optional[np.ndarray] = None
+    source: typing.Any = meta.System
+    attribute: typing.Optional[meta.Attribute] = None
+    description: typing.Optional[str] = None
+
+    @classmethod
+    def from_targets(cls, targets: typing.List[meta.Entity], values: np.ndarray, **kwargs) -> 'AssertionBatch':
+        """Batch with exactly one Assertion per target, in order"""
+        return cls(targets=targets, target_codes=np.arange(len(targets)), values=np.asarray(values), **kwargs)
+
+    def __len__(self):
+        return len(self.target_codes)
+
+    def _assertion(self, target_code: int, value, confidence) -> meta.Assertion:
+        return meta.Assertion(source=self.source, target=self.targets[target_code], value=value,
+                              confidence=confidence, description=self.description, attribute=self.attribute)
+
+    def __getitem__(self, i: int) -> meta.Assertion:
+        confidence = None if self.confidences is None else self.confidences[i].item()
+        return self._assertion(int(self.target_codes[i]), self.values[i].item(), confidence)
+
+    def __iter__(self) -> typing.Iterator[meta.Assertion]:
+        confidences = [None] * len(self) if self.confidences is None else self.confidences.tolist()
+        for target_code, value, confidence in zip(self.target_codes.tolist(), self.values.tolist(), confidences):
+            yield self._assertion(target_code, value, confidence)
+
+    def to_assertions(self) -> typing.List[meta.Assertion]:
+        """Materializes the batch as a list of :class:`meta.Assertion`"""
+        return list(self)
+
+    def _columns(self) -> typing.Dict[str, np.ndarray]:
+        target_uuids = np.empty(len(self.targets), dtype=object)
+        target_uuids[:] = [target.uuid for target in self.targets]
+        columns = {'target': target_uuids[self.target_codes], 'value': self.values}
+        if self.confidences is not None:
+            columns['confidence'] = self.confidences
+        return columns
+
+    def to_pandas(self):
+        """Exports the batch as a `pandas.DataFrame` with target uuids, values and confidences"""
+        import pandas as pd
+        return pd.DataFrame(self._columns())
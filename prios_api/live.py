@@ -0,0 +1,180 @@
+"""
+Incremental analytics of a live Meeting.
+
+During a meeting Dots arrive continuously. :class:`LiveMeeting` keeps running aggregates that
+are updated in O(1) per appended Dot, so dot-based insights can be re-read in O(subjects)
+instead of being recomputed from all Dots:
+
+* Sum and count of the ratings of each (author, subject) pair, i.e. the author synthesis
+* Per subject: number of syntheses, their sum and sum of squares, and a histogram of their
+  semantic buckets (negative, neutral, positive)
+* Number of Dots received by each subject and in total
+
+Dots without a value count towards how often a subject is dotted, but are ignored by the
+polarization statistics.
+"""
+
+import bisect
+from typing import Dict, Iterable, List, Tuple, Union
+import numpy as np
+from prios_api import activity, disagreement
+from prios_api.src import foundation
+from prios_api.domain_objects import meta, objects, tables
+
+_SCALE_THRESHOLDS = foundation.SEMANTIC_BUCKET_THRESHOLDS[objects.QuestionType.SCALE]
+_NEGATIVE, _NEUTRAL, _POSITIVE = range(3)
+
+
+class LiveMeeting(object):
+    """Running state of the Dots of a Meeting
+
+    Subjects are ordered by their first appearance as a target, like the batch analytics in
+    :mod:`prios_api.activity` and :mod:`prios_api.disagreement`, whose results it reproduces.
+
+    Examples
+    --------
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> charlie = objects.Person(name='Charlie', uuid='Charlie')
+    >>> live = LiveMeeting([objects.Dot(source=adam, target=bob, value=10)])
+    >>> [(x.target.name, x.value) for x in live.dots_on_subjects_are_nubby_and_polarizing()]
+    [('Bob', False)]
+    >>> live.extend([objects.Dot(source=charlie, target=bob, value=1),
+    ...              objects.Dot(source=bob, target=adam, value=10)])
+    >>> [(x.target.name, x.value) for x in live.dots_on_subjects_are_nubby_and_polarizing()]
+    [('Bob', True), ('Adam', False)]
+    >>> [(x.target.name, x.value) for x in live.polarizing_participants()]
+    [('Bob', True), ('Adam', False)]
+
+    Dots without a value give the same results as the batch analytics:
+
+    >>> dan = objects.Person(name='Dan', uuid='Dan')
+    >>> dots = [objects.Dot(source=adam, target=bob, value=1), objects.Dot(source=charlie, target=bob, value=1),
+    ...         objects.Dot(source=dan, target=bob, value=None), objects.Dot(source=adam, target=bob, value=None),
+    ...         objects.Dot(source=bob, target=adam, value=None), objects.Dot(source=dan, target=adam, value=9)]
+    >>> live, batch = LiveMeeting(dots).subject_polarization_table(), disagreement.subject_polarization_table(dots)
+    >>> live.subjects == batch.subjects
+    True
+    >>> all(np.allclose(getattr(live, name), getattr(batch, name), equal_nan=True)
+    ...     for name in ('divisiveness', 'mapped_divisiveness', 'polarization'))
+    True
+    >>> LiveMeeting(dots).dot_counts_by_subject()[1], activity.dot_counts_by_subject(dots)[1]
+    (array([4, 2]), array([4, 2]))
+    """
+    def __init__(self, dots: Union[Iterable[objects.Dot], tables.DotTable] = ()):
+        self.subjects: List[meta.Entity] = []
+        self._author_codes: Dict = dict()
+        self._subject_codes: Dict = dict()
+
+        self._pair_sums: Dict[Tuple[int, int], float] = dict()
+        self._pair_counts: Dict[Tuple[int, int], int] = dict()
+
+        self._dot_counts: List[int] = []
+        self._synthesis_counts: List[int] = []
+        self._synthesis_sums: List[float] = []
+        self._synthesis_sum_squares: List[float] = []
+        self._buckets: List[List[int]] = []
+        self.total_dots = 0
+
+        self.extend(dots)
+
+    def __len__(self):
+        return self.total_dots
+
+    def _author_code(self, author: meta.Entity) -> int:
+        return self._author_codes.setdefault(author.uuid, len(self._author_codes))
+
+    def _subject_code(self, subject: meta.Entity) -> int:
+        code = self._subject_codes.get(subject.uuid)
+        if code is None:
+            code = len(self.subjects)
+            self._subject_codes[subject.uuid] = code
+            self.subjects.append(subject)
+            self._dot_counts.append(0)
+            self._synthesis_counts.append(0)
+            self._synthesis_sums.append(0.)
+            self._synthesis_sum_squares.append(0.)
+            self._buckets.append([0, 0, 0])
+        return code
+
+    def _add_synthesis(self, subject: int, synthesis: float, sign: int):
+        self._synthesis_counts[subject] += sign
+        self._synthesis_sums[subject] += sign * synthesis
+        self._synthesis_sum_squares[subject] += sign * synthesis * synthesis
+        self._buckets[subject][bisect.bisect_right(_SCALE_THRESHOLDS, synthesis)] += sign
+
+    def append(self, dot: objects.Dot):
+        """Updates the state with a single Dot in O(1)"""
+        subject = self._subject_code(dot.target)
+        self._dot_counts[subject] += 1
+        self.total_dots += 1
+        if dot.value is None or dot.value != dot.value:
+            return
+
+        pair = (self._author_code(dot.source), subject)
+        count = self._pair_counts.get(pair, 0)
+        if count:
+            self._add_synthesis(subject, self._pair_sums[pair] / count, -1)
+        self._pair_sums[pair] = self._pair_sums.get(pair, 0.) + dot.value
+        self._pair_counts[pair] = count + 1
+        self._add_synthesis(subject, self._pair_sums[pair] / (count + 1), 1)
+
+    def extend(self, dots: Union[Iterable[objects.Dot], tables.DotTable]):
+        """Updates the state with several Dots"""
+        if isinstance(dots, tables.DotTable):
+            dots = dots.to_dots()
+        for dot in dots:
+            self.append(dot)
+
+    def dot_counts_by_subject(self) -> Tuple[List[meta.Entity], np.ndarray]:
+        """Live :func:`activity.dot_counts_by_subject`"""
+        return list(self.subjects), np.array(self._dot_counts, dtype=np.int64)
+
+    def frequently_dotted_subjects(self, as_batch: bool = False, **thresholds) \
+            -> Union[List[meta.Assertion], tables.AssertionBatch]:
+        """Live :func:`activity.frequently_dotted_subjects` (same threshold keywords)"""
+        result, = activity.frequently_dotted_subjects_from_counts(*self.dot_counts_by_subject(), [thresholds],
+                                                                  as_batch=as_batch)
+        return result
+
+    def subject_polarization_table(self) -> disagreement.SubjectPolarizationTable:
+        """Live :func:`disagreement.subject_polarization_table`"""
+        n = np.array(self._synthesis_counts, dtype=np.float64)
+        buckets = np.array(self._buckets, dtype=np.float64).reshape(-1, 3)
+        mapped_sums = buckets[:, _NEUTRAL] + 2 * buckets[:, _POSITIVE]
+        mapped_sum_squares = buckets[:, _NEUTRAL] + 4 * buckets[:, _POSITIVE]
+        negative, positive = buckets[:, _NEGATIVE], buckets[:, _POSITIVE]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            polarization = np.where((negative > 0) & (positive > 0),
+                                    np.minimum(positive / negative, negative / positive), 0.0)
+        return disagreement.SubjectPolarizationTable(
+            subjects=list(self.subjects),
+            divisiveness=_std(n, np.array(self._synthesis_sums), np.array(self._synthesis_sum_squares)),
+            mapped_divisiveness=_std(n, mapped_sums, mapped_sum_squares),
+            polarization=polarization
+        )
+
+    def dots_on_subjects_are_nubby_and_polarizing(self, thresholds: Dict[str, float] = disagreement._THRESHOLD_DICT,
+                                                  as_batch: bool = False) \
+            -> Union[List[meta.Assertion], tables.AssertionBatch]:
+        """Live :func:`disagreement.dots_on_subjects_are_nubby_and_polarizing`"""
+        batch = self.subject_polarization_table().to_batch(thresholds)
+        return batch if as_batch else batch.to_assertions()
+
+    def polarizing_participants(self, as_batch: bool = False) -> Union[List[meta.Assertion], tables.AssertionBatch]:
+        """
+        Live `insights.nubby_polarizing_and_oos.polarizing_participants_38`: subjects who are
+        frequently dotted and whose received dots are polarizing.
+        """
+        frequently_dotted = self.frequently_dotted_subjects(as_batch=True)
+        polarizing = self.subject_polarization_table().is_polarizing()
+        batch = tables.AssertionBatch.from_targets(list(self.subjects), frequently_dotted.values & polarizing)
+        return batch if as_batch else batch.to_assertions()
+
+
+def _std(n: np.ndarray, sums: np.ndarray, sum_squares: np.ndarray, ddof: int = 1) -> np.ndarray:
+    """Standard deviations from counts, sums and sums of squares (NaN if count <= ddof)"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (n * sum_squares - sums * sums) / (n * (n - ddof))
+    return np.where(n > ddof, np.sqrt(np.maximum(variance, 0.)), np.nan)
@@ -0,0 +1,271 @@
+"""
+On-disk columnar cache of hydrated data.
+
+Historical meetings are immutable, so hydrated data can be cached locally and keyed by the query
+that produced it plus a data watermark (e.g. the latest `updated_at` of the underlying rows).
+
+* Each entry is a directory holding one `.npy` file per column and a `metadata.json` file
+* Numeric and fixed-width string columns are read back memory-mapped (no copy into memory)
+* The cache is bounded in bytes; least recently used entries are evicted first
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from prios_api.domain_objects import meta, objects, tables
+from prios_api.src import hydrate
+
+_DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+_METADATA_FILE = 'metadata.json'
+_COLUMN_SUFFIX = '.npy'
+
+Columns = Dict[str, np.ndarray]
+
+
+class ColumnarCache(object):
+    """Size-bounded LRU cache of named columns on disk
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> cache = ColumnarCache(tempfile.mkdtemp())
+    >>> key = ColumnarCache.key("SELECT * FROM dots WHERE meeting_id = 1", watermark='2019-06-30')
+    >>> cache.get(key) is None
+    True
+    >>> cache.put(key, {'value': np.array([7., 2., 9.])}, metadata={'meeting_id': 1})
+    >>> columns, metadata = cache.get(key)
+    >>> columns['value'], metadata
+    (memmap([7., 2., 9.]), {'meeting_id': 1})
+    """
+    def __init__(self, directory: str, max_bytes: int = _DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(query: str, watermark: Any = None) -> str:
+        """Cache key of a query's result as of a data watermark"""
+        return hashlib.sha256('{}\0{}'.format(query, watermark).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self._path(key), _METADATA_FILE))
+
+    def get(self, key: str, mmap: bool = True) -> Optional[Tuple[Columns, Dict[str, Any]]]:
+        """Columns and metadata of an entry (columns memory-mapped if `mmap`), or None on a miss"""
+        path = self._path(key)
+        metadata_path = os.path.join(path, _METADATA_FILE)
+        try:
+            with open(metadata_path) as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return None
+        os.utime(metadata_path)  # Mark as recently used.
+
+        columns = {
+            name: np.load(os.path.join(path, name + _COLUMN_SUFFIX), mmap_mode='r' if mmap else None,
+                          allow_pickle=False)
+            for name in stored['columns']
+        }
+        for name, values in stored['object_columns'].items():
+            columns[name] = np.empty(len(values), dtype=object)
+            columns[name][:] = [_decode_value(value) for value in values]
+        return columns, stored['metadata']
+
+    def put(self, key: str, columns: Columns, metadata: Dict[str, Any] = None):
+        """
+        Stores an entry, replacing any previous entry with the same key, then evicts least
+        recently used other entries beyond `max_bytes`. Object columns (e.g. mixed strings and
+        numbers, timestamps or decimals) are stored as JSON and are not memory-mapped; values
+        JSON cannot represent are stored tagged with their type and restored on :meth:`get`.
+
+        Examples
+        --------
+        >>> import tempfile
+        >>> from datetime import datetime, timezone
+        >>> from decimal import Decimal
+        >>> cache = ColumnarCache(tempfile.mkdtemp())
+        >>> created_at = np.array([datetime(2019, 6, 30, 12), datetime(2019, 7, 1, tzinfo=timezone.utc), None])
+        >>> cache.put('key', {'created_at': created_at, 'value': np.array([Decimal('0.1'), 2, 'n/a'], dtype=object)})
+        >>> columns, _ = cache.get('key')
+        >>> columns['created_at'].tolist() == created_at.tolist(), columns['value'].tolist()
+        (True, [Decimal('0.1'), 2, 'n/a'])
+        """
+        staging = tempfile.mkdtemp(dir=self.directory, prefix='.staging-')
+        stored = {'columns': [], 'object_columns': {}, 'metadata': metadata or {}}
+        for name, values in columns.items():
+            values = np.asarray(values)
+            if values.dtype == object:
+                stored['object_columns'][name] = [_encode_value(value) for value in values.tolist()]
+            else:
+                np.save(os.path.join(staging, name + _COLUMN_SUFFIX), values, allow_pickle=False)
+                stored['columns'].append(name)
+        with open(os.path.join(staging, _METADATA_FILE), 'w') as f:
+            json.dump(stored, f)
+
+        path = self._path(key)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(staging, path)
+        self.evict(keep=key)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Tuple[Columns, Dict[str, Any]]],
+                       mmap: bool = True) -> Tuple[Columns, Dict[str, Any]]:
+        """
+        Cached entry, or the result of `compute` (which is then cached and read back, or
+        returned as is if the entry was evicted in the meantime)
+
+        Examples
+        --------
+        >>> import tempfile
+        >>> cache = ColumnarCache(tempfile.mkdtemp(), max_bytes=1)
+        >>> columns, _ = cache.get_or_compute('larger than the cache', lambda: ({'value': np.arange(3.)}, {}))
+        >>> columns['value']
+        memmap([0., 1., 2.])
+        """
+        cached = self.get(key, mmap=mmap)
+        if cached is None:
+            computed = compute()
+            self.put(key, *computed)
+            cached = self.get(key, mmap=mmap)
+            if cached is None:
+                return computed[0], computed[1] or {}
+        return cached
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for key in os.listdir(self.directory):
+            path = self._path(key)
+            metadata_path = os.path.join(path, _METADATA_FILE)
+            if key.startswith('.') or not os.path.exists(metadata_path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path))
+            entries.append((os.stat(metadata_path).st_mtime, size, key))
+        return entries
+
+    def size_bytes(self) -> int:
+        """Total size of all entries"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, keep: str = None):
+        """
+        Deletes least recently used entries (other than `keep`, e.g. the entry just stored)
+        until the cache fits in `max_bytes`
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                return
+            if key == keep:
+                continue
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            total -= size
+
+
+# Values JSON cannot represent are stored as {tag: text}
+_ENCODERS = [('uuid', uuid.UUID, str), ('datetime', datetime, datetime.isoformat),
+             ('date', date, date.isoformat), ('decimal', Decimal, str)]
+_DECODERS = {'uuid': uuid.UUID, 'datetime': datetime.fromisoformat, 'date': date.fromisoformat,
+             'decimal': Decimal}
+
+
+def _encode_value(value):
+    """JSON representation of a value of an object column (see :func:`_decode_value`)"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return _encode_value(value.item())
+    for tag, value_type, encode in _ENCODERS:  # datetime before date, as datetime subclasses date
+        if isinstance(value, value_type):
+            return {tag: encode(value)}
+    raise TypeError('Cannot cache values of type {}'.format(type(value).__name__))
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        (tag, text), = value.items()
+        return _DECODERS[tag](text)
+    return value
+
+
+def dot_table_to_columns(table: tables.DotTable) -> Tuple[Columns, Dict[str, Any]]:
+    """Columns and metadata (persons and attributes) of a :class:`tables.DotTable`"""
+    columns = {'author': table.author, 'subject': table.subject, 'attribute': table.attribute,
+               'created_at': table.created_at, 'value': table.value}
+    metadata = {
+        'persons': [{'uuid': _encode_value(person.uuid), 'name': getattr(person, 'name', None),
+                     'person_id': getattr(person, 'person_id', None), 'role': getattr(person, 'role', None),
+                     'believability': getattr(person, 'believability', None)}
+                    for person in table.persons],
+        'attributes': [{'name': attribute.name, 'description': attribute.description}
+                       for attribute in table.attributes]
+    }
+    return columns, metadata
+
+
+def dot_table_from_columns(columns: Columns, metadata: Dict[str, Any]) -> tables.DotTable:
+    """Inverse of :func:`dot_table_to_columns`; adopts the (possibly memory-mapped) columns"""
+    persons = [objects.Person(**dict(person, uuid=_decode_value(person['uuid']))) for person in metadata['persons']]
+    attributes = [meta.Attribute(**attribute) for attribute in metadata['attributes']]
+    return tables.DotTable.from_columns(persons=persons, attributes=attributes, **columns)
+
+
+def cached_dot_table(snowflake, query: str, watermark: Any, cache: ColumnarCache,
+                     **kwargs) -> tables.DotTable:
+    """
+    Dots returned by `query` (see :data:`hydrate.DOT_COLUMNS`) as a :class:`tables.DotTable`,
+    hydrated from the warehouse only if the cache has no entry for the query and watermark.
+
+    Examples
+    --------
+    >>> import sqlite3, tempfile
+    >>> snow = hydrate.Snowflake(connect=lambda: sqlite3.connect(':memory:'))
+    >>> _ = snow.query(["CREATE TABLE dots (author, subject, attribute, created_at, value)",
+    ...                 "INSERT INTO dots VALUES ('adam', 'bob', 'Vision', 0, 7), ('bob', 'adam', NULL, 1, 2)"])
+    >>> cache = ColumnarCache(tempfile.mkdtemp())
+    >>> table = cached_dot_table(snow, "SELECT * FROM dots", watermark=1, cache=cache)
+    >>> _ = snow.query(["DELETE FROM dots"])
+    >>> table = cached_dot_table(snow, "SELECT * FROM dots", watermark=1, cache=cache)
+    >>> [(dot.source.person_id, dot.target.person_id, dot.value) for dot in table.to_dots()]
+    [('adam', 'bob', 7.0), ('bob', 'adam', 2.0)]
+    >>> len(cached_dot_table(snow, "SELECT * FROM dots", watermark=2, cache=ColumnarCache(tempfile.mkdtemp(), 1)))
+    0
+    """
+    def compute():
+        return dot_table_to_columns(hydrate.hydrate_dot_table(snowflake.query_batches(query, **kwargs)))
+
+    return dot_table_from_columns(*cache.get_or_compute(ColumnarCache.key(query, watermark), compute))
+
+
+def cached_rows(snowflake, query: str, watermark: Any, cache: ColumnarCache,
+                column_names: Sequence[str], **kwargs) -> Columns:
+    """
+    Result of `query` (e.g. responses or participants) as named columns, queried from the
+    warehouse only if the cache has no entry for the query and watermark.
+    """
+    def compute():
+        collected = {name: [] for name in column_names}
+        for batch in snowflake.query_batches(query, **kwargs):
+            for name, values in zip(column_names, zip(*batch)):
+                collected[name].extend(values)
+        columns = dict()
+        for name, values in collected.items():
+            if len({type(value) for value in values}) == 1 and isinstance(values[0], (bool, int, float, str)):
+                columns[name] = np.array(values)
+            else:
+                columns[name] = np.empty(len(values), dtype=object)
+                columns[name][:] = values
+        return columns, {'column_names': list(column_names)}
+
+    columns, _ = cache.get_or_compute(ColumnarCache.key(query, watermark), compute)
+    return columns
@@ -6,7 +6,6 @@ TBD
 from typing import List, Callable, Optional, TypeVar, Dict, Tuple
 from collections import Counter
 import numpy as np
-from scipy.stats import zscore
 from prios_api.domain_objects import objects
 import itertools
 
@@ -14,6 +13,15 @@ StringOrFloat = TypeVar("StringOrFloat", str, float)
 QuestionOrNumeric = TypeVar("QuestionOrNumeric", objects.QuestionType, objects.NumericRange)
 YES_VALUE = 2
 NO_VALUE = 1
+SEMANTIC_BUCKET_THRESHOLDS = {
+    objects.QuestionType.SCALE: (5, 7),
+    objects.QuestionType.LIKERT: (2.5, 3.5)
+}
+# Semantic bucket of each integer value, indexed by the value itself (0-to-10 and 0-to-5).
+_SEMANTIC_BUCKET_LOOKUP = {
+    objects.QuestionType.SCALE: np.digitize(np.arange(11), SEMANTIC_BUCKET_THRESHOLDS[objects.QuestionType.SCALE]),
+    objects.QuestionType.LIKERT: np.digitize(np.arange(6), SEMANTIC_BUCKET_THRESHOLDS[objects.QuestionType.LIKERT])
+}
 
 
 def map_values(values: List[StringOrFloat], value_type: QuestionOrNumeric):
@@ -60,14 +68,61 @@ def map_values(values: List[StringOrFloat], value_type: QuestionOrNumeric):
 
     if value_type == objects.QuestionType.BINARY:
         return [YES_VALUE if x == "Yes" else NO_VALUE for x in values]
-    elif value_type == objects.QuestionType.SCALE:
-        (low_thresh, high_thresh) = (5, 7)
-    elif value_type == objects.QuestionType.LIKERT:
-        (low_thresh, high_thresh) = (2.5, 3.5)
+    elif value_type in SEMANTIC_BUCKET_THRESHOLDS:
+        return np.digitize(values, SEMANTIC_BUCKET_THRESHOLDS[value_type])
     else:
         return values
 
-    return np.digitize(values, [low_thresh, high_thresh])
+
+def map_values_batch(values: np.ndarray, value_type: QuestionOrNumeric) -> np.ndarray:
+    """
+    Vectorized :func:`map_values` for a whole array of values (e.g. a column of a
+    :class:`tables.DotTable`). Integer values on the 1-to-10 and 1-to-5 ranges are mapped with
+    precomputed lookup tables; other numeric values fall back to `np.digitize`.
+
+    Parameters
+    ----------
+    values
+        Input data
+    value_type
+        Type of values
+
+    Returns
+    -------
+    np.ndarray
+        Semantic bucket codes for numeric and binary types, otherwise the values themselves.
+
+    Examples
+    --------
+    >>> map_values_batch(np.array([1, 5, 7, 10]), value_type=objects.NumericRange.ONE_TO_TEN)
+    array([0, 1, 2, 2])
+    >>> map_values_batch([1.5, 3, 4.5], value_type=objects.QuestionType.LIKERT)
+    array([0, 1, 2])
+    >>> map_values_batch(["Yes", "No"], value_type=objects.QuestionType.BINARY)
+    array([2, 1])
+    """
+    if value_type == objects.NumericRange.ONE_TO_TEN:
+        value_type = objects.QuestionType.SCALE
+    if value_type == objects.NumericRange.ONE_TO_FIVE:
+        value_type = objects.QuestionType.LIKERT
+
+    values = np.asarray(values)
+    if value_type == objects.QuestionType.BINARY:
+        return np.where(values == "Yes", YES_VALUE, NO_VALUE)
+    elif value_type not in SEMANTIC_BUCKET_THRESHOLDS:
+        return values
+
+    lookup = _SEMANTIC_BUCKET_LOOKUP[value_type]
+    if values.dtype.kind in 'iu':
+        integer_values = values
+    elif values.dtype.kind == 'f' and values.size and np.all(np.floor(values) == values):
+        integer_values = values.astype(np.int64)
+    else:
+        return np.digitize(values, SEMANTIC_BUCKET_THRESHOLDS[value_type])
+
+    if values.size and (integer_values.min() < 0 or integer_values.max() >= len(lookup)):
+        return np.digitize(values, SEMANTIC_BUCKET_THRESHOLDS[value_type])
+    return lookup[integer_values]
 
 
 def standard_deviation(x: List[float]) -> float:
@@ -218,6 +273,177 @@ def percent_of_total(values_and_weights: List[Tuple[StringOrFloat, float]]) -> D
     return result
 
 
+def _segment_codes(length: int, codes: Optional[np.ndarray], offsets: Optional[np.ndarray],
+                   number_of_groups: Optional[int]) -> Tuple[np.ndarray, int]:
+    """Group code of each value, from either `codes` or CSR `offsets`."""
+    if offsets is not None:
+        offsets = np.asarray(offsets, dtype=np.int64)
+        number_of_groups = len(offsets) - 1
+        codes = np.repeat(np.arange(number_of_groups), np.diff(offsets))
+    else:
+        codes = np.asarray(codes, dtype=np.int64)
+        if number_of_groups is None:
+            number_of_groups = int(codes.max()) + 1 if len(codes) else 0
+    assert len(codes) == length, 'Must specify one group per value!'
+    return codes, number_of_groups
+
+
+def segment_std(values: np.ndarray, codes: np.ndarray = None, offsets: np.ndarray = None,
+                number_of_groups: int = None, ddof: int = 1) -> np.ndarray:
+    """
+    Segmented :func:`standard_deviation`: one standard deviation per group.
+
+    Groups are given either by `codes` (group of each value) or by `offsets` (values of group `i`
+    are `values[offsets[i]:offsets[i + 1]]`). Like :func:`standard_deviation`, NaN values are
+    ignored and groups with no more than `ddof` values are NaN.
+
+    Parameters
+    ----------
+    values
+        Input values
+    codes
+        Integer group code of each value
+    offsets
+        Group boundaries for values that are contiguous by group
+    number_of_groups
+        Number of groups (defaults to the largest code + 1)
+    ddof
+        Delta degrees of freedom
+
+    Returns
+    -------
+    np.ndarray
+        Standard deviation of each group
+
+    Examples
+    --------
+    >>> np.round(segment_std([1, 2, 4, 4, 4, 1], codes=[0, 0, 0, 0, 0, 1]), 2)
+    array([1.41,  nan])
+    >>> np.round(segment_std([1, 2, 4, 4, 4, 1], offsets=[0, 5, 6]), 2)
+    array([1.41,  nan])
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes, number_of_groups = _segment_codes(len(values), codes, offsets, number_of_groups)
+    present = ~np.isnan(values)
+    codes, values = codes[present], values[present]
+
+    count = np.bincount(codes, minlength=number_of_groups)
+    total = np.bincount(codes, weights=values, minlength=number_of_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+        squared_deviations = np.bincount(codes, weights=(values - mean[codes]) ** 2, minlength=number_of_groups)
+        return np.where(count > ddof, np.sqrt(squared_deviations / (count - ddof)), np.nan)
+
+
+def segment_weighted_mean(values: np.ndarray, weights: np.ndarray = None, codes: np.ndarray = None,
+                          offsets: np.ndarray = None, number_of_groups: int = None) -> np.ndarray:
+    """
+    Segmented :func:`weighted_average`: one (weighted) average per group.
+
+    Groups whose weights sum to zero (including empty groups) are NaN.
+
+    Examples
+    --------
+    >>> np.round(segment_weighted_mean([2, 1, 4, 4, 4, 3], [0.2, 0.01, 0.3, 0, 0, 1],
+    ...                                codes=[0, 0, 0, 0, 0, 1]), 3)
+    array([3.157, 3.   ])
+    >>> segment_weighted_mean([2, 1, 4, 3], offsets=[0, 3, 3, 4])
+    array([2.33333333,        nan, 3.        ])
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes, number_of_groups = _segment_codes(len(values), codes, offsets, number_of_groups)
+    weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    total_weight = np.bincount(codes, weights=weights, minlength=number_of_groups)
+    weighted_total = np.bincount(codes, weights=values * weights, minlength=number_of_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total_weight != 0, weighted_total / total_weight, np.nan)
+
+
+def segment_counts(values: np.ndarray, codes: np.ndarray = None, offsets: np.ndarray = None,
+                   number_of_groups: int = None, normalize: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Segmented :func:`counts`: a matrix of counts with one row per group and one column per
+    distinct value.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Counts (or proportions, if `normalize`) and the sorted distinct values labelling the
+        columns.
+
+    Examples
+    --------
+    >>> table, labels = segment_counts(['a', 'a', 'a', 'b', 'b'], codes=[0, 0, 0, 0, 1], normalize=True)
+    >>> labels
+    array(['a', 'b'], dtype='<U1')
+    >>> table
+    array([[0.75, 0.25],
+           [0.  , 1.  ]])
+
+    Same as :func:`counts` on each group:
+
+    >>> values, codes = [3, 1, 3, 2, 2, 3, 1], [0, 0, 0, 1, 1, 2, 2]
+    >>> table, labels = segment_counts(values, codes=codes, normalize=True)
+    >>> all({label: share for label, share in zip(labels.tolist(), row.tolist()) if share} ==
+    ...     counts([value for value, code in zip(values, codes) if code == group], normalize=True)
+    ...     for group, row in enumerate(table))
+    True
+    """
+    labels, value_codes = np.unique(np.asarray(values), return_inverse=True)
+    value_codes = value_codes.reshape(-1)
+    codes, number_of_groups = _segment_codes(len(value_codes), codes, offsets, number_of_groups)
+
+    table = np.bincount(codes * len(labels) + value_codes, minlength=number_of_groups * len(labels))
+    table = table.reshape(number_of_groups, len(labels))
+    if normalize:
+        row_totals = table.sum(axis=1, keepdims=True)
+        table = np.divide(table, row_totals, out=np.zeros(table.shape), where=row_totals > 0)
+    return table, labels
+
+
+def segment_percent_of_total(values: np.ndarray, weights: np.ndarray, codes: np.ndarray = None,
+                             offsets: np.ndarray = None,
+                             number_of_groups: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Segmented :func:`percent_of_total`: share of each group's total weight held by each
+    distinct value. Groups whose weights sum to zero are NaN.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Percentages with one row per group and the sorted distinct values labelling the columns.
+
+    Examples
+    --------
+    >>> table, labels = segment_percent_of_total(['yes', 'no', 'yes'], [5, 95, 1], codes=[0, 0, 1])
+    >>> labels
+    array(['no', 'yes'], dtype='<U3')
+    >>> table
+    array([[0.95, 0.05],
+           [0.  , 1.  ]])
+
+    Same as :func:`percent_of_total` on each group:
+
+    >>> values, weights = ['no', 'yes', 'no', 'yes', 'no'], [0.5, 0.25, 0.25, 1, 3]
+    >>> table, labels = segment_percent_of_total(values, weights, offsets=[0, 3, 5])
+    >>> all({label: share for label, share in zip(labels.tolist(), row.tolist()) if share} ==
+    ...     percent_of_total(list(zip(values, weights))[start:end])
+    ...     for row, start, end in zip(table, [0, 3], [3, 5]))
+    True
+    """
+    labels, value_codes = np.unique(np.asarray(values), return_inverse=True)
+    value_codes = value_codes.reshape(-1)
+    codes, number_of_groups = _segment_codes(len(value_codes), codes, offsets, number_of_groups)
+
+    table = np.bincount(codes * len(labels) + value_codes, weights=np.asarray(weights, dtype=np.float64),
+                        minlength=number_of_groups * len(labels))
+    table = table.reshape(number_of_groups, len(labels))
+    row_totals = table.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(row_totals != 0, table / row_totals, np.nan), labels
+
+
 def addition(values : List[float]):
     return sum(values)
 
@@ -240,4 +466,5 @@ def map_to_z_score(values: List[float]) -> List[float]:
     >>> map_to_z_score([1,2,3])
     [-1.224744871391589, 0.0, 1.224744871391589]
     """
+    from scipy.stats import zscore  # Deferred: scipy.stats is slow to import.
     return list(zscore(values))
@@ -1,35 +1,362 @@
+"""
+Hydration of Domain Objects from the Snowflake warehouse.
+
+Query results are streamed in batches of rows, and each batch is converted straight into
+columnar tables or Domain Objects, so memory is bounded by the batch size rather than by the
+size of the result.
+
+* Dot rows are expected in :data:`DOT_COLUMNS` order
+* Response rows are expected in :data:`RESPONSE_COLUMNS` order
+"""
 
 import os
-import snowflake.connector
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from prios_api.domain_objects import meta, objects, tables
+from prios_api.src import utils
+
+DOT_COLUMNS = ('author_id', 'subject_id', 'attribute_name', 'created_at', 'value')
+RESPONSE_COLUMNS = ('question_id', 'person_id', 'value')
+_DEFAULT_BATCH_SIZE = 10000
+_DEFAULT_POOL_SIZE = 4
+_HEALTH_CHECK_QUERY = 'SELECT 1'
+
+Row = Tuple[Any, ...]
+# SQL, or SQL and the values bound to its placeholders (in the paramstyle of the connection)
+Query = Union[str, Tuple[str, Sequence[Any]]]
+
+
+def _execute(cursor, input_query: Query):
+    if isinstance(input_query, str):
+        cursor.execute(input_query)
+    else:
+        cursor.execute(*input_query)
+
+
+def _connect_snowflake(user=None, password=None, account=None):
+    import snowflake.connector
+    user = user or os.environ.get('SNOWFLAKE_USER')
+    password = password or os.environ.get('SNOWFLAKE_PASSWORD')
+    account = account or os.environ.get('SNOWFLAKE_ACCOUNT')
+    assert (user and password and account), 'Must specify snowflake warehouse credentials!'
+    return snowflake.connector.connect(user=user, password=password, account=account)
+
+
+class ConnectionPool(object):
+    """Pool of reusable DB-API connections
+
+    * At most `size` connections are open; callers wait for a free one
+    * Idle connections are health-checked before reuse and replaced if the check fails
+    * Connections are thread-safe to hand out, not to share: each caller gets its own
+
+    Examples
+    --------
+    >>> import sqlite3
+    >>> pool = ConnectionPool(lambda: sqlite3.connect(':memory:', check_same_thread=False), size=2)
+    >>> with pool.connection() as first:
+    ...     pass
+    >>> with pool.connection() as second:
+    ...     second is first
+    True
+    >>> pool.close()
+    """
+    def __init__(self, connect: Callable = None, size: int = _DEFAULT_POOL_SIZE,
+                 health_check: Optional[str] = _HEALTH_CHECK_QUERY):
+        assert size > 0, 'Pool size must be positive!'
+        self._connect = _connect_snowflake if connect is None else connect
+        self.size = size
+        self.health_check = health_check
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @classmethod
+    def snowflake(cls, user=None, password=None, account=None, **kwargs) -> 'ConnectionPool':
+        """Pool of Snowflake connections (credentials default to the environment)"""
+        return cls(partial(_connect_snowflake, user=user, password=password, account=account), **kwargs)
+
+    def _is_healthy(self, ctx) -> bool:
+        if self.health_check is None:
+            return True
+        try:
+            with closing(ctx.cursor()) as cs:
+                cs.execute(self.health_check)
+                cs.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def _acquire(self):
+        while True:
+            try:
+                ctx = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if self._is_healthy(ctx):
+                return ctx
+            self._close_quietly(ctx)
+
+    @staticmethod
+    def _close_quietly(ctx):
+        try:
+            ctx.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection for the duration of the `with` block"""
+        self._slots.acquire()
+        try:
+            ctx = self._acquire()
+            failed = False
+            try:
+                yield ctx
+            except Exception:
+                failed = True
+                raise
+            finally:
+                # Also reached on GeneratorExit, e.g. when a caller stops iterating over
+                # `Snowflake.query_batches` early.
+                if failed and not self._is_healthy(ctx):
+                    self._close_quietly(ctx)
+                else:
+                    self._idle.put(ctx)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Closes all idle connections"""
+        while True:
+            try:
+                self._close_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                return
 
 
 class Snowflake(object):
     """Snowflake Connector
     Credentials available in 1Password
+
+    Credentials default to the `SNOWFLAKE_USER`, `SNOWFLAKE_PASSWORD` and `SNOWFLAKE_ACCOUNT`
+    environment variables. Alternatively, `connect` can be any callable returning a DB-API
+    connection (e.g. a local SQLite stand-in), or `pool` a :class:`ConnectionPool` shared across
+    instances, in which case each query borrows a pooled connection.
+
+    Examples
+    --------
+    >>> import sqlite3
+    >>> snow = Snowflake(connect=lambda: sqlite3.connect(':memory:'))
+    >>> _ = snow.query(["CREATE TABLE dots (author, subject, attribute, created_at, value)",
+    ...                 "INSERT INTO dots VALUES ('adam', 'bob', 'Vision', 0, 7), ('bob', 'adam', NULL, 1, 2), "
+    ...                 "('adam', 'bob', 'Vision', 2, 9)"])
+    >>> [len(batch) for batch in snow.query_batches("SELECT * FROM dots", batch_size=2)]
+    [2, 1]
+    >>> pool = ConnectionPool(lambda: sqlite3.connect('file:pooled?mode=memory&cache=shared', uri=True,
+    ...                                               isolation_level=None, check_same_thread=False))
+    >>> snow = Snowflake(pool=pool)
+    >>> _ = snow.query(["CREATE TABLE dots (value)", "INSERT INTO dots VALUES (1), (2), (3)"])
+    >>> snow.query_concurrently({'count': "SELECT COUNT(*) FROM dots", 'total': "SELECT SUM(value) FROM dots"})
+    {'count': [(3,)], 'total': [(6,)]}
+    >>> pool.close()
+
+    Connections are returned to the pool even when iteration stops early:
+
+    >>> small_pool = ConnectionPool(lambda: sqlite3.connect(':memory:', check_same_thread=False), size=1)
+    >>> snow = Snowflake(pool=small_pool)
+    >>> for _ in range(3):
+    ...     for batch in snow.query_batches("SELECT 1 UNION ALL SELECT 2", batch_size=1):
+    ...         break
+    >>> small_pool._idle.qsize(), snow.query(["SELECT 3"])
+    (1, [(3,)])
+    >>> small_pool.close()
     """
-    def __init__(
-            self, 
-            user=os.environ['SNOWFLAKE_USER'], 
-            password=os.environ['SNOWFLAKE_PASSWORD'], 
-            account=os.environ['SNOWFLAKE_ACCOUNT']
-    ):
-        assert (user and password and account), 'Must specify snowflake warehouse credentials!'
-        self.ctx = snowflake.connector.connect(
-            user=user,
-            password=password,
-            account=account
-            )
-
-    def query(self, input_queries=):
-        with self.ctx.cursor() as cs:
+    def __init__(self, user=None, password=None, account=None, connect: Callable = None,
+                 pool: ConnectionPool = None):
+        self.pool = pool
+        self.ctx = None
+        if pool is None:
+            self.ctx = _connect_snowflake(user, password, account) if connect is None else connect()
+
+    @contextmanager
+    def _connection(self):
+        if self.pool is None:
+            yield self.ctx
+        else:
+            with self.pool.connection() as ctx:
+                yield ctx
+
+    def query(self, input_queries: Sequence[Query]) -> List[Row]:
+        """Executes queries (SQL, or SQL and bound parameters) in order and returns all rows of the last one"""
+        with self._connection() as ctx, closing(ctx.cursor()) as cs:
             for input_query in input_queries:
-                cs.execute(input_query)
+                _execute(cs, input_query)
             return cs.fetchall()
 
+    def query_batches(self, input_query: Query, batch_size: int = _DEFAULT_BATCH_SIZE) -> Iterator[List[Row]]:
+        """Executes a query and yields its rows in batches of at most `batch_size` rows"""
+        with self._connection() as ctx, closing(ctx.cursor()) as cs:
+            _execute(cs, input_query)
+            while True:
+                batch = cs.fetchmany(batch_size)
+                if not batch:
+                    return
+                yield batch
+
+    def query_concurrently(self, input_queries: Dict[str, str], max_workers: int = None) -> Dict[str, List[Row]]:
+        """
+        Executes independent queries (e.g. dots, questions, responses and participants)
+        concurrently, each over its own pooled connection.
+
+        Returns
+        -------
+        Dict[str, List[Row]]
+            All rows of each query, by the query's key in `input_queries`.
+        """
+        assert self.pool is not None, 'Concurrent queries require a ConnectionPool!'
+        max_workers = max_workers or self.pool.size
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {key: executor.submit(self.query, [input_query]) for key, input_query in input_queries.items()}
+            return {key: future.result() for key, future in futures.items()}
+
     def __del__(self):
-        self.ctx.close()
+        if getattr(self, 'ctx', None) is not None:
+            self.ctx.close()
 
 
-# snow = Snowflake()
-# for item in snow.query():
-#     print(item)
+def person_for(person_id, persons: Dict[Any, objects.Person]) -> objects.Person:
+    """Known Person with this id, or a new Person (added to `persons`)"""
+    person = persons.get(person_id)
+    if person is None:
+        person = objects.Person(person_id=person_id, uuid=person_id)
+        persons[person_id] = person
+    return person
+
+
+def _encode(values: Sequence[Any], encode_unique: Callable[[Any], int]) -> np.ndarray:
+    """Integer codes of values, calling `encode_unique` once per distinct value."""
+    codes, uniques = utils.factorize(values)
+    lookup = np.array([encode_unique(value) for value in uniques], dtype=np.int64)
+    return lookup[codes] if len(codes) else codes
+
+
+def _epoch_seconds(timestamp: Any) -> float:
+    """
+    Seconds since the epoch of a timestamp, as stored in `DotTable.created_at`.
+
+    Snowflake returns TIMESTAMP columns as :class:`datetime`; naive datetimes (TIMESTAMP_NTZ) are
+    taken to be UTC. Numbers are assumed to be epoch seconds already.
+
+    Examples
+    --------
+    >>> _epoch_seconds(datetime(1970, 1, 2)), _epoch_seconds(3), _epoch_seconds(None)
+    (86400.0, 3.0, nan)
+    """
+    if timestamp is None:
+        return np.nan
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+def hydrate_dot_table(batches: Iterable[List[Row]], persons: Dict[Any, objects.Person] = None,
+                      table: tables.DotTable = None) -> tables.DotTable:
+    """
+    Appends batches of Dot rows (see :data:`DOT_COLUMNS`) to a :class:`tables.DotTable`
+    without materializing :class:`objects.Dot` objects.
+
+    Parameters
+    ----------
+    batches
+        Batches of rows, e.g. :meth:`Snowflake.query_batches`
+    persons
+        Known Persons by id; Persons are created (and added) for unknown ids
+    table
+        Table to append to (default = new table)
+
+    Returns
+    -------
+    tables.DotTable
+
+    Examples
+    --------
+    >>> batches = [[('adam', 'bob', 'Vision', 0, 7), ('bob', 'adam', None, 1, 2)],
+    ...            [('adam', 'bob', 'Vision', datetime(1970, 1, 1, 0, 0, 2), 9)]]
+    >>> table = hydrate_dot_table(batches)
+    >>> table.author, table.subject, table.attribute, table.value
+    (array([0, 1, 0]), array([1, 0, 1]), array([ 0, -1,  0]), array([7., 2., 9.]))
+    >>> table.created_at
+    array([0., 1., 2.])
+    >>> [person.person_id for person in table.persons]
+    ['adam', 'bob']
+    """
+    persons = dict() if persons is None else persons
+    table = tables.DotTable() if table is None else table
+    attributes = dict()
+
+    def attribute_code(name):
+        if name is None:
+            return tables.MISSING_CODE
+        if name not in attributes:
+            attributes[name] = meta.Attribute(name=name, description=None)
+        return table.attribute_code(attributes[name])
+
+    for batch in batches:
+        if not batch:
+            continue
+        author_ids, subject_ids, attribute_names, created_at, values = zip(*batch)
+        table.extend_columns(
+            author=_encode(author_ids, lambda x: table.person_code(person_for(x, persons))),
+            subject=_encode(subject_ids, lambda x: table.person_code(person_for(x, persons))),
+            attribute=_encode(attribute_names, attribute_code),
+            created_at=np.array([_epoch_seconds(timestamp) for timestamp in created_at], dtype=np.float64),
+            value=np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        )
+    return table
+
+
+def hydrate_dots(batches: Iterable[List[Row]], persons: Dict[Any, objects.Person] = None,
+                 dot_class=objects.Dot) -> Iterator[objects.Dot]:
+    """
+    Converts batches of Dot rows (see :data:`DOT_COLUMNS`) into Dots, one batch at a time.
+
+    Examples
+    --------
+    >>> dots = hydrate_dots([[('adam', 'bob', 'Vision', 0, 7)], [('bob', 'adam', None, 1, 2)]])
+    >>> [(dot.source.person_id, dot.target.person_id, dot.value) for dot in dots]
+    [('adam', 'bob', 7.0), ('bob', 'adam', 2.0)]
+    """
+    persons = dict() if persons is None else persons
+    for batch in batches:
+        yield from hydrate_dot_table([batch], persons=persons).to_dots(dot_class=dot_class)
+
+
+def hydrate_responses(batches: Iterable[List[Row]], questions: Dict[Any, objects.Question],
+                      persons: Dict[Any, objects.Person] = None,
+                      response_class=objects.Response) -> Dict[Any, objects.Question]:
+    """
+    Appends batches of Response rows (see :data:`RESPONSE_COLUMNS`) to the responses of
+    their Questions. Rows for unknown questions are skipped.
+
+    Examples
+    --------
+    >>> question = objects.Question(title='Does this work?', question_type=objects.QuestionType.BINARY)
+    >>> _ = hydrate_responses([[('q1', 'adam', 'Yes'), ('q1', 'bob', 'No')]], questions={'q1': question})
+    >>> [(response.source.person_id, response.value) for response in question.responses]
+    [('adam', 'Yes'), ('bob', 'No')]
+    """
+    persons = dict() if persons is None else persons
+    for batch in batches:
+        for question_id, person_id, value in batch:
+            question: Optional[objects.Question] = questions.get(question_id)
+            if question is not None:
+                question.responses.append(response_class(source=person_for(person_id, persons),
+                                                         target=question, value=value))
+    return questions
@@ -0,0 +1,305 @@
+"""
+Opt-in instrumentation of concepts, analytics and insights.
+
+Functions decorated with :func:`instrumented` (and blocks wrapped in :func:`section`) are
+measured while instrumentation is enabled (see :func:`enabled`, :func:`enable`), recording into
+a :class:`Registry`:
+
+* Number of calls and of calls that raised
+* Cumulative wall time
+* Input sizes: Dots and Responses held by Meeting, Question, DotTable and list arguments, and
+  the number of other values in list, tuple and array arguments
+* Optionally, the peak number of bytes allocated by a call (traced with `tracemalloc`, which
+  slows down everything while it is on). Peaks are process-wide: allocations made by other
+  threads during a call count towards its peak.
+
+When disabled, decorated functions only pay for a check of a module-level flag. Results can be
+exported as JSON (:meth:`Registry.to_json`) or in the Prometheus text format
+(:meth:`Registry.to_prometheus`).
+
+Instrumentation is per process: worker processes (e.g. of :mod:`insights.runner`) have to
+enable it and export their own registries.
+"""
+
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import numpy as np
+from prios_api.domain_objects import compact, tables
+from prios_api.src import utils
+
+_DEFAULT_PREFIX = 'prios'
+_METRICS = (
+    # (field, metric name, type, help)
+    ('calls', 'calls_total', 'counter', 'Number of calls'),
+    ('errors', 'errors_total', 'counter', 'Number of calls that raised an exception'),
+    ('seconds', 'seconds_total', 'counter', 'Cumulative wall time in seconds'),
+    ('dots', 'input_dots_total', 'counter', 'Cumulative number of input Dots'),
+    ('responses', 'input_responses_total', 'counter', 'Cumulative number of input Responses'),
+    ('values', 'input_values_total', 'counter', 'Cumulative number of other input values'),
+    ('peak_bytes', 'peak_allocated_bytes', 'gauge', 'Largest peak allocation of a single call in bytes'),
+)
+
+Sizes = Tuple[int, int, int]
+
+
+@dataclass
+class FunctionStats:
+    """Measurements of an instrumented function (or section)"""
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.
+    dots: int = 0
+    responses: int = 0
+    values: int = 0
+    peak_bytes: int = 0
+
+
+class Registry(object):
+    """Measurements by function name
+
+    Examples
+    --------
+    >>> registry = Registry()
+    >>> registry.record('prios_api.activity.engagement_in_meeting', 0.5, (10, 5, 0))
+    >>> registry.record('prios_api.activity.engagement_in_meeting', 0.25, (10, 5, 0), failed=True)
+    >>> registry.stats['prios_api.activity.engagement_in_meeting']
+    FunctionStats(calls=2, errors=1, seconds=0.75, dots=20, responses=10, values=0, peak_bytes=0)
+    >>> print(registry.to_prometheus().splitlines()[2])
+    prios_calls_total{function="prios_api.activity.engagement_in_meeting"} 2
+    """
+    def __init__(self, track_allocations: bool = False):
+        self.track_allocations = track_allocations
+        self.stats: Dict[str, FunctionStats] = dict()
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, sizes: Sizes = (0, 0, 0), peak_bytes: int = 0,
+               failed: bool = False):
+        with self._lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = FunctionStats()
+            stats.calls += 1
+            stats.errors += failed
+            stats.seconds += seconds
+            stats.dots += sizes[0]
+            stats.responses += sizes[1]
+            stats.values += sizes[2]
+            stats.peak_bytes = max(stats.peak_bytes, peak_bytes)
+
+    def clear(self):
+        with self._lock:
+            self.stats.clear()
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Measurements by function name, slowest (cumulative wall time) first"""
+        with self._lock:
+            items = sorted(self.stats.items(), key=lambda item: (-item[1].seconds, item[0]))
+            return {name: asdict(stats) for name, stats in items}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix: str = _DEFAULT_PREFIX) -> str:
+        """Measurements in the Prometheus text exposition format, labelled by function"""
+        stats = self.to_dict()
+        lines = []
+        for field, metric, metric_type, description in _METRICS:
+            if field == 'peak_bytes' and not self.track_allocations:
+                continue
+            name = '{}_{}'.format(prefix, metric)
+            lines.append('# HELP {} {}'.format(name, description))
+            lines.append('# TYPE {} {}'.format(name, metric_type))
+            for function, values in stats.items():
+                label = function.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append('{}{{function="{}"}} {}'.format(name, label, values[field]))
+        return '\n'.join(lines) + '\n'
+
+
+_registry: Optional[Registry] = None
+_started_tracing = False  # Whether `tracemalloc` was started here (and is to be stopped here).
+_allocations = threading.local()
+
+
+def input_sizes(args: Iterable[Any]) -> Sizes:
+    """Number of Dots, Responses and other values held by arguments
+
+    Examples
+    --------
+    >>> from prios_api.examples import likertexample
+    >>> input_sizes([likertexample.meeting, [1, 2, 3], 'ignored'])
+    (0, 5, 3)
+    >>> input_sizes([compact.Meeting(dots=[compact.Dot(value=7)]), [compact.Response(value=1)]])
+    (1, 1, 0)
+    """
+    dots = responses = values = 0
+    for arg in args:
+        if isinstance(arg, compact.MEETING_TYPES):
+            dots += len(arg.dot_table) if arg.dot_table is not None else len(arg.dots or ())
+            responses += sum(len(question.responses) for question in arg.questions or ())
+        elif isinstance(arg, compact.QUESTION_TYPES):
+            responses += len(arg.responses)
+        elif isinstance(arg, tables.DotTable):
+            dots += len(arg)
+        elif isinstance(arg, np.ndarray):
+            values += arg.size
+        elif isinstance(arg, (list, tuple, utils.CollectionView)):
+            first = arg[0] if len(arg) else None
+            if isinstance(first, compact.DOT_TYPES):
+                dots += len(arg)
+            elif isinstance(first, compact.RESPONSE_TYPES):
+                responses += len(arg)
+            else:
+                values += len(arg)
+    return dots, responses, values
+
+
+class _Measurement(object):
+    """Times (and optionally traces allocations of) a call into a registry"""
+    __slots__ = ('registry', 'name', 'sizes', 'start', 'tracing')
+
+    def __init__(self, registry: Registry, name: str, sizes: Sizes):
+        self.registry = registry
+        self.name = name
+        self.sizes = sizes
+
+    def __enter__(self):
+        self.tracing = self.registry.track_allocations and tracemalloc.is_tracing()
+        if self.tracing:
+            # Peaks of nested measurements: resetting the peak for this call hides the peak so
+            # far from the enclosing call, so it is kept on a stack of [start, peak] instead.
+            stack = _allocations.__dict__.setdefault('stack', [])
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            stack.append([current, current])
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.perf_counter() - self.start
+        peak_bytes = 0
+        if self.tracing:
+            stack = _allocations.stack
+            start, peak = stack.pop()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            peak_bytes = peak - start
+        self.registry.record(self.name, seconds, self.sizes, peak_bytes, failed=exc_type is not None)
+        return False
+
+
+def instrumented(function: Callable = None, *, name: str = None) -> Callable:
+    """
+    Decorator that measures calls of `function` while instrumentation is enabled, under `name`
+    (default = the qualified name of the function)
+    """
+    if function is None:
+        return functools.partial(instrumented, name=name)
+    label = name or '{}.{}'.format(function.__module__, function.__qualname__)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        registry = _registry
+        if registry is None:
+            return function(*args, **kwargs)
+        with _Measurement(registry, label, input_sizes(args)):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def section(name: str, *inputs: Any):
+    """Measures a block of code under `name` while instrumentation is enabled (`inputs` are sized)"""
+    registry = _registry
+    if registry is None:
+        yield
+        return
+    with _Measurement(registry, name, input_sizes(inputs)):
+        yield
+
+
+def enable(registry: Registry = None, track_allocations: bool = False) -> Registry:
+    """
+    Enables instrumentation (until :func:`disable`), recording into `registry` (default = a new
+    one). With `track_allocations`, the registry also records peak allocations.
+
+    Examples
+    --------
+    >>> import tracemalloc
+    >>> from prios_api.src import instrumentation
+    >>> registry = instrumentation.enable(instrumentation.Registry(), track_allocations=True)
+    >>> registry.track_allocations, tracemalloc.is_tracing()
+    (True, True)
+    >>> instrumentation.disable()
+    >>> tracemalloc.is_tracing()
+    False
+    """
+    global _registry, _started_tracing
+    registry = registry or Registry(track_allocations)
+    registry.track_allocations = registry.track_allocations or track_allocations
+    if registry.track_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+    elif not registry.track_allocations:
+        _stop_tracing()
+    _registry = registry
+    return registry
+
+
+def _stop_tracing():
+    global _started_tracing
+    if _started_tracing:
+        tracemalloc.stop()
+        _started_tracing = False
+
+
+def disable():
+    """Disables instrumentation (and stops tracing allocations, if :func:`enable` started it)"""
+    global _registry
+    _registry = None
+    _stop_tracing()
+
+
+def active() -> Optional[Registry]:
+    """The registry being recorded into, if instrumentation is enabled"""
+    return _registry
+
+
+@contextmanager
+def enabled(registry: Registry = None, track_allocations: bool = False):
+    """Enables instrumentation for the duration of the `with` block
+
+    Examples
+    --------
+    >>> from prios_api import disagreement
+    >>> from prios_api.src import instrumentation
+    >>> from prios_api.examples import likertexample
+    >>> with instrumentation.enabled(track_allocations=True) as registry:
+    ...     _ = disagreement.disagrees_with_believable_choice(likertexample.question)
+    ...     with instrumentation.section('custom', likertexample.question):
+    ...         _ = disagreement.believable_choice_on_question(likertexample.question)
+    >>> stats = registry.stats['prios_api.disagreement.believable_choice_on_question']
+    >>> stats.calls, stats.responses, stats.peak_bytes > 0
+    (2, 10, True)
+    >>> registry.stats['custom'].calls, registry.stats['custom'].responses
+    (1, 5)
+    >>> instrumentation.active() is None
+    True
+    """
+    previous = _registry
+    registry = enable(registry, track_allocations)
+    try:
+        yield registry
+    finally:
+        if previous is None:
+            disable()
+        else:
+            enable(previous)
@@ -0,0 +1,190 @@
+"""
+Opt-in memoization of analytics on Questions and Meetings.
+
+Functions decorated with :func:`memoized` behave exactly as before unless they are called
+inside an :func:`enabled` block, in which case results are cached by a cheap fingerprint of
+the arguments rather than by hashing their content:
+
+* Domain Objects, lists and :class:`tables.DotTable` are fingerprinted by identity, `uuid`,
+  size (number of responses, dots, questions or participants) and a version counter; a
+  :class:`utils.CollectionView` is fingerprinted as the collection it views
+* Other arguments are used as they are if hashable; calls with other unhashable arguments are
+  not cached
+* Cached entries hold references to their arguments, so identities cannot be reused while an
+  entry is alive
+
+Appending responses or dots changes the fingerprint. Mutations that do not change sizes (e.g.
+editing a response value) inside an :func:`enabled` block must be followed by :func:`touch`.
+Version counters are kept by the cache of the block, so they are released with it.
+
+Cached results are shared by every caller with the same arguments (e.g. the same Assertion
+objects are returned again) and must be treated as read-only.
+"""
+
+import functools
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from prios_api.domain_objects import compact, tables
+from prios_api.src import utils
+
+_DEFAULT_MAXSIZE = 1024
+_SIZED_FIELDS = ('responses', 'dots', 'questions', 'participants')
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+_active: ContextVar[Optional['MemoCache']] = ContextVar('memoize_active', default=None)
+
+
+class Unfingerprintable(TypeError):
+    """Raised for arguments that cannot be fingerprinted"""
+
+
+def version(obj: Any) -> int:
+    """Version counter of an object in the active cache (see :func:`touch`)"""
+    cache = _active.get()
+    return 0 if cache is None else cache.version(obj)
+
+
+def touch(obj: Any):
+    """
+    Marks an object as modified in place, invalidating results computed from it that are cached
+    in the active :func:`enabled` block (outside of one, nothing is cached and this does nothing)
+
+    Examples
+    --------
+    >>> from prios_api.domain_objects import objects
+    >>> question = objects.Question()
+    >>> with enabled() as cache:
+    ...     before = fingerprint(question)
+    ...     touch(question)
+    ...     fingerprint(question) == before
+    False
+    >>> version(question)
+    0
+    """
+    cache = _active.get()
+    if cache is not None:
+        cache.touch(obj)
+
+
+def fingerprint(obj: Any) -> Hashable:
+    """Cheap fingerprint of an argument
+
+    Examples
+    --------
+    >>> from prios_api.domain_objects import objects
+    >>> question = objects.Question()
+    >>> before = fingerprint(question)
+    >>> question.responses.append(objects.Response(value=1))
+    >>> fingerprint(question) == before
+    False
+    >>> fingerprint(compact.Question(responses=[compact.Response(value=1)]))[::3]
+    ('Question', (1,))
+    >>> fingerprint({'divisiveness': 1.0})
+    ('dict', (('divisiveness', 1.0),))
+    >>> fingerprint({2: 'b', 'a': 1})
+    ('dict', (('a', 1), (2, 'b')))
+    """
+    if isinstance(obj, compact.ENTITY_TYPES):
+        sizes = tuple(len(getattr(obj, name) or ()) for name in _SIZED_FIELDS if hasattr(obj, name))
+        return type(obj).__name__, id(obj), obj.uuid, sizes, version(obj)
+    if isinstance(obj, (list, tables.DotTable)):
+        return type(obj).__name__, id(obj), len(obj), version(obj)
+    if isinstance(obj, utils.CollectionView):
+        return fingerprint(obj._items)
+    if isinstance(obj, dict):
+        items = sorted(obj.items(), key=lambda item: repr(item[0]))  # Keys may not be comparable.
+        return 'dict', tuple((key, fingerprint(value)) for key, value in items)
+    if isinstance(obj, tuple):
+        return 'tuple', tuple(fingerprint(value) for value in obj)
+    try:
+        hash(obj)
+    except TypeError:
+        raise Unfingerprintable(type(obj).__name__)
+    return obj
+
+
+class MemoCache(object):
+    """Bounded LRU cache of function results with hit/miss counters"""
+    def __init__(self, maxsize: int = _DEFAULT_MAXSIZE):
+        assert maxsize > 0, 'Cache size must be positive!'
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Versions by id of touched objects; the objects are referenced so that ids are not reused.
+        self._versions: Dict[int, Tuple[Any, int]] = dict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def version(self, obj: Any) -> int:
+        entry = self._versions.get(id(obj))
+        return 0 if entry is None else entry[1]
+
+    def touch(self, obj: Any):
+        self._versions[id(obj)] = (obj, self.version(obj) + 1)
+
+    def get_or_compute(self, key: Hashable, references: Any, compute: Callable[[], Any]) -> Any:
+        """Cached result for `key`, or the result of `compute` (kept alive with `references`)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        result = compute()
+        self._entries[key] = (references, result)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return result
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+        self._versions.clear()
+
+
+@contextmanager
+def enabled(maxsize: int = _DEFAULT_MAXSIZE):
+    """Enables memoization of :func:`memoized` functions for the duration of the `with` block
+
+    Examples
+    --------
+    >>> from prios_api import disagreement
+    >>> from prios_api.src import memoize
+    >>> from prios_api.examples import likertexample
+    >>> with memoize.enabled() as cache:
+    ...     _ = disagreement.disagrees_with_believable_choice(likertexample.question)
+    ...     _ = disagreement.believable_consensus_exists(likertexample.question, number_participants=5)
+    >>> cache.info()
+    CacheInfo(hits=1, misses=1, maxsize=1024, currsize=1)
+    """
+    cache = MemoCache(maxsize)
+    token = _active.set(cache)
+    try:
+        yield cache
+    finally:
+        _active.reset(token)
+
+
+def memoized(function: Callable) -> Callable:
+    """
+    Decorator that caches results of `function` while memoization is :func:`enabled`. Cached
+    results are shared between callers and must not be modified.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        cache = _active.get()
+        if cache is None:
+            return function(*args, **kwargs)
+        try:
+            key = (function.__module__, function.__qualname__, fingerprint(args), fingerprint(kwargs))
+        except Unfingerprintable:
+            return function(*args, **kwargs)
+        return cache.get_or_compute(key, (args, kwargs), lambda: function(*args, **kwargs))
+    return wrapper
@@ -0,0 +1,326 @@
+"""
+Aggregate pushdown into warehouse SQL.
+
+Analytics that only need per-group counts, sums, sums of squares and semantic bucket histograms
+request these sufficient statistics from the warehouse, then finish the computation locally.
+Only one row per group is transferred instead of one row per Dot.
+
+* Relation and column names in :class:`DotSource` are interpolated into SQL and must be trusted;
+  values belong in `DotSource.parameters`, bound to placeholders in `DotSource.where`
+* Generated SQL is ANSI and runs on Snowflake as well as on SQLite or DuckDB stand-ins
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from prios_api import activity, disagreement
+from prios_api.domain_objects import meta, objects, tables
+from prios_api.src import foundation, hydrate, utils
+
+_GROUPABLE_COLUMNS = ('author', 'subject', 'attribute')
+
+
+def _key_order(key: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """
+    Sort key of a group key: missing (None) parts first, then parts of different types (e.g.
+    integer and string uuids) by type name, which keeps keys of mixed types comparable
+    """
+    return tuple((part is not None, type(part).__name__, part) for part in key)
+
+
+@dataclass
+class DotSource:
+    """
+    Relation (table, view or parenthesized subquery) holding Dots, and its column names.
+    `parameters` are bound to the placeholders of the `where` condition.
+    """
+    relation: str = 'dots'
+    author: str = 'author_id'
+    subject: str = 'subject_id'
+    attribute: str = 'attribute_name'
+    value: str = 'value'
+    created_at: str = 'created_at'
+    where: Optional[str] = None
+    parameters: Tuple[Any, ...] = ()
+
+
+@dataclass
+class SufficientStatistics:
+    """
+    Per-group sufficient statistics of Dot values.
+
+    * `keys` holds the group-by values of each group
+    * `buckets` has one row per group and one column per semantic bucket (negative, neutral,
+      positive on the 1-to-10 scale)
+    """
+    keys: List[Tuple[Any, ...]]
+    count: np.ndarray
+    total: np.ndarray
+    total_squares: np.ndarray
+    buckets: np.ndarray
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_dot_table(cls, table: tables.DotTable, group_by: Sequence[str]) -> 'SufficientStatistics':
+        """
+        Computes the statistics of :func:`sufficient_statistics_sql` locally. Persons are keyed
+        by `uuid` and attributes by `name` (None if missing); groups are ordered by their keys
+        (see :func:`_key_order`).
+
+        Examples
+        --------
+        >>> adam = objects.Person(name='Adam', uuid='Adam')
+        >>> bob = objects.Person(name='Bob', uuid='Bob')
+        >>> table = tables.DotTable.from_dots([objects.Dot(source=adam, target=bob, value=10),
+        ...                                    objects.Dot(source=bob, target=adam, value=3),
+        ...                                    objects.Dot(source=adam, target=bob, value=6)])
+        >>> statistics = SufficientStatistics.from_dot_table(table, ['subject'])
+        >>> statistics.keys, statistics.mean(), statistics.buckets.tolist()
+        ([('Adam',), ('Bob',)], array([3., 8.]), [[1, 0, 0], [0, 1, 1]])
+        """
+        assert all(column in _GROUPABLE_COLUMNS for column in group_by), \
+            'Must group by some of {}!'.format(_GROUPABLE_COLUMNS)
+        person_keys = [person.uuid for person in table.persons]
+        attribute_keys = [attribute.name for attribute in table.attributes] + [None]  # MISSING_CODE is -1
+        key_columns = {
+            'author': [person_keys[code] for code in table.author.tolist()],
+            'subject': [person_keys[code] for code in table.subject.tolist()],
+            'attribute': [attribute_keys[code] for code in table.attribute.tolist()],
+        }
+        return cls.from_values(list(zip(*[key_columns[column] for column in group_by])) if group_by
+                               else [()] * len(table), table.value)
+
+    @classmethod
+    def from_values(cls, row_keys: List[Tuple[Any, ...]], values: np.ndarray) -> 'SufficientStatistics':
+        """Statistics of values grouped by the key of each value (missing values are NaN)"""
+        codes, keys = utils.factorize(row_keys)
+        keys = [tuple(key) for key in keys]
+        order = sorted(range(len(keys)), key=lambda i: _key_order(keys[i]))
+        rank = np.empty(len(keys), dtype=np.int64)
+        rank[order] = np.arange(len(keys))
+        codes, keys = rank[codes] if len(codes) else codes, [keys[i] for i in order]
+
+        values = np.asarray(values, dtype=np.float64)
+        present = ~np.isnan(values)
+        codes, values = codes[present], values[present]
+        n = len(keys)
+        buckets = np.digitize(values, foundation.SEMANTIC_BUCKET_THRESHOLDS[objects.QuestionType.SCALE])
+        return cls(keys=keys, count=np.bincount(codes, minlength=n),
+                   total=np.bincount(codes, weights=values, minlength=n),
+                   total_squares=np.bincount(codes, weights=values * values, minlength=n),
+                   buckets=np.bincount(codes * 3 + buckets, minlength=3 * n).reshape(n, 3))
+
+    def merge(self, other: 'SufficientStatistics') -> 'SufficientStatistics':
+        """
+        Combines statistics of disjoint sets of Dots (e.g. shards), adding up groups with the
+        same key. Merging is associative and commutative.
+
+        Examples
+        --------
+        >>> first = SufficientStatistics.from_values([('Adam',), ('Bob',)], [10, 3])
+        >>> second = SufficientStatistics.from_values([('Bob',)], [7])
+        >>> merged = first.merge(second)
+        >>> merged.keys, merged.count, merged.total
+        ([('Adam',), ('Bob',)], array([1, 2]), array([10., 10.]))
+        >>> merged.merge(SufficientStatistics.from_values([(2,), (None,), (1,)], [1, 2, 3])).keys
+        [(None,), (1,), (2,), ('Adam',), ('Bob',)]
+        """
+        codes, keys = utils.factorize(self.keys + other.keys)
+        n = len(keys)
+
+        def add(column, other_column):
+            stacked = np.concatenate([column, other_column])
+            if stacked.ndim == 1:
+                return np.bincount(codes, weights=stacked, minlength=n).astype(stacked.dtype)
+            result = np.zeros((n,) + stacked.shape[1:], dtype=stacked.dtype)
+            np.add.at(result, codes, stacked)
+            return result
+
+        merged = SufficientStatistics(keys=[tuple(key) for key in keys], count=add(self.count, other.count),
+                                      total=add(self.total, other.total),
+                                      total_squares=add(self.total_squares, other.total_squares),
+                                      buckets=add(self.buckets.reshape(-1, 3), other.buckets.reshape(-1, 3)))
+        order = sorted(range(n), key=lambda i: _key_order(merged.keys[i]))
+        return merged.select(order)
+
+    def select(self, indices: Sequence[int]) -> 'SufficientStatistics':
+        """Statistics of a subset of the groups, in the given order"""
+        indices = np.asarray(indices, dtype=np.int64)
+        return SufficientStatistics(keys=[self.keys[i] for i in indices.tolist()], count=self.count[indices],
+                                    total=self.total[indices], total_squares=self.total_squares[indices],
+                                    buckets=self.buckets.reshape(-1, 3)[indices])
+
+    def collapse(self) -> 'SufficientStatistics':
+        """Statistics of all groups together, as a single group with the empty key"""
+        return SufficientStatistics(keys=[()], count=self.count.sum(keepdims=True),
+                                    total=self.total.sum(keepdims=True),
+                                    total_squares=self.total_squares.sum(keepdims=True),
+                                    buckets=self.buckets.reshape(-1, 3).sum(axis=0, keepdims=True))
+
+    def mean(self) -> np.ndarray:
+        """Average value of each group"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 0, self.total / self.count, np.nan)
+
+    def standard_deviation(self, ddof: int = 1) -> np.ndarray:
+        """Standard deviation of each group (NaN for groups with no more than `ddof` values)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            squared_deviations = np.maximum(self.total_squares - self.total ** 2 / self.count, 0.0)
+            return np.where(self.count > ddof, np.sqrt(squared_deviations / (self.count - ddof)), np.nan)
+
+
+def sufficient_statistics_sql(source: DotSource, group_by: Sequence[str]) -> str:
+    """
+    SQL computing :class:`SufficientStatistics` of Dot values grouped by `group_by`, a
+    sequence of 'author', 'subject' and/or 'attribute'.
+
+    Examples
+    --------
+    >>> print(sufficient_statistics_sql(DotSource(), group_by=['subject']))
+    SELECT subject_id, COUNT(value), SUM(value), SUM(value * value), SUM(CASE WHEN value < 5 THEN 1 ELSE 0 END), SUM(CASE WHEN value >= 5 AND value < 7 THEN 1 ELSE 0 END), SUM(CASE WHEN value >= 7 THEN 1 ELSE 0 END)
+    FROM dots
+    GROUP BY subject_id
+    ORDER BY subject_id
+    """
+    assert group_by and all(column in _GROUPABLE_COLUMNS for column in group_by), \
+        'Must group by some of {}!'.format(_GROUPABLE_COLUMNS)
+    keys = ', '.join(getattr(source, column) for column in group_by)
+    value = source.value
+    low, high = foundation.SEMANTIC_BUCKET_THRESHOLDS[objects.QuestionType.SCALE]
+    aggregates = [
+        'COUNT({})'.format(value),
+        'SUM({})'.format(value),
+        'SUM({0} * {0})'.format(value),
+        'SUM(CASE WHEN {0} < {1} THEN 1 ELSE 0 END)'.format(value, low),
+        'SUM(CASE WHEN {0} >= {1} AND {0} < {2} THEN 1 ELSE 0 END)'.format(value, low, high),
+        'SUM(CASE WHEN {0} >= {1} THEN 1 ELSE 0 END)'.format(value, high),
+    ]
+    lines = ['SELECT {}, {}'.format(keys, ', '.join(aggregates)), 'FROM {}'.format(source.relation)]
+    if source.where:
+        lines.append('WHERE {}'.format(source.where))
+    lines += ['GROUP BY {}'.format(keys), 'ORDER BY {}'.format(keys)]
+    return '\n'.join(lines)
+
+
+def _query(snowflake, source: DotSource, sql: str) -> List[hydrate.Row]:
+    return snowflake.query([(sql, source.parameters) if source.parameters else sql])
+
+
+def query_sufficient_statistics(snowflake, source: DotSource, group_by: Sequence[str]) -> SufficientStatistics:
+    """Runs :func:`sufficient_statistics_sql` on a :class:`hydrate.Snowflake` connection"""
+    rows = _query(snowflake, source, sufficient_statistics_sql(source, group_by))
+    number_of_keys = len(group_by)
+    keys = [tuple(row[:number_of_keys]) for row in rows]
+    aggregates = np.array([row[number_of_keys:] for row in rows], dtype=np.float64).reshape(len(rows), 6)
+    aggregates = np.nan_to_num(aggregates)  # SUM over no values is NULL
+    return SufficientStatistics(keys=keys, count=aggregates[:, 0].astype(np.int64), total=aggregates[:, 1],
+                                total_squares=aggregates[:, 2], buckets=aggregates[:, 3:].astype(np.int64))
+
+
+def dot_counts_sql(source: DotSource, group_by: Sequence[str]) -> str:
+    """
+    SQL counting the Dots of each group, with or without a value. Groups are ordered by their
+    first Dot (earliest `created_at`, then by key), like the first appearance order of the local
+    analytics.
+
+    Examples
+    --------
+    >>> print(dot_counts_sql(DotSource(), group_by=['subject']))
+    SELECT subject_id, COUNT(*)
+    FROM dots
+    GROUP BY subject_id
+    ORDER BY MIN(created_at), subject_id
+    """
+    assert group_by and all(column in _GROUPABLE_COLUMNS for column in group_by), \
+        'Must group by some of {}!'.format(_GROUPABLE_COLUMNS)
+    keys = ', '.join(getattr(source, column) for column in group_by)
+    lines = ['SELECT {}, COUNT(*)'.format(keys), 'FROM {}'.format(source.relation)]
+    if source.where:
+        lines.append('WHERE {}'.format(source.where))
+    lines += ['GROUP BY {}'.format(keys), 'ORDER BY MIN({}), {}'.format(source.created_at, keys)]
+    return '\n'.join(lines)
+
+
+def query_dot_counts(snowflake, source: DotSource, group_by: Sequence[str]) -> Tuple[List[Tuple[Any, ...]], np.ndarray]:
+    """Runs :func:`dot_counts_sql`: group keys and the number of Dots in each group"""
+    rows = _query(snowflake, source, dot_counts_sql(source, group_by))
+    number_of_keys = len(group_by)
+    return [tuple(row[:number_of_keys]) for row in rows], np.array([row[-1] for row in rows], dtype=np.int64)
+
+
+def engagement_raw(snowflake, source: DotSource, group_by: Sequence[str] = ('subject',)) -> Dict[Any, int]:
+    """
+    Pushed-down :func:`engagement.engagement_raw`: number of Dots in each group.
+
+    Returns
+    -------
+    Dict[Any, int]
+        Number of Dots by group key (a tuple if grouping by more than one column).
+    """
+    keys, counts = query_dot_counts(snowflake, source, group_by)
+    return {key if len(key) > 1 else key[0]: count for key, count in zip(keys, counts.tolist())}
+
+
+def frequently_dotted_subjects(snowflake, source: DotSource, persons: Dict[Any, objects.Person] = None,
+                               **thresholds) -> List[meta.Assertion]:
+    """
+    Pushed-down :func:`activity.frequently_dotted_subjects`. Subjects are Persons from
+    `persons` by id (created if unknown), in order of their first Dot; `thresholds` are as in
+    the local analytic. Dots without a value count too.
+
+    Examples
+    --------
+    >>> import sqlite3
+    >>> snow = hydrate.Snowflake(connect=lambda: sqlite3.connect(':memory:'))
+    >>> _ = snow.query(["CREATE TABLE dots (author_id, subject_id, attribute_name, created_at, value)",
+    ...                 "INSERT INTO dots VALUES ('adam', 'bob', NULL, 0, 10), ('charlie', 'bob', NULL, 1, 1), "
+    ...                 "('charlie', 'bob', NULL, 2, 2), ('bob', 'adam', NULL, 3, 7), "
+    ...                 "('adam', 'charlie', NULL, 4, NULL)"])
+    >>> [(x.target.person_id, x.value) for x in frequently_dotted_subjects(snow, DotSource())]
+    [('bob', True), ('adam', True), ('charlie', True)]
+    """
+    persons = dict() if persons is None else persons
+    keys, counts = query_dot_counts(snowflake, source, ['subject'])
+    subjects = [hydrate.person_for(key[0], persons) for key in keys]
+    return activity.frequently_dotted_subjects_from_counts(subjects, counts, [thresholds])[0]
+
+
+def subject_polarization_table(snowflake, source: DotSource,
+                               persons: Dict[Any, objects.Person] = None) -> disagreement.SubjectPolarizationTable:
+    """
+    Pushed-down :func:`disagreement.subject_polarization_table`: authors' opinions of each
+    subject are synthesized from (author, subject) sums and counts aggregated in the warehouse.
+    Subjects are in order of their first Dot (see :func:`dot_counts_sql`), like the local table.
+
+    Examples
+    --------
+    >>> import sqlite3
+    >>> snow = hydrate.Snowflake(connect=lambda: sqlite3.connect(':memory:'))
+    >>> _ = snow.query(["CREATE TABLE dots (author_id, subject_id, attribute_name, created_at, value)",
+    ...                 "INSERT INTO dots VALUES ('adam', 'bob', NULL, 0, 10), ('charlie', 'bob', NULL, 1, 1), "
+    ...                 "('charlie', 'bob', NULL, 2, 2), ('bob', 'adam', NULL, 3, 7)"])
+    >>> table = subject_polarization_table(snow, DotSource())
+    >>> [(subject.person_id, polarizing) for subject, polarizing in zip(table.subjects, table.is_polarizing().tolist())]
+    [('bob', True), ('adam', False)]
+
+    Subjects are ordered as in the local table, not by their ids:
+
+    >>> rows = [('bob', 'charlie', None, 0, 10), ('adam', 'bob', None, 1, 2), ('charlie', 'adam', None, 2, 5)]
+    >>> _ = snow.query(["DELETE FROM dots"] + [("INSERT INTO dots VALUES (?, ?, ?, ?, ?)", row) for row in rows])
+    >>> local = disagreement.subject_polarization_table(hydrate.hydrate_dot_table([rows]))
+    >>> [subject.person_id for subject in subject_polarization_table(snow, DotSource()).subjects]
+    ['charlie', 'bob', 'adam']
+    >>> [subject.person_id for subject in local.subjects]
+    ['charlie', 'bob', 'adam']
+    """
+    persons = dict() if persons is None else persons
+    statistics = query_sufficient_statistics(snowflake, source, ['author', 'subject'])
+    subject_keys, _ = query_dot_counts(snowflake, source, ['subject'])
+    codes = {subject_id: code for code, (subject_id,) in enumerate(subject_keys)}
+    # Subjects missing from the counts (e.g. Dots deleted between the two queries) are numbered last.
+    subject_codes = np.array([codes.setdefault(key[1], len(codes)) for key in statistics.keys], dtype=np.int64)
+    subjects = [hydrate.person_for(subject_id, persons) for subject_id in codes]
+    return disagreement.SubjectPolarizationTable.from_syntheses(subjects=subjects, subject_codes=subject_codes,
+                                                                syntheses=statistics.mean())
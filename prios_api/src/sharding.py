@@ -0,0 +1,167 @@
+"""
+Sharded company-wide Dot statistics.
+
+Statistics over every Dot in the company are computed as mergeable partial aggregates
+(:class:`DotStatistics`): each shard (e.g. a meeting or a date range) is aggregated in a
+separate process, locally or in the warehouse, and the partial aggregates are merged
+associatively by :func:`aggregate_shards`.
+"""
+
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Iterable, List, Tuple, Union
+import numpy as np
+from prios_api.domain_objects import objects, tables
+from prios_api.src import hydrate, pushdown
+
+
+@dataclass
+class DotStatistics:
+    """Partial aggregate of Dot values: sufficient statistics by attribute and by subject
+
+    Examples
+    --------
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> first = DotStatistics.from_dots([objects.Dot(source=adam, target=bob, value=10)])
+    >>> second = DotStatistics.from_dots([objects.Dot(source=bob, target=adam, value=4)])
+    >>> merged = first.merge(second)
+    >>> merged.overall().count, merged.overall().mean()
+    (array([2]), array([7.]))
+    >>> merged.by_subject.keys
+    [('Adam',), ('Bob',)]
+    """
+    by_attribute: pushdown.SufficientStatistics
+    by_subject: pushdown.SufficientStatistics
+
+    @classmethod
+    def empty(cls) -> 'DotStatistics':
+        return cls.from_dot_table(tables.DotTable())
+
+    @classmethod
+    def from_dot_table(cls, table: tables.DotTable) -> 'DotStatistics':
+        return cls(by_attribute=pushdown.SufficientStatistics.from_dot_table(table, ['attribute']),
+                   by_subject=pushdown.SufficientStatistics.from_dot_table(table, ['subject']))
+
+    @classmethod
+    def from_dots(cls, dots: Union[Iterable[objects.Dot], tables.DotTable]) -> 'DotStatistics':
+        return cls.from_dot_table(tables.as_dot_table(dots))
+
+    @classmethod
+    def from_warehouse(cls, snowflake, source: pushdown.DotSource) -> 'DotStatistics':
+        """Partial aggregate computed in the warehouse (subjects keyed by id)"""
+        return cls(by_attribute=pushdown.query_sufficient_statistics(snowflake, source, ['attribute']),
+                   by_subject=pushdown.query_sufficient_statistics(snowflake, source, ['subject']))
+
+    def merge(self, other: 'DotStatistics') -> 'DotStatistics':
+        """Combines partial aggregates of disjoint sets of Dots"""
+        return DotStatistics(by_attribute=self.by_attribute.merge(other.by_attribute),
+                             by_subject=self.by_subject.merge(other.by_subject))
+
+    def overall(self) -> pushdown.SufficientStatistics:
+        """Statistics of all Dots"""
+        return self.by_attribute.collapse()
+
+
+def date_range_shards(start: float, end: float, number_of_shards: int) -> List[Tuple[float, float]]:
+    """
+    Splits `[start, end)` into contiguous, equally long date ranges (as `created_at` timestamps)
+
+    Examples
+    --------
+    >>> date_range_shards(0, 30, 3)
+    [(0.0, 10.0), (10.0, 20.0), (20.0, 30.0)]
+    """
+    bounds = np.linspace(start, end, number_of_shards + 1).tolist()
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+@dataclass
+class WarehouseShard:
+    """
+    Aggregates a shard of a :class:`pushdown.DotSource` in the warehouse. Called with a
+    `(start, end)` date range (see :func:`date_range_shards`) or a meeting id.
+
+    Shard values are bound as query parameters with `placeholder` (`%s` for the Snowflake
+    connector's default paramstyle, `?` for SQLite), so date range bounds can also be
+    `datetime` objects for a `TIMESTAMP` column.
+
+    Instances are picklable as long as `connect` is (e.g. a module-level function), so they can
+    be sent to worker processes; each call opens its own connection.
+
+    Examples
+    --------
+    >>> WarehouseShard().where("O'Brien's 1:1")
+    ('meeting_id = %s', ("O'Brien's 1:1",))
+    >>> WarehouseShard(pushdown.DotSource(where='value > ?', parameters=(0,)), placeholder='?').where((0., 10.))
+    ('(value > ?) AND created_at >= ? AND created_at < ?', (0, 0.0, 10.0))
+    """
+    source: pushdown.DotSource = field(default_factory=pushdown.DotSource)
+    created_at: str = 'created_at'
+    meeting: str = 'meeting_id'
+    connect: Callable = None
+    placeholder: str = '%s'
+
+    def where(self, shard: Any) -> Tuple[str, Tuple[Any, ...]]:
+        """Condition selecting the shard from the source, and the parameters bound to it"""
+        if isinstance(shard, tuple):
+            condition = '{0} >= {1} AND {0} < {1}'.format(self.created_at, self.placeholder)
+            parameters = tuple(shard)
+        else:
+            condition = '{} = {}'.format(self.meeting, self.placeholder)
+            parameters = (shard, )
+        if self.source.where is None:
+            return condition, parameters
+        return '({}) AND {}'.format(self.source.where, condition), tuple(self.source.parameters) + parameters
+
+    def __call__(self, shard: Any) -> DotStatistics:
+        snowflake = hydrate.Snowflake(connect=self.connect)
+        where, parameters = self.where(shard)
+        return DotStatistics.from_warehouse(snowflake, replace(self.source, where=where, parameters=parameters))
+
+
+def aggregate_shards(shards: Iterable[Any], aggregate_shard: Callable[[Any], DotStatistics],
+                     executor: Executor = None, max_workers: int = None) -> DotStatistics:
+    """
+    Aggregates shards in parallel and merges the partial aggregates.
+
+    Parameters
+    ----------
+    shards
+        Shard descriptions, e.g. meeting ids or date ranges
+    aggregate_shard
+        Picklable callable computing the :class:`DotStatistics` of a shard, e.g.
+        :class:`WarehouseShard`
+    executor
+        Executor to run shards on (default = a new `ProcessPoolExecutor`)
+    max_workers
+        Number of worker processes of the default executor
+
+    Returns
+    -------
+    DotStatistics
+
+    Examples
+    --------
+    >>> import sqlite3
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> connect = functools.partial(sqlite3.connect, 'file:shards?mode=memory&cache=shared', uri=True,
+    ...                             check_same_thread=False)
+    >>> keep_alive = connect()
+    >>> _ = keep_alive.executescript(
+    ...     "CREATE TABLE dots (author_id, subject_id, attribute_name, created_at, value);"
+    ...     "INSERT INTO dots VALUES ('adam', 'bob', 'Vision', 1, 10), ('bob', 'adam', 'Vision', 12, 2), "
+    ...     "('adam', 'bob', NULL, 25, 6);")
+    >>> with ThreadPoolExecutor() as executor:
+    ...     statistics = aggregate_shards(date_range_shards(0, 30, 3), WarehouseShard(connect=connect, placeholder='?'),
+    ...                                   executor)
+    >>> statistics.by_attribute.keys, statistics.by_attribute.count
+    ([(None,), ('Vision',)], array([1, 2]))
+    >>> statistics.overall().mean()
+    array([6.])
+    """
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return aggregate_shards(shards, aggregate_shard, executor)
+    return functools.reduce(DotStatistics.merge, executor.map(aggregate_shard, shards), DotStatistics.empty())
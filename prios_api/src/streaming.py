@@ -0,0 +1,286 @@
+"""
+Streaming (online) statistics.
+
+Accumulators consume values one at a time (`update`) or in chunks (`update_many`), can be
+merged across partitions (`merge`) and produce the same results as the batch functions in
+:mod:`prios_api.src.foundation` (up to floating point rounding) without holding the values in
+memory. Missing values (NaN or None) are skipped by every accumulator.
+
+
+* :class:`Mean` and :class:`WeightedMean` - :func:`foundation.weighted_average`
+* :class:`Variance` - :func:`foundation.standard_deviation` (Welford's algorithm)
+* :class:`BucketCounts` - semantic bucket counts and mapped divisiveness
+  (:func:`divisiveness.divisiveness_stat`)
+* :class:`PoleRatio` - :func:`polarizing.polarizing_stat`
+"""
+
+import itertools
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional
+import numpy as np
+from prios_api.src import foundation
+from prios_api.domain_objects import objects
+
+_DEFAULT_CHUNK_SIZE = 10000
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value != value
+
+
+def _present(values: np.ndarray) -> np.ndarray:
+    """Values that are not missing (NaN or None)"""
+    if values.dtype.kind == 'f':
+        return values[~np.isnan(values)]
+    if values.dtype == object:
+        return values[np.fromiter((not _is_missing(value) for value in values), dtype=bool, count=len(values))]
+    return values
+
+
+class Accumulator(ABC):
+    """Base class of streaming statistics"""
+    def update(self, value: Any) -> 'Accumulator':
+        """Consumes a single value"""
+        return self.update_many(np.array([value]))
+
+    @abstractmethod
+    def update_many(self, values: Iterable[Any]) -> 'Accumulator':
+        """Consumes a chunk of values"""
+
+    @abstractmethod
+    def merge(self, other: 'Accumulator') -> 'Accumulator':
+        """Combines the state of an accumulator of the same type that consumed other values"""
+
+    @abstractmethod
+    def result(self) -> Any:
+        """Statistic of the values consumed so far"""
+
+
+class Mean(Accumulator):
+    """Streaming average
+
+    Examples
+    --------
+    >>> Mean().update(2).update(1).update(None).update_many([4, 4, float('nan'), 4]).result()
+    3.0
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.
+
+    def update(self, value: float) -> 'Mean':
+        if _is_missing(value):
+            return self
+        self.count += 1
+        self.mean += (value - self.mean) / self.count
+        return self
+
+    def update_many(self, values: Iterable[float]) -> 'Mean':
+        values = _present(np.asarray(values, dtype=np.float64))
+        if len(values):
+            chunk = Mean()
+            chunk.count, chunk.mean = len(values), values.mean()
+            self.merge(chunk)
+        return self
+
+    def merge(self, other: 'Mean') -> 'Mean':
+        count = self.count + other.count
+        if count:
+            self.mean += (other.mean - self.mean) * other.count / count
+        self.count = count
+        return self
+
+    def result(self) -> float:
+        return self.mean if self.count else np.nan
+
+
+class WeightedMean(Accumulator):
+    """Streaming weighted average (West's algorithm)
+
+    Like :func:`foundation.weighted_average`, raises ZeroDivisionError if the weights sum to zero.
+
+    Examples
+    --------
+    >>> accumulator = WeightedMean().update(2, 0.2).update(1, 0.01)
+    >>> round(accumulator.update_many([4, 4, 4, float('nan')], [0.3, 0, 0, 1]).result(), 3)
+    3.157
+    """
+    def __init__(self):
+        self.total_weight = 0.
+        self.mean = 0.
+
+    def update(self, value: float, weight: float = 1.) -> 'WeightedMean':
+        if _is_missing(value):
+            return self
+        self.total_weight += weight
+        if self.total_weight:
+            self.mean += (value - self.mean) * weight / self.total_weight
+        return self
+
+    def update_many(self, values: Iterable[float], weights: Iterable[float] = None) -> 'WeightedMean':
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=np.float64)
+        present = ~np.isnan(values)
+        values, weights = values[present], weights[present]
+        chunk = WeightedMean()
+        chunk.total_weight = weights.sum()
+        if chunk.total_weight:
+            chunk.mean = (values * weights).sum() / chunk.total_weight
+        return self.merge(chunk)
+
+    def merge(self, other: 'WeightedMean') -> 'WeightedMean':
+        total_weight = self.total_weight + other.total_weight
+        if total_weight:
+            self.mean += (other.mean - self.mean) * other.total_weight / total_weight
+        self.total_weight = total_weight
+        return self
+
+    def result(self) -> float:
+        if not self.total_weight:
+            raise ZeroDivisionError('Weights sum to zero, can\'t be normalized')
+        return self.mean
+
+
+class Variance(Accumulator):
+    """Streaming variance and standard deviation (Welford's algorithm)
+
+    NaN values are ignored; with no more than `ddof` values the result is NaN.
+
+    Examples
+    --------
+    >>> accumulator = Variance().update(1).update(2).update_many([4, 4, float('nan'), 4])
+    >>> round(accumulator.standard_deviation(), 2)
+    1.41
+    >>> Variance().update(1).standard_deviation()
+    nan
+    """
+    def __init__(self, ddof: int = 1):
+        self.ddof = ddof
+        self.count = 0
+        self.mean = 0.
+        self.sum_squared_deviations = 0.
+
+    def update(self, value: float) -> 'Variance':
+        if _is_missing(value):
+            return self
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.sum_squared_deviations += delta * (value - self.mean)
+        return self
+
+    def update_many(self, values: Iterable[float]) -> 'Variance':
+        values = _present(np.asarray(values, dtype=np.float64))
+        if len(values):
+            chunk = Variance(self.ddof)
+            chunk.count, chunk.mean = len(values), values.mean()
+            chunk.sum_squared_deviations = np.square(values - chunk.mean).sum()
+            self.merge(chunk)
+        return self
+
+    def merge(self, other: 'Variance') -> 'Variance':
+        count = self.count + other.count
+        if count:
+            delta = other.mean - self.mean
+            self.sum_squared_deviations += (other.sum_squared_deviations +
+                                            delta * delta * self.count * other.count / count)
+            self.mean += delta * other.count / count
+        self.count = count
+        return self
+
+    def result(self) -> float:
+        """Variance"""
+        if self.count <= self.ddof:
+            return np.nan
+        return self.sum_squared_deviations / (self.count - self.ddof)
+
+    def standard_deviation(self) -> float:
+        return float(np.sqrt(self.result()))
+
+
+class BucketCounts(Accumulator):
+    """Streaming counts of semantic buckets (see :func:`foundation.map_values_batch`)
+
+    Examples
+    --------
+    >>> accumulator = BucketCounts(objects.QuestionType.SCALE).update(1).update_many([10, 6, float('nan'), 9])
+    >>> accumulator.result()
+    {0: 1, 1: 1, 2: 2}
+    >>> round(accumulator.divisiveness(), 3)
+    0.957
+    """
+    def __init__(self, value_type: Any = objects.QuestionType.SCALE):
+        self.value_type = value_type
+        self.counts = np.zeros(3, dtype=np.int64)
+
+    def update_many(self, values: Iterable[Any]) -> 'BucketCounts':
+        values = _present(values if isinstance(values, np.ndarray) else np.array(list(values)))
+        if len(values):
+            mapped_values = foundation.map_values_batch(values, self.value_type)
+            self.counts += np.bincount(mapped_values, minlength=3)[:3]
+        return self
+
+    def merge(self, other: 'BucketCounts') -> 'BucketCounts':
+        self.counts += other.counts
+        return self
+
+    def result(self) -> Dict[int, int]:
+        """Number of values in each (non-empty) bucket"""
+        return {bucket: count for bucket, count in enumerate(self.counts.tolist()) if count}
+
+    def divisiveness(self, ddof: int = 1) -> float:
+        """Standard deviation of the bucketed values (mapped divisiveness)"""
+        buckets = np.arange(3)
+        count = self.counts.sum()
+        if count <= ddof:
+            return np.nan
+        mean = (buckets * self.counts).sum() / count
+        return float(np.sqrt((self.counts * np.square(buckets - mean)).sum() / (count - ddof)))
+
+
+class PoleRatio(BucketCounts):
+    """Streaming :func:`polarizing.polarizing_stat` of values on the 1-to-10 scale
+
+    Examples
+    --------
+    >>> PoleRatio().update(1).update(10).result()
+    1.0
+    >>> PoleRatio().update_many([10, 10, float('nan')]).result()
+    0.0
+    """
+    def __init__(self):
+        super().__init__(objects.NumericRange.ONE_TO_TEN)
+
+    def result(self) -> float:
+        negative, _, positive = self.counts.tolist()
+        if negative and positive:
+            return min(positive / negative, negative / positive)
+        return 0.0
+
+
+def accumulate(values: Iterable[Any], *accumulators: Accumulator,
+               chunk_size: int = _DEFAULT_CHUNK_SIZE) -> Optional[Accumulator]:
+    """
+    Feeds an iterable (e.g. a generator of warehouse rows) to accumulators in chunks of
+    `chunk_size` values, holding at most one chunk in memory.
+
+    Returns
+    -------
+    Optional[Accumulator]
+        The first accumulator (for convenience)
+
+    Examples
+    --------
+    >>> mean, variance = Mean(), Variance()
+    >>> _ = accumulate((value % 10 for value in range(1000)), mean, variance, chunk_size=64)
+    >>> mean.result(), round(variance.standard_deviation(), 3)
+    (4.5, 2.874)
+    """
+    values = iter(values)
+    while True:
+        chunk = list(itertools.islice(values, chunk_size))
+        if not chunk:
+            return accumulators[0] if accumulators else None
+        chunk = np.array(chunk)
+        for accumulator in accumulators:
+            accumulator.update_many(chunk)
@@ -0,0 +1,191 @@
+"""
+Vectorized synthetic Meetings for benchmarks and load tests.
+
+Follows the simulation in `Activity Data.ipynb`: the number of Dots each subject receives on
+each attribute in each period (e.g. day) is Poisson distributed with a rate that can vary over
+time (see :func:`poisson_rates`), authors and ratings are drawn uniformly. Instead of appending
+one Dot at a time, every Dot is drawn at once into the columns of a :class:`tables.DotTable`,
+so millions of Dots take a few seconds; materializing them as :class:`objects.Dot` is optional.
+
+Generation is reproducible: the same `seed` always produces the same Meeting.
+"""
+
+from typing import Iterable, List, Sequence, Tuple
+import numpy as np
+from prios_api.domain_objects import meta, objects, tables
+
+RESPONSE_VALUES = {
+    objects.QuestionType.LIKERT: list(range(1, 6)),
+    objects.QuestionType.SCALE: list(range(1, 11)),
+    objects.QuestionType.RATING: list(range(1, 11)),
+    objects.QuestionType.BINARY: ['Yes', 'No'],
+    objects.QuestionType.CATEGORICAL: ['Give up', 'Delay', 'Push Ahead and see what happens',
+                                       'Do whatever it takes to make it work'],
+}
+DOT_VALUES = list(range(1, 11))
+SECONDS_PER_DAY = 86400.
+# Most people are not very believable: Beta(1, 9) has a mean of 0.1.
+_BELIEVABILITY_DISTRIBUTION = (1., 9.)
+
+# (subject, attribute, first period, last period (exclusive), rate)
+Burst = Tuple[int, int, int, int, float]
+
+
+def people(number_of_people: int, rng: np.random.Generator,
+           believability: Tuple[float, float] = _BELIEVABILITY_DISTRIBUTION) -> List[objects.Person]:
+    """Persons (with `uuid` and `person_id` set to their index) whose believability is Beta distributed"""
+    values = rng.beta(*believability, size=number_of_people).tolist()
+    return [objects.Person(name='Person {}'.format(i), person_id=str(i), uuid=i, believability=value)
+            for i, value in enumerate(values)]
+
+
+def attributes(number_of_attributes: int) -> List[meta.Attribute]:
+    return [meta.Attribute(name='Attribute {}'.format(i), description=None) for i in range(number_of_attributes)]
+
+
+def poisson_rates(number_of_subjects: int, number_of_attributes: int, number_of_periods: int,
+                  rate: float = 2., bursts: Iterable[Burst] = ()) -> np.ndarray:
+    """
+    Expected number of Dots each subject receives on each attribute in each period, of shape
+    (subjects, attributes, periods). Every rate is `rate`, except during `bursts`.
+
+    Examples
+    --------
+    The scenario of `Activity Data.ipynb`: the first subject receives more Dots on the first
+    attribute over the last 30 of 100 days, the second subject on the second attribute over the
+    middle 30 days.
+
+    >>> rates = poisson_rates(7, 2, 100, bursts=[(0, 0, 70, 99, 10.), (1, 1, 40, 69, 10.)])
+    >>> rates.shape, rates.sum()
+    ((7, 2, 100), 3264.0)
+    """
+    rates = np.full((number_of_subjects, number_of_attributes, number_of_periods), rate, dtype=np.float64)
+    for subject, attribute, start, end, burst_rate in bursts:
+        rates[subject, attribute, start:end] = burst_rate
+    return rates
+
+
+def dot_table(rates: np.ndarray, persons: Sequence[meta.Entity], attributes_: Sequence[meta.Attribute],
+              rng: np.random.Generator, number_of_dots: int = None, start: float = 0.,
+              period_seconds: float = SECONDS_PER_DAY) -> tables.DotTable:
+    """
+    Draws Dots into a :class:`tables.DotTable`, in chronological order.
+
+    Parameters
+    ----------
+    rates
+        Poisson rates of shape (subjects, attributes, periods), see :func:`poisson_rates`.
+        Subjects are the first persons.
+    persons
+        Authors (drawn uniformly) and subjects
+    attributes_
+        Attributes of the rates
+    rng
+        Random number generator, e.g. `np.random.default_rng(seed)`
+    number_of_dots
+        Draw exactly this many Dots (distributed in proportion to the rates) instead of a
+        Poisson distributed number of Dots in every period
+    start
+        `created_at` timestamp of the start of the first period
+    period_seconds
+        Length of a period in seconds (default = a day)
+
+    Examples
+    --------
+    >>> rng = np.random.default_rng(0)
+    >>> persons = people(3, rng)
+    >>> table = dot_table(poisson_rates(3, 1, 10), persons, attributes(1), rng)
+    >>> len(table) > 0, bool(np.all(np.diff(table.created_at) >= 0)), set(table.value) <= set(DOT_VALUES)
+    (True, True, True)
+    >>> len(dot_table(poisson_rates(3, 1, 10), persons, attributes(1), rng, number_of_dots=1000))
+    1000
+    """
+    flat_rates = rates.ravel()
+    if number_of_dots is None:
+        cells = np.repeat(np.arange(flat_rates.size), rng.poisson(flat_rates))
+    else:
+        # Inverse transform sampling (much faster than `rng.choice(p=...)` over millions of cells),
+        # with sorted draws so that the search walks the cumulative rates in order.
+        cumulative_rates = np.cumsum(flat_rates)
+        draws = np.sort(rng.random(number_of_dots)) * cumulative_rates[-1]
+        cells = np.searchsorted(cumulative_rates, draws, side='right')
+    subject, attribute, period = np.unravel_index(cells, rates.shape)
+
+    size = len(cells)
+    author = rng.integers(0, len(persons), size=size)
+    value = np.asarray(DOT_VALUES, dtype=np.float64)[rng.integers(0, len(DOT_VALUES), size=size)]
+    created_at = start + (period + rng.random(size)) * period_seconds
+
+    order = np.argsort(created_at)
+    return tables.DotTable.from_columns(author=author[order], subject=subject[order].astype(np.int64),
+                                        attribute=attribute[order].astype(np.int64),
+                                        created_at=created_at[order], value=value[order],
+                                        persons=list(persons), attributes=list(attributes_))
+
+
+def questions(participants: Sequence[objects.Person], rng: np.random.Generator, number_of_questions: int,
+              question_types: Sequence[objects.QuestionType] = tuple(RESPONSE_VALUES),
+              response_rate: float = 1.) -> List[objects.Question]:
+    """
+    Questions cycling through `question_types`, each answered by every participant with
+    probability `response_rate` with a uniformly drawn value (see :data:`RESPONSE_VALUES`).
+    Responses target their Question.
+
+    Examples
+    --------
+    >>> question, = questions(people(3, np.random.default_rng(0)), np.random.default_rng(0), 1)
+    >>> len(question.responses), question.responses[0].target is question
+    (3, True)
+    """
+    results = []
+    for i in range(number_of_questions):
+        question_type = question_types[i % len(question_types)]
+        question = objects.Question(title='Question {}'.format(i), question_type=question_type)
+        responded = np.flatnonzero(rng.random(len(participants)) < response_rate).tolist()
+        choices = RESPONSE_VALUES[question_type]
+        values = rng.integers(0, len(choices), size=len(responded)).tolist()
+        question.responses = [objects.Response(source=participants[j], target=question, value=choices[k])
+                              for j, k in zip(responded, values)]
+        results.append(question)
+    return results
+
+
+def meeting(number_of_participants: int = 100, number_of_dots: int = None, number_of_questions: int = 5,
+            number_of_attributes: int = 10, number_of_periods: int = 100, rate: float = 2.,
+            bursts: Iterable[Burst] = (), believability: Tuple[float, float] = _BELIEVABILITY_DISTRIBUTION,
+            question_types: Sequence[objects.QuestionType] = tuple(RESPONSE_VALUES), response_rate: float = 1.,
+            start: float = 0., seed: int = 0, materialize: bool = True) -> objects.Meeting:
+    """
+    Synthetic Meeting in which participants Dot each other.
+
+    `meeting.dot_table` always holds the Dots; with `materialize`, `meeting.dots` holds them as
+    :class:`objects.Dot` too (which takes most of the time for millions of Dots). See
+    :func:`dot_table` and :func:`questions` for the other parameters.
+
+    Examples
+    --------
+    >>> first = meeting(number_of_participants=20, number_of_dots=500, seed=1)
+    >>> len(first.participants), len(first.dots), len(first.dot_table), len(first.questions)
+    (20, 500, 500, 5)
+    >>> [question.question_type.name for question in first.questions]
+    ['LIKERT', 'SCALE', 'RATING', 'BINARY', 'CATEGORICAL']
+
+    Responses and their Questions refer to each other, so Meetings are compared by their
+    serialization rather than with `==`:
+
+    >>> from prios_api.domain_objects import serialization
+    >>> second = meeting(number_of_participants=20, number_of_dots=500, seed=1)
+    >>> serialization.dumps(first) == serialization.dumps(second)
+    True
+    """
+    rng = np.random.default_rng(seed)
+    participants = people(number_of_participants, rng, believability)
+    rates = poisson_rates(number_of_participants, number_of_attributes, number_of_periods, rate, bursts)
+    table = dot_table(rates, participants, attributes(number_of_attributes), rng, number_of_dots, start)
+    result = objects.Meeting(name='Synthetic Meeting', participants=participants,
+                             questions=questions(participants, rng, number_of_questions, question_types,
+                                                 response_rate),
+                             dot_table=table)
+    if materialize:
+        result.dots = table.to_dots()
+    return result
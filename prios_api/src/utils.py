@@ -2,11 +2,138 @@
 """
 TBD
 """
-from typing import List, Any, Tuple, Callable
-from itertools import groupby
+import functools
+from collections.abc import Sequence
+from typing import List, Any, Tuple, Callable, Iterable, Iterator, Optional, Dict
+from dataclasses import dataclass
+import numpy as np
 from prios_api.domain_objects import meta, objects
 
 
+@dataclass
+class Grouping:
+    """
+    Groups of elements in CSR layout: the elements of group `i` are
+    `indices[offsets[i]:offsets[i + 1]]`, in their original order.
+
+    * `keys` holds the key of each group
+    * `codes` holds the group of each element
+    """
+    keys: List[Any]
+    codes: np.ndarray
+    offsets: np.ndarray
+    indices: np.ndarray
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def group(self, i: int) -> np.ndarray:
+        """Indices of the elements in group `i` (a view, not a copy)"""
+        return self.indices[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[Tuple[Any, np.ndarray]]:
+        for i, key in enumerate(self.keys):
+            yield key, self.group(i)
+
+
+def factorize(keys: Iterable[Any]) -> Tuple[np.ndarray, List[Any]]:
+    """
+    Encodes hashable keys as integer codes in a single pass. Codes are assigned in order of
+    first appearance.
+
+    Examples
+    --------
+    >>> codes, uniques = factorize(['b', 'a', 'b', 'c'])
+    >>> codes, uniques
+    (array([0, 1, 0, 2]), ['b', 'a', 'c'])
+    """
+    table = dict()
+    codes = [table.setdefault(key, len(table)) for key in keys]
+    return np.array(codes, dtype=np.int64), list(table)
+
+
+def factorize_columns(*columns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encodes rows of non-negative integer columns as integer codes, without a Python callback
+    per row. Codes follow the sorted order of the rows.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Code of each row and the unique rows (one column per input column).
+
+    Examples
+    --------
+    >>> codes, uniques = factorize_columns(np.array([1, 0, 1]), np.array([2, 5, 2]))
+    >>> codes
+    array([1, 0, 1])
+    >>> uniques
+    array([[0, 5],
+           [1, 2]])
+    """
+    columns = [np.asarray(column, dtype=np.int64) for column in columns]
+    if len(columns[0]) == 0:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(columns)), dtype=np.int64)
+    combined = np.zeros(len(columns[0]), dtype=np.int64)
+    for column in columns:
+        combined = combined * (int(column.max()) + 1) + column
+    unique_combined, codes = np.unique(combined, return_inverse=True)
+    codes = codes.reshape(-1)
+    representative_row = np.empty(len(unique_combined), dtype=np.int64)
+    representative_row[codes] = np.arange(len(codes))
+    uniques = np.stack([column[representative_row] for column in columns], axis=1)
+    return codes, uniques
+
+
+def group_by_codes(codes: np.ndarray, keys: List[Any] = None, number_of_groups: int = None) -> Grouping:
+    """
+    Groups elements by precomputed integer codes.
+
+    Examples
+    --------
+    >>> grouping = group_by_codes(np.array([1, 0, 1, 1]))
+    >>> grouping.offsets, grouping.indices
+    (array([0, 1, 4]), array([1, 0, 2, 3]))
+    >>> grouping.group(1)
+    array([0, 2, 3])
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    if number_of_groups is None:
+        number_of_groups = len(keys) if keys is not None else int(codes.max()) + 1 if len(codes) else 0
+    if keys is None:
+        keys = list(range(number_of_groups))
+    sizes = np.bincount(codes, minlength=number_of_groups)
+    offsets = np.zeros(number_of_groups + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    indices = np.argsort(codes, kind='stable')
+    return Grouping(keys=keys, codes=codes, offsets=offsets, indices=indices)
+
+
+def group_by_key(assertions: List[meta.Assertion], key_func: Callable) -> Grouping:
+    """
+    Groups assertions by user-specified Callable, calling it once per assertion. Groups are
+    ordered by first appearance of their key.
+
+    Examples
+    --------
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> dots = [objects.Dot(source=bob, target=adam, value=1),
+    ...         objects.Dot(source=adam, target=bob, value=2),
+    ...         objects.Dot(source=bob, target=adam, value=3)]
+    >>> for key, indices in group_by_key(dots, key_func=lambda x: x.source.uuid):
+    ...     print(key, [dots[i].value for i in indices])
+    Bob [1, 3]
+    Adam [2]
+    """
+    codes, keys = factorize(key_func(assertion) for assertion in assertions)
+    return group_by_codes(codes, keys=keys)
+
+
 def group_assertions_by_key(assertions: List[meta.Assertion], key_func: Callable) -> List[Tuple[Any, Any]]:
     """
     Groups values in list of assertions by user-specified Callable.
@@ -44,20 +171,178 @@ def group_assertions_by_key(assertions: List[meta.Assertion], key_func: Callable
     Charlie Bob 1
     Charlie Adam 5
     """
-    assertion_list = sorted(assertions, key=key_func)
-    grouped_assertion_list = groupby(assertion_list, key=key_func)
-    return [(k, list(v)) for k, v in grouped_assertion_list]
+    grouping = group_by_key(assertions, key_func=key_func)
+    ordered_groups = sorted(range(len(grouping)), key=grouping.keys.__getitem__)
+    return [(grouping.keys[i], [assertions[j] for j in grouping.group(i)]) for i in ordered_groups]
+
 
+def _target_uuid(assertion: meta.Assertion):
+    return assertion.target.uuid
+
+
+def join_assertions(left: Iterable[meta.Assertion], right: Iterable[meta.Assertion],
+                    key_func: Callable = _target_uuid,
+                    keep_unmatched: bool = False) -> List[Tuple[meta.Assertion, Optional[meta.Assertion]]]:
+    """
+    Pairs up assertions from two lists that share a key, in linear time (the right-hand list is
+    indexed by key in a dictionary).
+
+    Parameters
+    ----------
+    left
+        List of assertions; output follows its order
+    right
+        List of assertions to be matched to `left`
+    key_func
+        Callable specifying the join key (default = uuid of the target)
+    keep_unmatched
+        Whether left assertions without a match are kept (paired with None)
+
+    Returns
+    -------
+    List[Tuple[meta.Assertion, Optional[meta.Assertion]]]
+        Each left assertion paired with every right assertion that has the same key.
+
+    Examples
+    --------
+    >>> adam = objects.Person(name='Adam', uuid='Adam')
+    >>> bob = objects.Person(name='Bob', uuid='Bob')
+    >>> left = [meta.Assertion(target=adam, value=1), meta.Assertion(target=bob, value=2)]
+    >>> right = [meta.Assertion(target=bob, value=3)]
+    >>> for x, y in join_assertions(left, right):
+    ...     print(x.target.name, x.value, y.value)
+    Bob 2 3
+    >>> for x, y in join_assertions(left, right, keep_unmatched=True):
+    ...     print(x.target.name, x.value, y and y.value)
+    Adam 1 None
+    Bob 2 3
+    """
+    index: Dict[Any, List[meta.Assertion]] = dict()
+    for assertion in right:
+        index.setdefault(key_func(assertion), []).append(assertion)
+
+    result = []
+    for assertion in left:
+        matches = index.get(key_func(assertion))
+        if matches:
+            result += [(assertion, match) for match in matches]
+        elif keep_unmatched:
+            result.append((assertion, None))
+    return result
+
+
+class CollectionView(Sequence):
+    """Read-only sequence view of a collection (no copy): supports `len`, indexing and iteration
+
+    Examples
+    --------
+    >>> dots = [1, 2, 3]
+    >>> view = CollectionView(dots)
+    >>> len(view), view[-1], list(view)
+    (3, 3, [1, 2, 3])
+    >>> view.append(4)
+    Traceback (most recent call last):
+    ...
+    AttributeError: 'CollectionView' object has no attribute 'append'
+    """
+    __slots__ = ('_items', )
+
+    def __init__(self, items: Sequence):
+        self._items = items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __repr__(self):
+        return 'CollectionView({!r})'.format(self._items)
+
+
+class ScopedView(object):
+    """
+    Read-only projection of an object onto some of its attributes, without copying or mutating it.
+
+    * Only `attributes` and `collections` can be read; collections are returned as
+      :class:`CollectionView`, so they cannot be appended to or reassigned
+    * Items of collections (e.g. Dots) are the original objects
+    * Changes to the original object are visible through the view
+
+    Examples
+    --------
+    >>> meeting = objects.Meeting(name='Test Meeting', dots=[objects.Dot(value=1)])
+    >>> view = ScopedView(meeting, attributes=['name'], collections=['dots'])
+    >>> view.name, len(view.dots), view.dots[0] is meeting.dots[0]
+    ('Test Meeting', 1, True)
+    >>> view.questions
+    Traceback (most recent call last):
+    ...
+    AttributeError: 'questions' is not in the scope of this view of Meeting
+    >>> view.name = 'Renamed'
+    Traceback (most recent call last):
+    ...
+    AttributeError: ScopedView is read-only
+    """
+    __slots__ = ('_target', '_attributes', '_collections')
+
+    def __init__(self, target: Any, attributes: Iterable[str] = None, collections: Iterable[str] = None):
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_attributes', frozenset(attributes or ()))
+        object.__setattr__(self, '_collections', frozenset(collections or ()))
+
+    def __getattr__(self, name: str):
+        if name in self._collections:
+            collection = getattr(self._target, name)
+            return None if collection is None else CollectionView(collection)
+        if name in self._attributes:
+            return getattr(self._target, name)
+        raise AttributeError('{!r} is not in the scope of this view of {}'.format(name, type(self._target).__name__))
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError('ScopedView is read-only')
+
+    def __delattr__(self, name: str):
+        raise AttributeError('ScopedView is read-only')
+
+    def __dir__(self):
+        return sorted(self._attributes | self._collections)
+
+    def __repr__(self):
+        return 'ScopedView({}: {})'.format(type(self._target).__name__, ', '.join(dir(self)))
+
+
+def scope_required_data_within_object(attributes_to_keep: List[str] = None, collections_to_keep: List[str] = None):
+    """
+    This decorator scopes the required data for an object and passes it into the decorated
+    function, as a read-only :class:`ScopedView` of the declared attributes and collections.
+    The object itself is neither copied nor modified, so it can be passed to many scoped
+    functions in turn.
+
+    Keeping 'dots' also keeps 'dot_table', the columnar form of the same Dots (see
+    :func:`tables.dot_table_of`).
+
+    Examples
+    --------
+    >>> @scope_required_data_within_object(collections_to_keep=['dots'])
+    ... def number_of_dots(meeting):
+    ...     return len(meeting.dots), meeting.dot_table
+    >>> meeting = objects.Meeting(name='Test Meeting', dots=[objects.Dot(value=1)])
+    >>> number_of_dots(meeting), meeting.name
+    ((1, None), 'Test Meeting')
+    """
+    assert attributes_to_keep or collections_to_keep, 'Must specify some data to retain in object!'
+    attributes_to_keep = list(attributes_to_keep or ())
+    if 'dots' in (collections_to_keep or ()) and 'dot_table' not in attributes_to_keep:
+        attributes_to_keep.append('dot_table')
 
-def scope_required_data_within_object(attributes_to_keep=None, collections_to_keep=None):
-    """This decorator scopes the required data for an object
-    and passes it into the decorated function"""
     def actual_filtering_decorator(function):
-        def wrapper(original_object, **kwargs):
-            original_object.empty(attributes_to_keep, collections_to_keep)
-            print(dir(original_object))
-            return function(original_object, **kwargs)
+        @functools.wraps(function)
+        def wrapper(original_object, *args, **kwargs):
+            view = ScopedView(original_object, attributes=attributes_to_keep, collections=collections_to_keep)
+            return function(view, *args, **kwargs)
         return wrapper
     return actual_filtering_decorator
-
-
@@ -1,12 +1,18 @@
 
-import pandas as pd
-import altair as alt
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def plot_timeseries_from_df(
-    df: pd.DataFrame = None, x: str = None, y: str = None, title: str = None,
+    df: 'pd.DataFrame' = None, x: str = None, y: str = None, title: str = None,
     notebook_render=False
 ):
+    # Deferred: pandas and altair are slow to import and only needed for plotting.
+    import pandas as pd
+    import altair as alt
+
     assert (
         isinstance(df, pd.DataFrame) and not df.empty and x and y
     ), 'Must specify dataframe and column names for x, y axes!'